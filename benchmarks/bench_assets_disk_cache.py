@@ -0,0 +1,106 @@
+"""
+Compare the latency of serving an asset from the local disk cache of `assets_proxy`
+with fetching it from the storage backend with a new connection, as `assets_proxy`
+used to do with `urllib.request.urlopen`.
+
+A local HTTP server stands in for S3. It adds a fixed delay to every request to
+simulate the network round-trip to the bucket.
+
+Usage:
+
+    python benchmarks/bench_assets_disk_cache.py --size-kb 200 --requests 200
+"""
+
+import argparse
+import http.server
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+
+from webob import Request
+
+from openedxscorm import diskcache, proxy
+
+
+class AssetHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve `content` for any GET request, after `delay` seconds.
+    """
+
+    content = b""
+    delay = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript")
+        self.send_header("Content-Length", str(len(self.content)))
+        self.send_header("ETag", '"etag"')
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_urlopen(url):
+    with urllib.request.urlopen(url) as upstream:
+        return len(upstream.read())
+
+
+def serve_disk_cache(disk_cache, key):
+    response = disk_cache.get_response(Request.blank("/"), key, "application/javascript")
+    return sum(len(chunk) for chunk in response.app_iter)
+
+
+def measure(name, serve, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        serve()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{name:>10}: mean={statistics.mean(latencies):8.3f} ms  "
+        f"p50={latencies[len(latencies) // 2]:8.3f} ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1]:8.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-kb", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--delay-ms", type=float, default=5, help="Simulated storage latency"
+    )
+    args = parser.parse_args()
+
+    AssetHandler.content = b"x" * args.size_kb * 1024
+    AssetHandler.delay = args.delay_ms / 1000
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), AssetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/bundle.js?X-Amz-Signature=x"
+
+    with tempfile.TemporaryDirectory() as directory:
+        disk_cache = diskcache.AssetDiskCache(directory)
+        key = "scorm/usage/sha1/bundle.js"
+        # Populate the cache the same way a cache miss in assets_proxy does
+        upstream = proxy.fetch_url(url, {}, {})
+        content_length = upstream.headers["Content-Length"]
+        for _chunk in disk_cache.tee(
+            key, upstream.headers, proxy.iter_chunks(upstream.body), content_length
+        ):
+            pass
+
+        print(f"Asset size: {args.size_kb} KiB, storage latency: {args.delay_ms} ms")
+        measure("urlopen", lambda: serve_urlopen(url), args.requests)
+        measure("disk hit", lambda: serve_disk_cache(disk_cache, key), args.requests)
+        print(disk_cache.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
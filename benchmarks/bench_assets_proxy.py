@@ -0,0 +1,97 @@
+"""
+Compare the time to first byte and the peak memory usage of the "buffer" and
+"stream" modes of the `assets_proxy` handler.
+
+A local HTTP server stands in for S3 and serves an asset of the requested size. For
+each mode, the upstream body is fetched and consumed the same way the LMS would
+consume the handler response.
+
+Usage:
+
+    python benchmarks/bench_assets_proxy.py --size-mb 300
+"""
+
+import argparse
+import http.server
+import threading
+import time
+import tracemalloc
+
+from openedxscorm import proxy
+
+SERVER_CHUNK = b"\0" * (1024 * 1024)
+
+
+class AssetHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve `size` bytes for any GET request, like a presigned S3 url would.
+    """
+
+    size = 0
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(self.size))
+        self.end_headers()
+        remaining = self.size
+        while remaining > 0:
+            chunk = SERVER_CHUNK[:remaining]
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_buffered(url):
+    upstream = proxy.fetch_url(url, {}, {})
+    try:
+        content = upstream.body.read()
+    finally:
+        upstream.close()
+    return [content]
+
+
+def serve_streamed(url, chunk_size):
+    return proxy.iter_chunks(proxy.fetch_url(url, {}, {}).body, chunk_size)
+
+
+def measure(name, get_app_iter):
+    tracemalloc.start()
+    start = time.perf_counter()
+    app_iter = get_app_iter()
+    ttfb = None
+    total = 0
+    for chunk in app_iter:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>8}: ttfb={ttfb * 1000:9.1f} ms  total={elapsed:6.2f} s  "
+        f"peak_memory={peak / 1024 / 1024:8.1f} MiB  bytes={total}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=proxy.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    AssetHandler.size = args.size_mb * 1024 * 1024
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), AssetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/video.mp4?X-Amz-Signature=x"
+
+    print(f"Asset size: {args.size_mb} MiB")
+    measure(proxy.PROXY_MODE_BUFFER, lambda: serve_buffered(url))
+    measure(proxy.PROXY_MODE_STREAM, lambda: serve_streamed(url, args.chunk_size))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare the wall time of package extraction with sequential and parallel uploads,
+for different package shapes.
+
+A local file system storage stands in for S3. It adds a fixed delay to every saved
+file to simulate the round-trip of a PUT request to the bucket.
+
+Usage:
+
+    python benchmarks/bench_extract_package.py --delay-ms 20 --workers 1 8 16
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+import django
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+from openedxscorm import archive, extraction
+
+# (name, number of files, file size in KiB)
+SHAPES = [
+    ("many-small", 3000, 4),
+    ("mixed", 500, 64),
+    ("few-large", 10, 10 * 1024),
+]
+
+
+class LatencyStorage(FileSystemStorage):
+    """
+    File system storage that waits `delay` seconds before saving each file.
+    """
+
+    def __init__(self, delay, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+
+    def _save(self, name, content):
+        time.sleep(self.delay)
+        return super()._save(name, content)
+
+
+def make_package(files, size_kb):
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w", zipfile.ZIP_DEFLATED) as package_zipfile:
+        package_zipfile.writestr("imsmanifest.xml", b"<manifest/>")
+        for i in range(files):
+            package_zipfile.writestr(
+                f"assets/{i // 100}/{i}.bin", os.urandom(size_kb * 1024)
+            )
+    return content
+
+
+def measure(package, delay, workers):
+    with tempfile.TemporaryDirectory() as location:
+        storage = LatencyStorage(delay, location=location)
+        with zipfile.ZipFile(package) as package_zipfile:
+            members = list(
+                archive.iter_package_members(package_zipfile.infolist(), "")
+            )
+            start = time.perf_counter()
+            extraction.extract_members(
+                storage, package_zipfile, members, "dest", workers=workers
+            )
+            elapsed = time.perf_counter() - start
+    return len(members), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--delay-ms", type=float, default=20, help="Simulated storage latency"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 16])
+    args = parser.parse_args()
+    settings.configure()
+    django.setup()
+
+    print(f"Storage latency: {args.delay_ms} ms per file")
+    for name, files, size_kb in SHAPES:
+        package = make_package(files, size_kb)
+        for workers in args.workers:
+            count, elapsed = measure(package, args.delay_ms / 1000, workers)
+            print(
+                f"{name:>10} ({files} x {size_kb} KiB): workers={workers:<3} "
+                f"wall={elapsed:7.2f} s  files/s={count / elapsed:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Compare the time to parse large synthetic imsmanifest.xml files with the former
+two-pass parser, which looked up the resource of every item with an XPath query, and
+with the single-pass parser of `openedxscorm.manifest`.
+
+Usage:
+
+    python benchmarks/bench_parse_manifest.py --items 1000 10000
+"""
+
+import argparse
+import io
+import time
+import xml.etree.ElementTree as ET
+
+from openedxscorm import manifest
+
+NAMESPACE = "http://www.imsglobal.org/xsd/imscp_v1p1"
+
+
+def make_manifest(items, items_per_sco=10):
+    """
+    Return a manifest with the given number of items and resources, grouped in SCOs.
+    """
+    lines = [
+        f'<manifest identifier="m" xmlns="{NAMESPACE}">',
+        "<metadata><schemaversion>2004 4th Edition</schemaversion></metadata>",
+        '<organizations><organization identifier="o"><title>Course</title>',
+    ]
+    for i in range(items):
+        if i % items_per_sco == 0:
+            if i:
+                lines.append("</item>")
+            lines.append(f'<item identifier="sco{i}" isvisible="true">')
+            lines.append(f"<title>SCO {i}</title>")
+        lines.append(
+            f'<item identifier="i{i}" identifierref="r{i}" isvisible="true">'
+            f"<title>Item {i}</title></item>"
+        )
+    lines.append("</item></organization></organizations><resources>")
+    for i in range(items):
+        lines.append(
+            f'<resource identifier="r{i}" href="content/{i}.html">'
+            f'<file href="content/{i}.html"/></resource>'
+        )
+    lines.append("</resources></manifest>")
+    return "\n".join(lines).encode()
+
+
+def parse_two_pass(imsmanifest_file):
+    """
+    Former parser: parse the tree, then parse again to find the namespace, and query
+    the resource of every item.
+    """
+    tree = ET.parse(imsmanifest_file)
+    imsmanifest_file.seek(0)
+    namespace = ""
+    for _, node in ET.iterparse(imsmanifest_file, events=["start-ns"]):
+        if node[0] == "":
+            namespace = node[1]
+            break
+    root = tree.getroot()
+    prefix = "{" + namespace + "}" if namespace else ""
+
+    def walk(item):
+        identifierref = item.get("identifierref")
+        if identifierref:
+            root.find(
+                f"{prefix}resources/{prefix}resource[@identifier='{identifierref}']"
+            ).get("href")
+        for child in item.findall(f"{prefix}item"):
+            walk(child)
+
+    for organization in root.findall(f"{prefix}organizations/{prefix}organization"):
+        walk(organization)
+
+
+def parse_single_pass(imsmanifest_file):
+    parsed = manifest.parse_manifest(imsmanifest_file)
+
+    def walk(item):
+        if item.identifierref:
+            parsed.get_resource_href(item.identifierref)
+        for child in item.children:
+            walk(child)
+
+    for organization in parsed.organizations:
+        walk(organization)
+
+
+def measure(func, content, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(io.BytesIO(content))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for items in args.items:
+        content = make_manifest(items)
+        two_pass = measure(parse_two_pass, content, args.repeat)
+        single_pass = measure(parse_single_pass, content, args.repeat)
+        print(
+            f"items={items:<6} size={len(content) / 1024:8.0f} KiB  "
+            f"two-pass={two_pass:8.3f} s  single-pass={single_pass:8.3f} s  "
+            f"speedup={two_pass / single_pass:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cached authorization checks for the `assets_proxy` handler.
+
+A single SCORM launch loads hundreds of assets through `assets_proxy`, each of which
+must check that the user is enrolled in the course. Enrollment checks are cached in a
+small per-process memory tier, and then in the Django cache. Cached values are
+invalidated whenever an enrollment is modified.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+try:
+    try:
+        from common.djangoapps.student.models import CourseEnrollment
+    except RuntimeError:
+        # Older Open edX releases have a different import path
+        from student.models import CourseEnrollment
+except ImportError:
+    CourseEnrollment = None
+
+log = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedxscorm.enrollment"
+DEFAULT_TIMEOUT = 300
+DEFAULT_LOCAL_TIMEOUT = 10
+# Maximum number of entries in the per-process tier, which is cleared when full
+LOCAL_CACHE_MAX_SIZE = 10000
+
+_local_cache = {}
+_local_cache_lock = threading.Lock()
+
+
+def get_cache_key(user_id, course_key) -> str:
+    return f"{CACHE_KEY_PREFIX}.{user_id}.{course_key}"
+
+
+def is_enrolled(
+    user, course_key, timeout=DEFAULT_TIMEOUT, local_timeout=DEFAULT_LOCAL_TIMEOUT
+) -> bool:
+    """
+    Return True if the user is enrolled in the course.
+
+    Only the first call for a given (user, course) pair queries the database; the
+    result is then cached for `timeout` seconds in the Django cache and for
+    `local_timeout` seconds in the process memory. A timeout of 0 disables the
+    corresponding cache tier.
+    """
+    key = get_cache_key(user.id, course_key)
+    now = time.monotonic()
+    if local_timeout:
+        with _local_cache_lock:
+            expires_at, enrolled = _local_cache.get(key, (0, None))
+        if expires_at > now:
+            return enrolled
+
+    enrolled = cache.get(key) if timeout else None
+    if enrolled is None:
+        enrolled = bool(CourseEnrollment.is_enrolled(user, course_key))
+        if timeout:
+            cache.set(key, enrolled, timeout)
+
+    if local_timeout:
+        with _local_cache_lock:
+            if len(_local_cache) >= LOCAL_CACHE_MAX_SIZE:
+                _local_cache.clear()
+            _local_cache[key] = (now + local_timeout, enrolled)
+    return enrolled
+
+
+def invalidate_enrollment(user_id, course_key) -> None:
+    """
+    Drop the cached enrollment status of a user in a course.
+
+    Note that only the memory tier of the current process is cleared: other
+    processes may keep serving the previous value for up to their local timeout.
+    """
+    key = get_cache_key(user_id, course_key)
+    cache.delete(key)
+    with _local_cache_lock:
+        _local_cache.pop(key, None)
+
+
+def clear_local_cache() -> None:
+    with _local_cache_lock:
+        _local_cache.clear()
+
+
+def on_enrollment_changed(sender, instance, **kwargs) -> None:
+    """
+    Signal receiver that invalidates the cache whenever an enrollment is saved or deleted.
+    """
+    invalidate_enrollment(instance.user_id, instance.course_id)
+
+
+def connect_signals() -> None:
+    """
+    Invalidate cached enrollment checks on enrollment changes. This is a no-op outside
+    of Open edX, where the CourseEnrollment model is not available.
+    """
+    if CourseEnrollment is None:
+        log.info("CourseEnrollment model is not available; not connecting signals")
+        return
+    post_save.connect(
+        on_enrollment_changed,
+        sender=CourseEnrollment,
+        dispatch_uid="openedxscorm.access.enrollment_saved",
+    )
+    post_delete.connect(
+        on_enrollment_changed,
+        sender=CourseEnrollment,
+        dispatch_uid="openedxscorm.access.enrollment_deleted",
+    )
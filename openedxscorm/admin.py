@@ -11,3 +11,28 @@ class ScormStateAdmin(admin.ModelAdmin):
 @admin.register(models.ScormInteraction)
 class ScormInteractionAdmin(admin.ModelAdmin):
     list_display = ("id", "scorm_state", "interaction_id", "index")
+
+
+@admin.register(models.ScormPackage)
+class ScormPackageAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha1", "path", "size", "ready", "last_referenced")
+
+
+@admin.register(models.ScormPackageReference)
+class ScormPackageReferenceAdmin(admin.ModelAdmin):
+    list_display = ("id", "package", "course_key", "usage_key")
+
+
+@admin.register(models.ScormManifest)
+class ScormManifestAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha1", "version", "created")
+
+
+@admin.register(models.ScormPackageIndex)
+class ScormPackageIndexAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha1", "created")
+
+
+@admin.register(models.ScormPackageJobResult)
+class ScormPackageJobResultAdmin(admin.ModelAdmin):
+    list_display = ("id", "job_id", "usage_id", "created")
@@ -6,3 +6,9 @@ class IBLOpenedXScormXBlockConfig(AppConfig):
     
     plugin_app = {}
 
+    def ready(self):
+        from . import access, packagestore
+
+        access.connect_signals()
+        packagestore.connect_signals()
+
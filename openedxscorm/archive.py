@@ -0,0 +1,226 @@
+"""
+Serving of package assets straight out of the uploaded zip file.
+
+In "archive" storage mode, packages are not extracted: the original zip file is
+stored as a single object, and an index of its central directory is persisted in the
+index store (see `indexstore`). Each member is then served with a ranged read of
+the stored zip file: stored members are passed through as-is, while deflated members
+are inflated on the fly.
+"""
+
+import logging
+import os
+import struct
+import zipfile
+import zlib
+
+from .proxy import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODE_EXTRACT = "extract"
+STORAGE_MODE_ARCHIVE = "archive"
+STORAGE_MODES = (STORAGE_MODE_EXTRACT, STORAGE_MODE_ARCHIVE)
+
+# Positions of the member attributes in the persisted index
+DATA_OFFSET = 0
+COMPRESS_TYPE = 1
+COMPRESS_SIZE = 2
+FILE_SIZE = 3
+CRC = 4
+
+SUPPORTED_COMPRESS_TYPES = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+OS_PATH_ALT_SEP = "\\"
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def get_storage_mode(xblock_settings):
+    """
+    Return the storage mode of newly uploaded packages, falling back to extraction on
+    invalid values.
+    """
+    mode = xblock_settings.get("PACKAGE_STORAGE_MODE", STORAGE_MODE_EXTRACT)
+    if mode not in STORAGE_MODES:
+        logger.warning(
+            "Invalid SCORM package storage mode %r; falling back to extraction", mode
+        )
+        return STORAGE_MODE_EXTRACT
+    return mode
+
+
+def is_dir(zipinfo):
+    """Return True if this archive member is a directory."""
+    if zipinfo.filename.endswith("/"):
+        return True
+    if zipinfo.filename.endswith((os.path.sep, OS_PATH_ALT_SEP)):
+        # The ZIP format specification requires to use forward slashes
+        # as the directory separator, but in practice some ZIP files
+        # created on Windows can use backward slashes.  For compatibility
+        # with the extraction code which already handles this:
+        return True
+    return False
+
+
+def find_root_path(zipinfos):
+    """
+    Return the path of the folder that contains the top-most imsmanifest.xml file, or
+    None if there is no such file.
+    """
+    root_path = None
+    root_depth = -1
+    for zipinfo in zipinfos:
+        if os.path.basename(zipinfo.filename) == "imsmanifest.xml":
+            depth = len(os.path.split(zipinfo.filename))
+            if depth < root_depth or root_depth < 0:
+                root_path = os.path.dirname(zipinfo.filename)
+                root_depth = depth
+    return root_path
+
+
+def iter_package_members(zipinfos, root_path):
+    """
+    Iterate on the (relative path, zipinfo) of the files below the package root.
+    """
+    for zipinfo in zipinfos:
+        if zipinfo.filename.startswith(root_path) and not is_dir(zipinfo):
+            yield os.path.relpath(zipinfo.filename, root_path), zipinfo
+
+
+def build_index(scorm_zipfile, root_path):
+    """
+    Return the index of the files below the package root, keyed by relative path.
+
+    Each entry is a list of the attributes that are required to serve the member with
+    a ranged read of the zip file: the offset of its data in the zip file, its
+    compression type, its compressed and uncompressed sizes and its CRC-32.
+    """
+    index = {}
+    fp = scorm_zipfile.fp
+    for path, zipinfo in iter_package_members(scorm_zipfile.infolist(), root_path):
+        if zipinfo.compress_type not in SUPPORTED_COMPRESS_TYPES:
+            raise ArchiveError(
+                f"Unsupported compression method for '{zipinfo.filename}'"
+            )
+        if zipinfo.flag_bits & 0x1:
+            raise ArchiveError(f"Encrypted file '{zipinfo.filename}' is not supported")
+        # The local header may have a different "extra" field than the central
+        # directory entry, so it must be read to find out where the data starts.
+        fp.seek(zipinfo.header_offset)
+        header = fp.read(LOCAL_HEADER_SIZE)
+        if len(header) != LOCAL_HEADER_SIZE or header[:4] != LOCAL_HEADER_SIGNATURE:
+            raise ArchiveError(f"Invalid local header for '{zipinfo.filename}'")
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        index[path] = [
+            zipinfo.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length,
+            zipinfo.compress_type,
+            zipinfo.compress_size,
+            zipinfo.file_size,
+            zipinfo.CRC,
+        ]
+    fp.seek(0)
+    return index
+
+
+def get_etag(member):
+    return f'"{member[CRC]:08x}-{member[FILE_SIZE]}"'
+
+
+class LimitedReader:
+    """
+    File-like object that reads at most `size` bytes of an underlying file.
+    """
+
+    def __init__(self, fileobj, size):
+        self.fileobj = fileobj
+        self.remaining = size
+
+    def read(self, amt=-1):
+        if amt is None or amt < 0 or amt > self.remaining:
+            amt = self.remaining
+        data = self.fileobj.read(amt) if amt else b""
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+
+class MemberAppIter:
+    """
+    WSGI app iterator over the content of an archive member.
+
+    `open_range(start, stop)` must return a file-like object over the [start, stop)
+    bytes of the zip file. It is only called once the response is iterated on, such
+    that "304 Not Modified" responses never read from the storage backend. Ranges of
+    stored members are read straight from the zip file.
+    """
+
+    def __init__(self, open_range, member, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.open_range = open_range
+        self.member = member
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.app_iter_range(0, self.member[FILE_SIZE])
+
+    def app_iter_range(self, start, stop):
+        if stop is None or stop > self.member[FILE_SIZE]:
+            stop = self.member[FILE_SIZE]
+        if start >= stop:
+            return iter(())
+        if self.member[COMPRESS_TYPE] == zipfile.ZIP_STORED:
+            return self.iter_stored(start, stop)
+        return self.iter_deflated(start, stop)
+
+    def iter_stored(self, start, stop):
+        data_offset = self.member[DATA_OFFSET]
+        fileobj = self.open_range(data_offset + start, data_offset + stop)
+        try:
+            while True:
+                chunk = fileobj.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            fileobj.close()
+
+    def iter_deflated(self, start, stop):
+        data_offset = self.member[DATA_OFFSET]
+        fileobj = self.open_range(
+            data_offset, data_offset + self.member[COMPRESS_SIZE]
+        )
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        position = 0
+        try:
+            while position < stop:
+                compressed = fileobj.read(self.chunk_size)
+                if compressed:
+                    # Bound the size of the inflated output of each iteration
+                    chunk = decompressor.decompress(compressed, self.chunk_size)
+                    pending = decompressor.unconsumed_tail
+                else:
+                    chunk = decompressor.flush()
+                    pending = b""
+                while True:
+                    if chunk:
+                        chunk_start = position
+                        position += len(chunk)
+                        if position > start:
+                            yield chunk[
+                                max(start - chunk_start, 0) : stop - chunk_start
+                            ]
+                        if position >= stop:
+                            return
+                    if not pending:
+                        break
+                    chunk = decompressor.decompress(pending, self.chunk_size)
+                    pending = decompressor.unconsumed_tail
+                if not compressed:
+                    break
+        finally:
+            fileobj.close()
@@ -0,0 +1,227 @@
+"""
+Local disk cache of the assets that are served by the `assets_proxy` handler.
+
+Assets of uploaded packages are stored in a folder named after the package SHA-1,
+so their content never changes and they can be cached on the local disk of each node
+without invalidation. The cache size is capped: least recently used files are evicted
+first. Files are written to a temporary location and then atomically renamed, such
+that concurrent processes never serve partial files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from webob import Response
+from webob.static import FileIter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+DEFAULT_MAX_FILE_SIZE = 100 * 1024 * 1024
+# When the cache is full, evict files until it is below this fraction of its size
+EVICTION_TARGET_RATIO = 0.9
+# Headers of the storage backend response that are stored with the cached files
+STORED_HEADERS = ("ETag", "Last-Modified")
+HEADERS_SUFFIX = ".headers"
+TEMP_PREFIX = ".tmp-"
+
+_disk_caches = {}
+_disk_caches_lock = threading.Lock()
+
+
+class AssetDiskCache:
+    """
+    Size-capped LRU cache of immutable assets, keyed by storage path.
+
+    Each asset is stored in two files: the content itself, named after the hash of the
+    storage path, and the stored headers in a JSON file next to it. The content file is
+    renamed into place last, so that its presence means that the entry is complete. The
+    last access time is tracked with the modification time of the content file.
+    """
+
+    def __init__(
+        self, directory, max_size=DEFAULT_MAX_SIZE, max_file_size=DEFAULT_MAX_FILE_SIZE
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _path, size, _mtime in self.entries())
+
+    def get_path(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key):
+        """
+        Return the (path, headers) of a cached asset, or None on cache miss.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path + HEADERS_SUFFIX, encoding="utf-8") as headers_file:
+                headers = json.load(headers_file)
+            # Mark as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path, headers
+
+    def get_response(self, request, key, content_type):
+        """
+        Return a response that serves a cached asset, or None on cache miss. Range and
+        conditional request headers are honoured.
+        """
+        cached = self.get(key)
+        if cached is None:
+            return None
+        path, headers = cached
+        try:
+            cached_file = open(path, "rb")
+        except OSError:
+            # Evicted in the meantime
+            return None
+        response = Response(
+            app_iter=FileIter(cached_file),
+            content_type=content_type,
+            conditional_response=True,
+        )
+        response.content_length = os.fstat(cached_file.fileno()).st_size
+        for name, value in headers.items():
+            response.headers[name] = value
+        response.accept_ranges = "bytes"
+        # Running the response as a WSGI app evaluates the Range and conditional headers
+        return request.get_response(response)
+
+    def cacheable(self, content_length):
+        return content_length is not None and int(content_length) <= self.max_file_size
+
+    def tee(self, key, headers, chunks, content_length):
+        """
+        Yield the given chunks, while writing them to the cache. The entry is only
+        committed if all `content_length` bytes were consumed, e.g: if neither the
+        client nor the storage backend disconnected.
+        """
+        path = self.get_path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=directory)
+        except OSError as e:
+            logger.warning("Could not write to SCORM asset cache: %s", e)
+            yield from chunks
+            return
+        committed = False
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            if written == int(content_length):
+                self.commit(path, temp_path, headers)
+                committed = True
+        finally:
+            if not committed:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def commit(self, path, temp_path, headers):
+        stored_headers = {
+            name: headers[name] for name in STORED_HEADERS if headers.get(name)
+        }
+        headers_fd, headers_temp_path = tempfile.mkstemp(
+            prefix=TEMP_PREFIX, dir=os.path.dirname(path)
+        )
+        with os.fdopen(headers_fd, "w", encoding="utf-8") as headers_file:
+            json.dump(stored_headers, headers_file)
+        os.replace(headers_temp_path, path + HEADERS_SUFFIX)
+        os.replace(temp_path, path)
+        with self._lock:
+            self.size += os.path.getsize(path)
+            should_evict = self.size > self.max_size
+        if should_evict:
+            self.evict()
+
+    def entries(self):
+        """
+        Iterate on the (path, size, mtime) of all complete cache entries.
+        """
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(TEMP_PREFIX) or name.endswith(HEADERS_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache is below its target size.
+        Other processes may write to the same directory, so the actual content of the
+        directory is scanned.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.max_size * EVICTION_TARGET_RATIO
+        evictions = 0
+        for path, file_size, _mtime in entries:
+            if size <= target:
+                break
+            for removed_path in (path, path + HEADERS_SUFFIX):
+                try:
+                    os.remove(removed_path)
+                except OSError:
+                    pass
+            size -= file_size
+            evictions += 1
+        with self._lock:
+            self.size = size
+            self.evictions += evictions
+        logger.info("Evicted %d files from SCORM asset cache", evictions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self.size,
+                "max_size": self.max_size,
+            }
+
+
+def get_disk_cache(xblock_settings):
+    """
+    Return the process-wide asset cache, or None if the cache is disabled.
+    """
+    directory = xblock_settings.get("ASSETS_DISK_CACHE_DIR")
+    if not directory:
+        return None
+    with _disk_caches_lock:
+        if directory not in _disk_caches:
+            _disk_caches[directory] = AssetDiskCache(
+                directory,
+                max_size=xblock_settings.get("ASSETS_DISK_CACHE_SIZE", DEFAULT_MAX_SIZE),
+                max_file_size=xblock_settings.get(
+                    "ASSETS_DISK_CACHE_MAX_FILE_SIZE", DEFAULT_MAX_FILE_SIZE
+                ),
+            )
+        return _disk_caches[directory]
@@ -0,0 +1,424 @@
+"""
+Parallel extraction of package zip files to the storage backend.
+
+Packages exported by authoring tools commonly contain thousands of small files. Saving
+them one after another means thousands of sequential round-trips to S3 within a single
+Studio request. Instead, members are decompressed and uploaded by a bounded pool of
+threads. Failed uploads are retried a few times; if a member still cannot be saved,
+the files that were already saved are deleted.
+
+Members are streamed from the zip file to the storage backend, such that memory usage
+depends on the number of threads and on the chunk size of the storage backend, and not
+on the size of the largest member. Only the text files that are precompressed are read
+in memory, and their size is capped.
+
+Extraction is bounded by a resource budget: the total uncompressed size, the number of
+files and the compression ratio of each member are checked against the zip index
+before anything is read, and extracted bytes and elapsed time are counted while
+members are streamed. Zip files that exceed the budget are rejected, and the files
+that were already saved are deleted.
+
+When a new version of a package is uploaded, the members that did not change since the
+previous version are copied from the folder of that version within the storage backend
+instead: server-side with S3, and as hard links on the local file system.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile, File
+
+from . import precompress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 2
+# Delay before the first retry, which doubles for every subsequent retry
+RETRY_DELAY = 0.5
+
+DEFAULT_MAX_TOTAL_SIZE = 8 * 1024 * 1024 * 1024
+DEFAULT_MAX_FILES = 50000
+DEFAULT_MAX_RATIO = 200
+DEFAULT_TIMEOUT = 30 * 60
+# Small files may legitimately be very compressible, and they are harmless anyway
+RATIO_MIN_SIZE = 1024 * 1024
+
+
+class ExtractionLimitError(Exception):
+    pass
+
+
+class ExtractionLimits:
+    """
+    Resource budget of the extraction of a package. Limits that are 0 or None are
+    disabled.
+    """
+
+    def __init__(
+        self,
+        max_total_size=DEFAULT_MAX_TOTAL_SIZE,
+        max_files=DEFAULT_MAX_FILES,
+        max_ratio=DEFAULT_MAX_RATIO,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.max_total_size = max_total_size
+        self.max_files = max_files
+        self.max_ratio = max_ratio
+        self.timeout = timeout
+        self.extracted_size = 0
+        self.deadline = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, xblock_settings):
+        return cls(
+            max_total_size=xblock_settings.get(
+                "EXTRACT_MAX_TOTAL_SIZE", DEFAULT_MAX_TOTAL_SIZE
+            ),
+            max_files=xblock_settings.get("EXTRACT_MAX_FILES", DEFAULT_MAX_FILES),
+            max_ratio=xblock_settings.get("EXTRACT_MAX_RATIO", DEFAULT_MAX_RATIO),
+            timeout=xblock_settings.get("EXTRACT_TIMEOUT", DEFAULT_TIMEOUT),
+        )
+
+    def check_members(self, members):
+        """
+        Check the (relative path, zipinfo) members of a package against the budget,
+        as declared by the zip index. This is cheap, and it rejects most zip bombs
+        before anything is decompressed.
+        """
+        if self.max_files and len(members) > self.max_files:
+            raise ExtractionLimitError(
+                f"The package contains {len(members)} files, which is more than the "
+                f"limit of {self.max_files} files"
+            )
+        total_size = 0
+        for path, zipinfo in members:
+            if (
+                self.max_ratio
+                and zipinfo.file_size > RATIO_MIN_SIZE
+                and zipinfo.file_size > self.max_ratio * max(zipinfo.compress_size, 1)
+            ):
+                raise ExtractionLimitError(
+                    f"The compression ratio of '{path}' is higher than "
+                    f"{self.max_ratio}:1"
+                )
+            total_size += zipinfo.file_size
+        if self.max_total_size and total_size > self.max_total_size:
+            raise ExtractionLimitError(
+                f"The uncompressed size of the package is {total_size} bytes, which "
+                f"is more than the limit of {self.max_total_size} bytes"
+            )
+
+    def start(self):
+        if self.timeout:
+            self.deadline = time.monotonic() + self.timeout
+
+    def check_time(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExtractionLimitError(
+                f"The extraction of the package took more than {self.timeout} seconds"
+            )
+
+    def consume(self, size):
+        """
+        Count extracted bytes. The zip index may not be trusted, so the total size is
+        checked again as members are decompressed.
+        """
+        with self._lock:
+            self.extracted_size += size
+            extracted_size = self.extracted_size
+        if self.max_total_size and extracted_size > self.max_total_size:
+            raise ExtractionLimitError(
+                f"The uncompressed size of the package is more than the limit of "
+                f"{self.max_total_size} bytes"
+            )
+        self.check_time()
+
+
+class BudgetedReader:
+    """
+    Read-only file object that counts the bytes that are read from a member against
+    the extraction budget.
+    """
+
+    def __init__(self, fileobj, limits):
+        self.fileobj = fileobj
+        self.limits = limits
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.limits.consume(len(data))
+        return data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self.fileobj.close()
+
+
+class PackageExtractor:
+    """
+    Save files to a storage backend with a bounded pool of threads, while keeping
+    track of the saved files, such that they can be deleted on failure.
+    """
+
+    def __init__(self, storage, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES):
+        self.storage = storage
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.saved = []
+        self._lock = threading.Lock()
+
+    def save(self, name, get_content):
+        """
+        Save the content returned by `get_content()` to the given name. The content is
+        fetched again on every attempt, since a failed upload may have consumed it, and
+        it is closed once saved. Raise OSError if the storage backend saved the file
+        under another name, which would not be served.
+        """
+        attempt = 0
+        while True:
+            try:
+                content = get_content()
+                try:
+                    saved_name = self.storage.save(name, content)
+                finally:
+                    content.close()
+            except Exception as e:
+                # Failed saves may leave a partial file behind, which would otherwise
+                # be served, and make the next attempt save to another name.
+                self.delete_partial(name)
+                if isinstance(e, (zipfile.BadZipFile, ExtractionLimitError)):
+                    # Neither corrupted archives nor zip bombs will get better
+                    raise
+                if attempt >= self.retries:
+                    raise
+                delay = RETRY_DELAY * 2**attempt
+                logger.warning(
+                    "Error saving %s, retrying in %.1fs: %s", name, delay, e
+                )
+                time.sleep(delay)
+                attempt += 1
+            else:
+                with self._lock:
+                    self.saved.append(saved_name)
+                if saved_name != name:
+                    raise OSError(f"Could not save {name}: saved as {saved_name}")
+                return saved_name
+
+    def delete_partial(self, name):
+        try:
+            if self.storage.exists(name):
+                self.storage.delete(name)
+        except Exception:
+            logger.exception("Error deleting partially extracted file %s", name)
+
+    def copy(self, source, name):
+        """
+        Copy a stored file to the given name. Unlike uploads, copies are not retried:
+        the caller should extract the file instead.
+        """
+        if source == name:
+            # The file is already where it should be, and it is not ours to delete
+            return name
+        copy_file(self.storage, source, name)
+        with self._lock:
+            self.saved.append(name)
+        return name
+
+    def map(self, func, items):
+        """
+        Call `func` on every item, with at most `workers` concurrent calls. Results are
+        returned in the order of the items. On the first failure, pending calls are
+        cancelled and the exception is raised once running calls are done.
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="scorm-extract"
+        ) as executor:
+            futures = [executor.submit(func, item) for item in items]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def rollback(self):
+        """
+        Delete all the files that were saved so far.
+        """
+        with self._lock:
+            saved, self.saved = self.saved, []
+        for name in saved:
+            try:
+                self.storage.delete(name)
+            except Exception as e:
+                logger.warning("Could not delete %s: %s", name, e)
+
+
+def copy_file(storage, source, name):
+    """
+    Copy a stored file with the most efficient method of the storage backend: S3
+    storages copy objects server-side, local file systems create hard links, and other
+    backends download then upload the file again.
+    """
+    if hasattr(storage, "copy"):
+        storage.copy(source, name)
+        return
+    try:
+        source_path = storage.path(source)
+        dest_path = storage.path(name)
+    except NotImplementedError:
+        with storage.open(source, "rb") as source_file:
+            storage.save(name, source_file)
+        return
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        # Hard links are not supported by all file systems
+        shutil.copyfile(source_path, dest_path)
+
+
+def open_member(scorm_zipfile, zipinfo, limits=None):
+    """
+    Return a file object that decompresses a member of the zip file as it is read. The
+    decompressed bytes are counted against the optional extraction budget.
+    """
+    member = scorm_zipfile.open(zipinfo)
+    if limits is not None:
+        member = BudgetedReader(member, limits)
+    member_file = File(member, name=os.path.basename(zipinfo.filename))
+    # Otherwise, the size would be computed by seeking to the end of the member,
+    # which means decompressing it entirely.
+    member_file.size = zipinfo.file_size
+    return member_file
+
+
+def extract_members(
+    storage,
+    scorm_zipfile,
+    members,
+    dest_folder,
+    encodings=(),
+    min_size=precompress.DEFAULT_MIN_SIZE,
+    max_size=precompress.DEFAULT_MAX_SIZE,
+    workers=DEFAULT_WORKERS,
+    retries=DEFAULT_RETRIES,
+    progress=None,
+    reuse_folder=None,
+    reused=None,
+    limits=None,
+):
+    """
+    Extract the given (relative path, zipinfo) members of a zip file to the storage
+    folder, along with precompressed variants of their text files. If any file cannot
+    be saved, the files that were already saved are deleted and the exception is
+    raised. The optional `progress` object is notified of every extracted member.
+
+    The members listed in `reused`, along with the encodings of their precompressed
+    variants, are copied from `reuse_folder` rather than extracted. Members that cannot
+    be copied are extracted.
+
+    The optional `limits` budget is enforced as members are extracted: when it is
+    exceeded, ExtractionLimitError is raised.
+
+    Return the encodings of the precompressed variants of each file, keyed by relative
+    path, in the order of the members.
+    """
+    paths = {path for path, _zipinfo in members}
+    reused = reused or {}
+    if limits is not None:
+        limits.start()
+    extractor = PackageExtractor(storage, workers=workers, retries=retries)
+    if progress is not None:
+        progress.start(
+            len(members), sum(zipinfo.file_size for _path, zipinfo in members)
+        )
+
+    def extract_member(member):
+        path, zipinfo = member
+        dest_path = os.path.join(dest_folder, path)
+        if limits is not None:
+            limits.check_time()
+        # Members that did not change since the previous version are copied
+        variants = copy_member(path, dest_path) if path in reused else None
+        if variants is None:
+            variants = save_member(path, zipinfo, dest_path)
+        if progress is not None:
+            progress.advance(1, zipinfo.file_size)
+        return variants
+
+    def save_member(path, zipinfo, dest_path):
+        if not encodings or not precompress.is_compressible(
+            path, zipinfo.file_size, min_size, max_size
+        ):
+            extractor.save(
+                dest_path, lambda: open_member(scorm_zipfile, zipinfo, limits)
+            )
+            return []
+        return save_with_variants(path, zipinfo, dest_path)
+
+    def copy_member(path, dest_path):
+        """
+        Copy a member and its precompressed variants from the previous version. Return
+        the encodings of the variants, or None if the member could not be copied.
+        """
+        source_path = os.path.join(reuse_folder, path)
+        variants = [encoding for encoding in reused[path] if encoding in encodings]
+        try:
+            extractor.copy(source_path, dest_path)
+            for encoding in variants:
+                extractor.copy(
+                    precompress.get_variant_path(source_path, encoding),
+                    precompress.get_variant_path(dest_path, encoding),
+                )
+        except Exception as e:
+            logger.warning("Could not copy %s, extracting it: %s", source_path, e)
+            return None
+        return variants
+
+    def save_with_variants(path, zipinfo, dest_path):
+        content = scorm_zipfile.read(zipinfo.filename)
+        if limits is not None:
+            limits.consume(len(content))
+        extractor.save(dest_path, lambda: ContentFile(content))
+        variants = []
+        for encoding, compressed in precompress.iter_variants(
+            content,
+            # Never overwrite files of the package
+            [
+                encoding
+                for encoding in encodings
+                if precompress.get_variant_path(path, encoding) not in paths
+            ],
+        ):
+            extractor.save(
+                precompress.get_variant_path(dest_path, encoding),
+                lambda compressed=compressed: ContentFile(compressed),
+            )
+            variants.append(encoding)
+        return variants
+
+    try:
+        results = extractor.map(extract_member, members)
+    except BaseException:
+        extractor.rollback()
+        raise
+    return {
+        path: variants
+        for (path, _zipinfo), variants in zip(members, results)
+        if variants
+    }
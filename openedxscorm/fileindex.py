@@ -0,0 +1,57 @@
+"""
+Index of the files of extracted packages.
+
+The files of a package are listed from the zip index at upload time, and persisted in
+the index store (see `indexstore`) as `{relative path: [size, crc32, mimetype]}`. Lookups of package files are answered from this index, without listing
+the storage backend, which costs one LIST request per folder on S3.
+"""
+
+import mimetypes
+import os
+
+# Positions of the file attributes in the persisted index
+FILE_SIZE = 0
+CRC = 1
+MIMETYPE = 2
+
+
+def make_entry(path, zipinfo):
+    return [zipinfo.file_size, zipinfo.CRC, mimetypes.guess_type(path)[0]]
+
+
+def build_index(members):
+    """
+    Return the index of the given (relative path, zipinfo) package members.
+    """
+    return {path: make_entry(path, zipinfo) for path, zipinfo in members}
+
+
+def is_unchanged(entry, previous_entry):
+    """
+    Return True if two versions of a file have the same content. Entries of older
+    indexes do not include the mimetype.
+    """
+    return (
+        previous_entry is not None
+        and previous_entry[FILE_SIZE] == entry[FILE_SIZE]
+        and previous_entry[CRC] == entry[CRC]
+    )
+
+
+def get_mimetype(entry, path):
+    if len(entry) > MIMETYPE:
+        return entry[MIMETYPE]
+    return mimetypes.guess_type(path)[0]
+
+
+def find_by_name(paths, filename):
+    """
+    Return the least deeply nested path with the given file name, or None.
+    """
+    found = None
+    for path in paths:
+        if os.path.basename(path) == filename and (
+            found is None or path.count("/") < found.count("/")
+        ):
+            found = path
+    return found
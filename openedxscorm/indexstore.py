@@ -0,0 +1,103 @@
+"""
+Persisted indexes of the files of packages.
+
+The index of a package lists every file of the package: see `fileindex` for extracted
+packages and `archive` for packages that are stored as zip files. Packages may contain
+up to `EXTRACT_MAX_FILES` files, so their index is not stored in the `package_meta`
+field of the xblock, which is loaded on every render and exported with every course.
+Instead, indexes are stored in the database, keyed by the SHA-1 of their serialized
+content, and `package_meta` only holds this key. Indexes never change, so they are
+kept in a process-wide LRU cache once they are read.
+
+Indexes are dicts with the following optional items:
+
+- "files": index of the files of extracted packages.
+- "precompressed": encodings of the precompressed variants of files, keyed by path.
+- "members": index of the members of packages that are stored as zip files.
+
+The `package_meta` of blocks that were saved before indexes were persisted separately
+hold these items themselves.
+"""
+
+import functools
+import hashlib
+import json
+
+from .models import ScormPackageIndex
+
+CACHE_SIZE = 32
+# Key of the index in the package metadata of blocks
+INDEX_KEY = "index"
+
+
+def get_key(index):
+    serialized = json.dumps(index, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(serialized.encode()).hexdigest()
+
+
+def get_index(sha1):
+    """
+    Return the index with the given key, or None if it was not persisted, e.g. in
+    courses that were imported from another platform. The returned index is shared,
+    and must not be modified.
+    """
+    try:
+        return _load_index(sha1)
+    except KeyError:
+        return None
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _load_index(sha1):
+    # Missing indexes raise, such that they are not cached
+    data = (
+        ScormPackageIndex.objects.filter(sha1=sha1)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if data is None:
+        raise KeyError(sha1)
+    return data
+
+
+def save_index(index):
+    """
+    Persist an index, unless it was already persisted, and return its key.
+    """
+    sha1 = get_key(index)
+    ScormPackageIndex.objects.get_or_create(sha1=sha1, defaults={"data": index})
+    return sha1
+
+
+def clear_cache():
+    _load_index.cache_clear()
+
+
+def load_index(package_meta):
+    """
+    Return the index of a package, given the package metadata of a block. The
+    metadata of packages that are being processed, or that were uploaded before
+    indexes were persisted separately, hold the index items themselves.
+    """
+    if INDEX_KEY in package_meta:
+        return get_index(package_meta[INDEX_KEY]) or {}
+    index = {}
+    for name in ("files", "precompressed"):
+        if name in package_meta:
+            index[name] = package_meta[name]
+    if "members" in package_meta.get("archive", {}):
+        index["members"] = package_meta["archive"]["members"]
+    return index
+
+
+def persist_index(package_meta):
+    """
+    Move the index items of the package metadata of a block to the database, and
+    replace them by the key of the index.
+    """
+    index = load_index(package_meta)
+    package_meta.pop("files", None)
+    package_meta.pop("precompressed", None)
+    if "archive" in package_meta:
+        package_meta["archive"].pop("members", None)
+    package_meta[INDEX_KEY] = save_index(index)
@@ -0,0 +1,208 @@
+"""
+Asynchronous processing of uploaded packages.
+
+Hashing, extracting and parsing large packages may take minutes, which is longer than
+most gateway timeouts. In asynchronous mode, the `studio_submit` handler enqueues a
+processing job and returns its id immediately. The state and progress of jobs are
+stored in the Django cache, where they are polled by Studio through the
+`package_job_status` handler. Jobs run on a copy of the xblock that is never saved:
+once a job is done, its results are stored in the database, from which the xblock
+applies them itself, either when Studio polls the job, or when the xblock is next
+displayed in Studio. Jobs do not delete the files of the previous package either:
+these are deleted by the xblock, once the new results are saved, such that the xblock
+never points to deleted files.
+
+Jobs run on a pluggable executor:
+
+- "thread" (default): a process-wide pool of threads.
+- "celery": a Celery task, when Celery is installed. The uploaded file is then staged
+  in the storage backend, where Celery workers can read it.
+- "sync": the job runs within the request, which is convenient for local testing.
+"""
+
+import logging
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+
+from . import tasks
+from .models import ScormPackageJobResult
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedxscorm.job"
+JOB_TIMEOUT = 24 * 60 * 60
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_CELERY = "celery"
+EXECUTOR_SYNC = "sync"
+EXECUTORS = (EXECUTOR_THREAD, EXECUTOR_CELERY, EXECUTOR_SYNC)
+DEFAULT_THREAD_WORKERS = 2
+# Minimum time between two progress updates in the cache
+PROGRESS_INTERVAL = 0.5
+
+_thread_pool = None
+_thread_pool_lock = threading.Lock()
+
+
+def get_cache_key(job_id):
+    return f"{CACHE_KEY_PREFIX}.{job_id}"
+
+
+def create_job(usage_id):
+    """
+    Create a pending job for the given xblock and return its id.
+    """
+    job_id = uuid.uuid4().hex
+    cache.set(
+        get_cache_key(job_id),
+        {
+            "status": STATUS_PENDING,
+            "usage_id": str(usage_id),
+            "files_done": 0,
+            "files_total": 0,
+            "bytes_done": 0,
+            "bytes_total": 0,
+            "errors": [],
+            "result": None,
+        },
+        JOB_TIMEOUT,
+    )
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Return the state of a job, or None if it does not exist (anymore).
+    """
+    return cache.get(get_cache_key(job_id))
+
+
+def update_job(job_id, **values):
+    """
+    Update the state of a job. Each job has a single writer, which is the worker that
+    runs it, so there is no need for locking.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return
+    job.update(values)
+    cache.set(get_cache_key(job_id), job, JOB_TIMEOUT)
+
+
+def save_result(job_id, usage_id, result):
+    """
+    Store the package field values that were computed by a job, until the xblock
+    applies them.
+    """
+    ScormPackageJobResult.objects.update_or_create(
+        job_id=job_id, defaults={"usage_id": str(usage_id), "result": result}
+    )
+
+
+def pop_result(job_id, usage_id):
+    """
+    Return the result of a job, or None if the job is not done, or if its result was
+    already applied. The results of earlier jobs of the same xblock, which were
+    replaced by this one, are deleted too. A result is only ever returned once.
+    """
+    job_result = ScormPackageJobResult.objects.filter(
+        job_id=job_id, usage_id=str(usage_id)
+    ).first()
+    if job_result is None:
+        return None
+    deleted, _ = ScormPackageJobResult.objects.filter(pk=job_result.pk).delete()
+    ScormPackageJobResult.objects.filter(
+        usage_id=str(usage_id), created__lte=job_result.created
+    ).delete()
+    if not deleted:
+        # Another request applied it concurrently
+        return None
+    return job_result.result
+
+
+class Progress:
+    """
+    Count the files and bytes that were processed by a job, and report them in the
+    job state at most every `PROGRESS_INTERVAL` seconds.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.files_done = 0
+        self.bytes_done = 0
+        self.reported_at = 0
+        self._lock = threading.Lock()
+
+    def start(self, files_total, bytes_total):
+        update_job(self.job_id, files_total=files_total, bytes_total=bytes_total)
+
+    def advance(self, files, num_bytes):
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += num_bytes
+            now = time.monotonic()
+            if now - self.reported_at < PROGRESS_INTERVAL:
+                return
+            self.reported_at = now
+            files_done, bytes_done = self.files_done, self.bytes_done
+        update_job(self.job_id, files_done=files_done, bytes_done=bytes_done)
+
+
+def is_async(xblock_settings):
+    return xblock_settings.get("ASYNC_PACKAGE_PROCESSING", False)
+
+
+def get_executor(xblock_settings):
+    """
+    Return the configured executor, falling back to threads on invalid values.
+    """
+    executor = xblock_settings.get("PACKAGE_PROCESSING_EXECUTOR", EXECUTOR_THREAD)
+    if executor not in EXECUTORS:
+        logger.warning(
+            "Invalid SCORM package processing executor %r; falling back to threads",
+            executor,
+        )
+        return EXECUTOR_THREAD
+    if executor == EXECUTOR_CELERY and tasks.shared_task is None:
+        logger.warning("Celery is not installed; falling back to threads")
+        return EXECUTOR_THREAD
+    return executor
+
+
+def get_thread_pool(xblock_settings):
+    """
+    Return the process-wide pool of threads that run jobs. Its size is read once per
+    process.
+    """
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=xblock_settings.get(
+                    "PACKAGE_PROCESSING_THREADS", DEFAULT_THREAD_WORKERS
+                ),
+                thread_name_prefix="scorm-job",
+            )
+        return _thread_pool
+
+
+def stage_locally(package_file):
+    """
+    Copy the uploaded file to a local temporary file, which outlives the request.
+    """
+    package_file.seek(0)
+    staged_file = tempfile.TemporaryFile()
+    shutil.copyfileobj(package_file, staged_file, 1024 * 1024)
+    staged_file.seek(0)
+    return staged_file
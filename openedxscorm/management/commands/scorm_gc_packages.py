@@ -0,0 +1,90 @@
+"""
+Delete the packages of the shared package store that are no longer used by any block,
+along with the files of abandoned package uploads.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from openedxscorm import packagestore, uploads
+from openedxscorm.storage import DEFAULT_DELETE_WORKERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the packages of the shared SCORM package store that have not been "
+        "referenced by any block for a grace period, and the files of SCORM package "
+        "uploads that expired."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-days",
+            type=int,
+            default=packagestore.DEFAULT_GC_GRACE_DAYS,
+            help="Only delete packages that have been unreferenced for that many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of packages that are loaded from the database at a time",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the packages that would be deleted, without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        xblock_settings = getattr(settings, "XBLOCK_SETTINGS", {}).get(
+            "ScormXBlock", {}
+        )
+        grace_days = options["grace_days"]
+        workers = xblock_settings.get("DELETE_WORKERS", DEFAULT_DELETE_WORKERS)
+        deleted = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                packagestore.get_unreferenced_packages(grace_days).filter(
+                    pk__gt=last_pk
+                )[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for package in batch:
+                if options["dry_run"]:
+                    self.stdout.write(f"Would delete {package.path}")
+                    deleted += 1
+                    continue
+                try:
+                    storage = packagestore.get_storage(
+                        xblock_settings, package.usage_key
+                    )
+                except Exception as e:
+                    # Storage functions that depend on the block fail without one
+                    self.stderr.write(f"Not deleting {package.path}: {e}")
+                    continue
+                if packagestore.delete_package(storage, package, grace_days, workers):
+                    self.stdout.write(f"Deleted {package.path}")
+                    deleted += 1
+        self.stdout.write(f"{deleted} unreferenced packages")
+
+        try:
+            storage = packagestore.get_storage(xblock_settings)
+        except Exception as e:
+            self.stderr.write(f"Not deleting expired uploads: {e}")
+            return
+        expired = 0
+        for name, multipart_id in uploads.iter_expired_uploads(
+            storage,
+            uploads.get_folder(xblock_settings.get("LOCATION", "scorm")),
+        ):
+            if options["dry_run"]:
+                self.stdout.write(f"Would delete {name}")
+            else:
+                uploads.delete_expired_upload(storage, name, multipart_id)
+                self.stdout.write(f"Deleted {name}")
+            expired += 1
+        self.stdout.write(f"{expired} expired upload files")
@@ -0,0 +1,253 @@
+"""
+Single-pass parsing of imsmanifest.xml files.
+
+Manifests are streamed with `iterparse`, which captures the default namespace, the
+schema version, the resources indexed by identifier and the tree of organizations and
+items, all in one pass. Resources are then looked up by identifier in a dict, rather
+than with one XPath query per item, which is quadratic for large multi-SCO manifests.
+
+Only elements in the default namespace of the manifest are considered, and paths are
+matched from the root element, as `root.find("resources/resource")` would.
+
+Parsed manifests are serialized to compact, versioned JSON-compatible data, which is
+persisted by `manifeststore`. Items are serialized as `[identifier, title,
+identifierref, isvisible, children]` lists, and resources as `{identifier: [href,
+scorm type, file hrefs, dependency identifiers]}`. `MODEL_VERSION` must be increased
+whenever the serialized format changes.
+"""
+
+import xml.etree.ElementTree as ET
+
+ParseError = ET.ParseError
+
+MODEL_VERSION = 1
+
+# Positions of the item attributes in serialized manifests
+ITEM_IDENTIFIER = 0
+ITEM_TITLE = 1
+ITEM_IDENTIFIERREF = 2
+ITEM_ISVISIBLE = 3
+ITEM_CHILDREN = 4
+# Positions of the resource attributes in serialized manifests
+RESOURCE_HREF = 0
+RESOURCE_SCORM_TYPE = 1
+RESOURCE_FILES = 2
+RESOURCE_DEPENDENCIES = 3
+
+
+class Manifest:
+    """
+    Parsed content of an imsmanifest.xml file.
+    """
+
+    def __init__(self):
+        self.namespace = ""
+        self.schema_version = None
+        # Href of the first resource that has one
+        self.index_href = None
+        # {identifier: Resource}
+        self.resources = {}
+        self.default_organization = None
+        self.organizations = []
+
+    def get_resource_href(self, identifier):
+        resource = self.resources.get(identifier)
+        return None if resource is None else resource.href
+
+    def get_item_hrefs(self):
+        """
+        Return the hrefs of the resources of all items.
+        """
+        hrefs = set()
+        items = list(self.organizations)
+        while items:
+            item = items.pop()
+            if item.identifierref:
+                href = self.get_resource_href(item.identifierref)
+                if href is not None:
+                    hrefs.add(href)
+            items.extend(item.children)
+        return hrefs
+
+
+class Item:
+    """
+    Organization or item of the manifest, with all its child items, including the
+    invisible ones.
+    """
+
+    def __init__(self, identifier=None, identifierref=None, isvisible=None):
+        self.identifier = identifier
+        self.title = None
+        self.identifierref = identifierref
+        self.isvisible = isvisible
+        self.children = []
+
+    @property
+    def is_visible(self):
+        return self.isvisible == "true"
+
+
+class Resource:
+    def __init__(self, identifier, href=None, scorm_type=None):
+        self.identifier = identifier
+        self.href = href
+        self.scorm_type = scorm_type
+        self.files = []
+        self.dependencies = []
+
+
+def get_scorm_type(node):
+    """
+    Return the adlcp:scormType attribute of a resource, which is spelled
+    adlcp:scormtype in SCORM 1.2.
+    """
+    for name, value in node.attrib.items():
+        if name.rsplit("}", 1)[-1].lower() == "scormtype":
+            return value
+    return None
+
+
+def parse_manifest(imsmanifest_file):
+    """
+    Parse an open imsmanifest.xml file. Raise `ParseError` if it is not valid XML.
+    """
+    manifest = Manifest()
+    prefix = ""
+    # Local names of the elements from the root to the current element, or None for
+    # elements outside of the default namespace
+    path = []
+    # (depth, item) of the organizations and items that are being parsed
+    open_items = []
+    resource = None
+    for event, node in ET.iterparse(
+        imsmanifest_file, events=("start-ns", "start", "end")
+    ):
+        if event == "start-ns":
+            if node[0] == "" and not manifest.namespace:
+                manifest.namespace = node[1]
+                prefix = "{" + node[1] + "}"
+            continue
+
+        if event == "start":
+            name = node.tag[len(prefix) :] if node.tag.startswith(prefix) else None
+            path.append(name)
+            depth = len(path)
+            if path[1:] == ["organizations"]:
+                manifest.default_organization = node.get("default")
+            elif path[1:] == ["organizations", "organization"] or (
+                name == "item" and open_items and open_items[-1][0] == depth - 1
+            ):
+                open_items.append(
+                    (
+                        depth,
+                        Item(
+                            node.get("identifier"),
+                            node.get("identifierref"),
+                            node.get("isvisible"),
+                        ),
+                    )
+                )
+            elif path[1:] == ["resources", "resource"]:
+                resource = Resource(
+                    node.get("identifier"), node.get("href"), get_scorm_type(node)
+                )
+                if resource.identifier is not None:
+                    manifest.resources.setdefault(resource.identifier, resource)
+                if resource.href is not None and manifest.index_href is None:
+                    manifest.index_href = resource.href
+            elif path[1:] == ["resources", "resource", "file"]:
+                if node.get("href") is not None:
+                    resource.files.append(node.get("href"))
+            elif path[1:] == ["resources", "resource", "dependency"]:
+                if node.get("identifierref") is not None:
+                    resource.dependencies.append(node.get("identifierref"))
+            continue
+
+        depth = len(path)
+        name = path.pop()
+        if open_items and open_items[-1][0] == depth:
+            _depth, item = open_items.pop()
+            if open_items:
+                open_items[-1][1].children.append(item)
+            else:
+                manifest.organizations.append(item)
+        elif (
+            name == "title"
+            and open_items
+            and open_items[-1][0] == depth - 1
+            and open_items[-1][1].title is None
+        ):
+            open_items[-1][1].title = node.text or ""
+        elif path[1:] == ["metadata"] and name == "schemaversion":
+            if manifest.schema_version is None:
+                manifest.schema_version = node.text or ""
+        if path:
+            # Parsed elements are not needed anymore
+            node.clear()
+    return manifest
+
+
+def serialize(manifest):
+    """
+    Return the compact, JSON-compatible representation of a parsed manifest.
+    """
+
+    def serialize_item(item):
+        return [
+            item.identifier,
+            item.title,
+            item.identifierref,
+            item.isvisible,
+            [serialize_item(child) for child in item.children],
+        ]
+
+    return {
+        "version": MODEL_VERSION,
+        "schema_version": manifest.schema_version,
+        "index_href": manifest.index_href,
+        "default_organization": manifest.default_organization,
+        "organizations": [serialize_item(item) for item in manifest.organizations],
+        "resources": {
+            identifier: [
+                resource.href,
+                resource.scorm_type,
+                resource.files,
+                resource.dependencies,
+            ]
+            for identifier, resource in manifest.resources.items()
+        },
+    }
+
+
+def deserialize(data):
+    """
+    Return the manifest of the given serialized representation. Raise ValueError if it
+    was serialized with another version of the model.
+    """
+    if data.get("version") != MODEL_VERSION:
+        raise ValueError(f"Unsupported manifest model version: {data.get('version')}")
+
+    def deserialize_item(values):
+        item = Item(
+            values[ITEM_IDENTIFIER],
+            values[ITEM_IDENTIFIERREF],
+            values[ITEM_ISVISIBLE],
+        )
+        item.title = values[ITEM_TITLE]
+        item.children = [deserialize_item(child) for child in values[ITEM_CHILDREN]]
+        return item
+
+    manifest = Manifest()
+    manifest.schema_version = data["schema_version"]
+    manifest.index_href = data["index_href"]
+    manifest.default_organization = data["default_organization"]
+    manifest.organizations = [deserialize_item(item) for item in data["organizations"]]
+    for identifier, values in data["resources"].items():
+        resource = Resource(
+            identifier, values[RESOURCE_HREF], values[RESOURCE_SCORM_TYPE]
+        )
+        resource.files = values[RESOURCE_FILES]
+        resource.dependencies = values[RESOURCE_DEPENDENCIES]
+        manifest.resources[identifier] = resource
+    return manifest
@@ -0,0 +1,76 @@
+"""
+Persisted models of parsed manifests.
+
+Manifests are parsed once, when a package is uploaded, and their serialized model is
+stored in the database, keyed by the SHA-1 of the imsmanifest.xml file. Models are then
+kept in a process-wide LRU cache, such that views and handlers that need the manifest
+neither parse XML nor read the storage backend, and only query the database once per
+manifest and process.
+
+Models that were persisted with another version of `manifest.MODEL_VERSION` are
+ignored, and the manifest is parsed again from the storage backend by the block.
+"""
+
+import threading
+from collections import OrderedDict
+
+from . import manifest
+from .models import ScormManifest
+
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_manifest(sha1):
+    """
+    Return the parsed manifest with the given SHA-1, or None if it was not persisted
+    with the current model version.
+    """
+    with _cache_lock:
+        parsed = _cache.get(sha1)
+        if parsed is not None:
+            _cache.move_to_end(sha1)
+            return parsed
+    data = (
+        ScormManifest.objects.filter(sha1=sha1, version=manifest.MODEL_VERSION)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if data is None:
+        return None
+    parsed = manifest.deserialize(data)
+    remember(sha1, parsed)
+    return parsed
+
+
+def save_manifest(sha1, parsed):
+    """
+    Persist a parsed manifest, unless it was already persisted with the current model
+    version.
+    """
+    if not ScormManifest.objects.filter(
+        sha1=sha1, version=manifest.MODEL_VERSION
+    ).exists():
+        ScormManifest.objects.update_or_create(
+            sha1=sha1,
+            defaults={
+                "version": manifest.MODEL_VERSION,
+                "data": manifest.serialize(parsed),
+            },
+        )
+    remember(sha1, parsed)
+
+
+def remember(sha1, parsed):
+    with _cache_lock:
+        _cache[sha1] = parsed
+        _cache.move_to_end(sha1)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
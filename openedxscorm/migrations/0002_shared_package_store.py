@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:55
+
+import django.db.models.deletion
+import django.utils.timezone
+import opaque_keys.edx.django.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedxscorm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormPackage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha1', models.CharField(max_length=40, unique=True)),
+                ('path', models.CharField(help_text='Folder of the extracted package in the storage', max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('usage_key', opaque_keys.edx.django.models.UsageKeyField(blank=True, help_text='Block that first uploaded the package', max_length=255, null=True)),
+                ('ready', models.BooleanField(default=False)),
+                ('extracting_by', models.CharField(blank=True, default='', max_length=32)),
+                ('extracting_since', models.DateTimeField(blank=True, null=True)),
+                ('precompressed', models.JSONField(blank=True, default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_referenced', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScormPackageReference',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_key', opaque_keys.edx.django.models.CourseKeyField(db_index=True, help_text='example: course-v1:Org+Course+Run', max_length=255)),
+                ('usage_key', opaque_keys.edx.django.models.UsageKeyField(help_text='example: block-v1:Org+Course+Run+type@scorm+block@uuid', max_length=255)),
+                ('timestamp', models.DateTimeField(auto_now=True)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='openedxscorm.scormpackage')),
+            ],
+            options={
+                'unique_together': {('usage_key', 'package')},
+            },
+        ),
+    ]
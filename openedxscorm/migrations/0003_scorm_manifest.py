@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedxscorm', '0002_shared_package_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormManifest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha1', models.CharField(max_length=40, unique=True)),
+                ('version', models.PositiveIntegerField()),
+                ('data', models.JSONField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedxscorm', '0003_scorm_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormPackageIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha1', models.CharField(max_length=40, unique=True)),
+                ('data', models.JSONField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedxscorm', '0004_scorm_package_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormPackageJobResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('usage_id', models.CharField(db_index=True, max_length=255)),
+                ('result', models.JSONField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@ from os import walk
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 from opaque_keys.edx.django.models import CourseKeyField, UsageKeyField
 
 
@@ -74,3 +75,111 @@ class ScormInteraction(models.Model):
 
     class Meta:
         unique_together = ["scorm_state", "index"]
+
+
+class ScormPackage(models.Model):
+    """
+    Extracted package of the shared, content-addressed package store. The same package
+    may be used by many blocks, in many courses.
+    """
+
+    sha1 = models.CharField(max_length=40, unique=True)
+    path = models.CharField(
+        max_length=255, help_text="Folder of the extracted package in the storage"
+    )
+    size = models.BigIntegerField(default=0)
+    # Storage functions are called with this block when the package is deleted
+    usage_key = UsageKeyField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text="Block that first uploaded the package",
+    )
+    # Packages are only used once they are entirely extracted
+    ready = models.BooleanField(default=False)
+    # Lease of the upload that is extracting the package, which expires in case the
+    # upload dies
+    extracting_by = models.CharField(max_length=32, blank=True, default="")
+    extracting_since = models.DateTimeField(null=True, blank=True)
+    # Encodings of the precompressed variants of the package files, keyed by path
+    precompressed = models.JSONField(default=dict, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    # Unreferenced packages are only garbage-collected after a grace period
+    last_referenced = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.sha1
+
+
+class ScormPackageReference(models.Model):
+    """
+    Use of a shared package by a block. A block may reference two packages at the same
+    time, when its draft and published versions differ.
+    """
+
+    package = models.ForeignKey(
+        ScormPackage, on_delete=models.CASCADE, related_name="references"
+    )
+    course_key = CourseKeyField(
+        max_length=255,
+        db_index=True,
+        help_text="example: course-v1:Org+Course+Run",
+    )
+    usage_key = UsageKeyField(
+        max_length=255,
+        help_text="example: block-v1:Org+Course+Run+type@scorm+block@uuid",
+    )
+    timestamp = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.usage_key} - {self.package}"
+
+    class Meta:
+        unique_together = ["usage_key", "package"]
+
+
+class ScormManifest(models.Model):
+    """
+    Parsed imsmanifest.xml file, serialized by `manifest.serialize`. Manifests are
+    keyed by the SHA-1 of the imsmanifest.xml file, such that blocks and package
+    versions that share the same manifest also share its parsed model.
+    """
+
+    sha1 = models.CharField(max_length=40, unique=True)
+    version = models.PositiveIntegerField()
+    data = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha1
+
+
+class ScormPackageIndex(models.Model):
+    """
+    Index of the files of a package, which may list tens of thousands of files. Indexes
+    are keyed by the SHA-1 of their serialized content, such that blocks only store
+    this key in their fields, and that blocks with the same index share it.
+    """
+
+    sha1 = models.CharField(max_length=40, unique=True)
+    data = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha1
+
+
+class ScormPackageJobResult(models.Model):
+    """
+    Package fields that were computed by a package processing job, until they are
+    applied to the block that uploaded the package. Blocks apply the result of their
+    last job themselves, such that it is not lost when nobody polls the job.
+    """
+
+    job_id = models.CharField(max_length=32, unique=True)
+    usage_id = models.CharField(max_length=255, db_index=True)
+    result = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.job_id
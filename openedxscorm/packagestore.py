@@ -0,0 +1,305 @@
+"""
+Shared, content-addressed store of extracted packages.
+
+By default, packages are extracted to a folder that depends on the usage id of the
+block, such that the same package, used in many course reruns or imported courses, is
+extracted and stored many times. In the shared store, packages are extracted once to
+`{LOCATION}/packages/{sha1}/`, and blocks only reference them. Blocks that are copied
+along with their fields, for instance during course import or rerun, keep working
+without having to upload the package again.
+
+References from blocks to packages are stored in the database. They are created when
+a package is uploaded, and they are synchronized with the draft and published blocks of
+a course whenever the course is published. Packages that are no longer referenced are
+deleted by the `scorm_gc_packages` management command, after a grace period.
+
+Concurrent uploads of the same package are serialized with a lease on its row, such
+that a package is only extracted once: the first upload marks the package as being
+extracted, and the others wait until it is ready. Extraction happens outside of any
+database transaction, and leases expire in case their upload dies.
+
+All blocks must use the same storage backend: otherwise, packages that are referenced
+by the database would be missing from the storage of some blocks. Storage functions
+are called with a stand-in for the block that first uploaded the package when it is
+deleted.
+"""
+
+import datetime
+import logging
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from xblock.fields import ScopeIds
+
+from .extraction import DEFAULT_TIMEOUT as DEFAULT_EXTRACT_TIMEOUT
+from .models import ScormPackage, ScormPackageReference
+from .storage import DEFAULT_DELETE_WORKERS, delete_folder
+
+log = logging.getLogger(__name__)
+
+PACKAGES_FOLDER = "packages"
+DEFAULT_GC_GRACE_DAYS = 7
+# Delay between two checks of a package that is extracted by another upload
+LEASE_POLL_INTERVAL = 2
+
+
+def is_enabled(xblock_settings):
+    return xblock_settings.get("SHARED_PACKAGE_STORE", False)
+
+
+def get_package_path(scorm_location, sha1):
+    return os.path.join(scorm_location, PACKAGES_FOLDER, sha1)
+
+
+def get_or_create_package(sha1, path, size, usage_key=None):
+    """
+    Return the package with the given hash, which is marked as referenced right now,
+    such that it is not garbage-collected while a block links to it.
+    """
+    package, created = ScormPackage.objects.get_or_create(
+        sha1=sha1,
+        defaults={
+            "path": path,
+            "size": size,
+            "usage_key": get_reference_key(usage_key) if usage_key else None,
+        },
+    )
+    if not created:
+        ScormPackage.objects.filter(pk=package.pk).update(
+            last_referenced=timezone.now()
+        )
+    return package
+
+
+def get_lease_timeout(xblock_settings):
+    """
+    Extraction leases outlive the extraction timeout, such that they only expire when
+    their upload died.
+    """
+    extract_timeout = (
+        xblock_settings.get("EXTRACT_TIMEOUT", DEFAULT_EXTRACT_TIMEOUT)
+        or DEFAULT_EXTRACT_TIMEOUT
+    )
+    return 2 * extract_timeout
+
+
+def acquire_package(package, owner, lease_timeout, poll_interval=LEASE_POLL_INTERVAL):
+    """
+    Wait until a package is either ready, or free to be extracted by `owner`. Return
+    the up-to-date package, and True if `owner` must extract it, in which case it
+    must then call either `mark_ready` or `release_package`.
+    """
+    while True:
+        now = timezone.now()
+        claimed = (
+            ScormPackage.objects.filter(pk=package.pk, ready=False)
+            .filter(
+                Q(extracting_by="")
+                | Q(extracting_since__lt=now - datetime.timedelta(seconds=lease_timeout))
+            )
+            .update(extracting_by=owner, extracting_since=now)
+        )
+        package = ScormPackage.objects.get(pk=package.pk)
+        if claimed or package.ready:
+            return package, bool(claimed)
+        log.info(
+            "Waiting for package %s, which is extracted by another upload", package.sha1
+        )
+        time.sleep(poll_interval)
+
+
+def release_package(package, owner):
+    """
+    Release the extraction lease of a package that could not be extracted, such that
+    another upload may extract it right away.
+    """
+    ScormPackage.objects.filter(pk=package.pk, extracting_by=owner).update(
+        extracting_by="", extracting_since=None
+    )
+
+
+def mark_ready(package, precompressed):
+    """
+    Mark a package as entirely extracted, such that other blocks may link to it.
+    """
+    package.precompressed = precompressed
+    package.ready = True
+    package.extracting_by = ""
+    package.extracting_since = None
+    package.save(
+        update_fields=["precompressed", "ready", "extracting_by", "extracting_since"]
+    )
+
+
+def get_reference_key(usage_key):
+    """
+    Strip the branch and version from a usage key, since references hold for all
+    branches.
+    """
+    return usage_key.version_agnostic().for_branch(None)
+
+
+def add_reference(package, usage_key):
+    usage_key = get_reference_key(usage_key)
+    ScormPackageReference.objects.get_or_create(
+        package=package,
+        usage_key=usage_key,
+        defaults={"course_key": usage_key.course_key},
+    )
+
+
+def set_course_references(course_key, references):
+    """
+    Replace the references of the blocks of a course by the given (usage key, sha1)
+    pairs. Packages that lose references are marked as referenced right now, so that
+    the grace period of the garbage collection starts now.
+    """
+    references = set(references)
+    packages = {
+        package.sha1: package
+        for package in ScormPackage.objects.filter(
+            sha1__in={sha1 for _usage_key, sha1 in references}
+        )
+    }
+    with transaction.atomic():
+        existing = {
+            (reference.usage_key, reference.package.sha1): reference
+            for reference in ScormPackageReference.objects.filter(
+                course_key=course_key
+            ).select_related("package")
+        }
+        removed = [
+            reference
+            for key, reference in existing.items()
+            if key not in references
+        ]
+        ScormPackageReference.objects.filter(
+            pk__in=[reference.pk for reference in removed]
+        ).delete()
+        ScormPackage.objects.filter(
+            pk__in={reference.package_id for reference in removed}
+        ).update(last_referenced=timezone.now())
+        ScormPackageReference.objects.bulk_create(
+            [
+                ScormPackageReference(
+                    package=packages[sha1], course_key=course_key, usage_key=usage_key
+                )
+                for usage_key, sha1 in references - set(existing)
+                if sha1 in packages
+            ]
+        )
+
+
+def iter_course_references(course_key):
+    """
+    Yield the (usage key, sha1) pairs of the draft and published blocks of a course
+    that use shared packages.
+    """
+    # These modules are only available in the Open edX platform
+    from xmodule.modulestore import ModuleStoreEnum
+    from xmodule.modulestore.django import modulestore
+
+    store = modulestore()
+    for revision in (
+        ModuleStoreEnum.RevisionOption.draft_only,
+        ModuleStoreEnum.RevisionOption.published_only,
+    ):
+        for block in store.get_items(
+            course_key, qualifiers={"category": "scorm"}, revision=revision
+        ):
+            if "shared_path" in block.package_meta:
+                yield get_reference_key(block.location), block.package_meta["sha1"]
+
+
+def on_course_published(sender, course_key, **kwargs):
+    set_course_references(course_key, iter_course_references(course_key))
+
+
+def on_course_deleted(sender, course_key, **kwargs):
+    set_course_references(course_key, [])
+
+
+def connect_signals():
+    """
+    Synchronize references with courses when they are published or deleted. This is a
+    no-op outside of Open edX, where the modulestore is not available.
+    """
+    try:
+        from xmodule.modulestore.django import SignalHandler
+    except ImportError:
+        log.info("Modulestore is not available; not connecting signals")
+        return
+    SignalHandler.course_published.connect(
+        on_course_published, dispatch_uid="openedxscorm.packagestore.course_published"
+    )
+    SignalHandler.course_deleted.connect(
+        on_course_deleted, dispatch_uid="openedxscorm.packagestore.course_deleted"
+    )
+
+
+def get_storage(xblock_settings, usage_key=None):
+    """
+    Return the storage backend of the shared store, outside of any block. Storage
+    functions receive a stand-in for the block with the given usage key, such as the
+    block that first uploaded a package.
+    """
+    storage_func = xblock_settings.get("STORAGE_FUNC")
+    if storage_func is None:
+        return default_storage
+    if isinstance(storage_func, str):
+        storage_func = import_string(storage_func)
+    return storage_func(StorageOwner(xblock_settings, usage_key))
+
+
+class StorageOwner:
+    """
+    Stand-in for the block that is passed to storage functions. It has the
+    `xblock_settings`, `location` and `scope_ids` attributes of blocks, where the
+    location is None when there is no such block, e.g. for packages that were uploaded
+    before the uploading block was recorded.
+    """
+
+    def __init__(self, xblock_settings, usage_key=None):
+        self.xblock_settings = xblock_settings
+        self.location = usage_key
+        self.scope_ids = ScopeIds(None, "scorm", usage_key, usage_key)
+
+
+def get_unreferenced_packages(grace_days=DEFAULT_GC_GRACE_DAYS):
+    return ScormPackage.objects.filter(
+        references__isnull=True,
+        last_referenced__lt=timezone.now() - datetime.timedelta(days=grace_days),
+    ).order_by("pk")
+
+
+def delete_package(
+    storage,
+    package,
+    grace_days=DEFAULT_GC_GRACE_DAYS,
+    workers=DEFAULT_DELETE_WORKERS,
+):
+    """
+    Delete an unreferenced package from the database, then its files from the storage.
+    The package is locked and checked again first, in case a block just linked to it.
+    Return True if the package was deleted.
+    """
+    with transaction.atomic():
+        locked = (
+            ScormPackage.objects.select_for_update()
+            .filter(
+                pk=package.pk,
+                last_referenced__lt=timezone.now()
+                - datetime.timedelta(days=grace_days),
+            )
+            .first()
+        )
+        if locked is None or locked.references.exists():
+            return False
+        locked.delete()
+    delete_folder(storage, package.path, workers=workers)
+    return True
@@ -0,0 +1,107 @@
+"""
+Precompressed variants of the text assets of extracted packages.
+
+SCORM packages are mostly made of uncompressed HTML, JS, CSS, JSON and SVG files. When
+a package is extracted, compressed copies of these files are stored next to them, with
+a ".br" or ".gz" extension. The `assets_proxy` handler then serves the best variant
+that the browser accepts, such that files are compressed once per package instead of
+being sent uncompressed on every launch. Web servers that serve the storage folder
+directly may also pick these variants up (e.g: nginx `gzip_static`).
+
+Brotli compression requires the optional `brotli` package.
+"""
+
+import gzip
+import mimetypes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+# Variants are listed by order of preference
+DEFAULT_ENCODINGS = (ENCODING_BROTLI, ENCODING_GZIP)
+EXTENSIONS = {ENCODING_BROTLI: ".br", ENCODING_GZIP: ".gz"}
+DEFAULT_MIN_SIZE = 1024
+# Files are compressed in memory, so larger files are not precompressed
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024
+# Variants that do not save at least this fraction of the original size are not stored
+MAX_RATIO = 0.9
+COMPRESSIBLE_MIMETYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xhtml+xml",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def get_encodings(xblock_settings):
+    """
+    Return the encodings of the variants to generate, in order of preference.
+    Encodings that are not supported by the installed packages are skipped.
+    """
+    return [
+        encoding
+        for encoding in xblock_settings.get("PRECOMPRESS_ENCODINGS", DEFAULT_ENCODINGS)
+        if encoding == ENCODING_GZIP or (encoding == ENCODING_BROTLI and brotli)
+    ]
+
+
+def is_compressible(
+    path, size, min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE
+):
+    if size < min_size or size > max_size:
+        return False
+    mimetype, encoding = mimetypes.guess_type(path)
+    if mimetype is None or encoding is not None:
+        return False
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress(content, encoding):
+    if encoding == ENCODING_BROTLI:
+        return brotli.compress(content, quality=11)
+    # Set a fixed mtime, such that variants are reproducible
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def iter_variants(content, encodings):
+    """
+    Iterate on the (encoding, compressed content) of the variants that are worth
+    storing.
+    """
+    for encoding in encodings:
+        compressed = compress(content, encoding)
+        if len(compressed) <= len(content) * MAX_RATIO:
+            yield encoding, compressed
+
+
+def get_variant_path(path, encoding):
+    return path + EXTENSIONS[encoding]
+
+
+def choose_encoding(request, encodings):
+    """
+    Return the preferred encoding among the available variants that the client
+    accepts, or None if the original file should be served.
+
+    Range requests are always served from the original file, since byte ranges of the
+    compressed variants would not make sense to the client. Clients that do not send
+    an Accept-Encoding header are also served the original file.
+    """
+    if (
+        not encodings
+        or "Range" in request.headers
+        or "Accept-Encoding" not in request.headers
+    ):
+        return None
+    offers = request.accept_encoding.acceptable_offers(encodings)
+    if not offers:
+        return None
+    # Among the encodings with the highest quality value, pick the preferred one
+    best_quality = max(quality for _encoding, quality in offers)
+    best = {encoding for encoding, quality in offers if quality == best_quality}
+    return next(encoding for encoding in encodings if encoding in best)
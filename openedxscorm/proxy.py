@@ -0,0 +1,290 @@
+"""
+Helpers for serving package assets through the `assets_proxy` handler.
+"""
+
+import logging
+import re
+import threading
+
+import urllib3
+from botocore.exceptions import BotoCoreError, ClientError
+from django.utils.datastructures import CaseInsensitiveMapping
+
+logger = logging.getLogger(__name__)
+
+PROXY_MODE_STREAM = "stream"
+PROXY_MODE_BUFFER = "buffer"
+PROXY_MODE_REDIRECT = "redirect"
+PROXY_MODES = (PROXY_MODE_STREAM, PROXY_MODE_BUFFER, PROXY_MODE_REDIRECT)
+
+# Documents that must be served from the LMS origin in "redirect" mode, such that
+# the SCORM content can look up the API object in its parent windows.
+PROXIED_MIMETYPES = ("text/html", "application/xhtml+xml")
+# Validity (in seconds) of the presigned urls that clients are redirected to
+DEFAULT_REDIRECT_EXPIRES_IN = 300
+
+# Size of the buffers that are handed over to the WSGI server when streaming
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Client headers that are forwarded to the storage backend
+FORWARDED_REQUEST_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+# Storage backend headers that are relayed to the client
+RELAYED_RESPONSE_HEADERS = ("Content-Range", "ETag", "Last-Modified", "Accept-Ranges")
+# Non-2xx upstream statuses that are relayed as-is, because they answer the client's
+# own range and conditional headers.
+RELAYED_ERROR_STATUSES = (304, 416)
+
+# Clients that may be used to fetch assets from the storage backend
+UPSTREAM_CLIENT_HTTP = "http"
+UPSTREAM_CLIENT_BOTO3 = "boto3"
+UPSTREAM_CLIENTS = (UPSTREAM_CLIENT_HTTP, UPSTREAM_CLIENT_BOTO3)
+# Default settings of the process-wide connection pool
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 2
+# GetObject parameters that correspond to the forwarded request headers
+S3_GET_OBJECT_PARAMS = {
+    "Range": "Range",
+    "If-None-Match": "IfNoneMatch",
+    "If-Modified-Since": "IfModifiedSince",
+}
+
+# Urls of the assets of uploaded packages start with the package SHA-1, such that
+# the content at a given url never changes.
+DEFAULT_CONTENT_ADDRESSED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Packages served from an existing S3 path may be modified in place.
+DEFAULT_S3_PATH_CACHE_CONTROL = "no-cache"
+# Unversioned urls, or urls of a replaced package, are always revalidated, because
+# their content changes whenever the package is uploaded again.
+UNVERSIONED_CACHE_CONTROL = "no-cache"
+
+# <package SHA-1>/<path relative to the package root>
+VERSIONED_PATH_RE = re.compile(r"^(?P<version>[0-9a-f]{40})/(?P<path>.+)$")
+
+
+_pool_manager = None
+_pool_manager_lock = threading.Lock()
+
+
+class UpstreamError(Exception):
+    """
+    Raised when the storage backend cannot be reached.
+    """
+
+
+class UpstreamResponse:
+    """
+    Storage backend response, independent of the client that fetched it.
+
+    `body` is a file-like object that must be closed by the caller, or None for
+    responses without content.
+    """
+
+    def __init__(self, status, headers, body=None):
+        self.status = status
+        self.headers = CaseInsensitiveMapping(headers)
+        self.body = body
+
+    def close(self):
+        if self.body is not None:
+            self.body.close()
+
+
+class PooledBody:
+    """
+    File-like wrapper of a urllib3 response body that hands the connection back to
+    the pool once the body has been entirely read.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.exhausted = False
+
+    def read(self, amt=None):
+        data = self.response.read(amt, decode_content=False)
+        if not data or amt is None:
+            self.exhausted = True
+        return data
+
+    def close(self):
+        if self.exhausted:
+            self.response.release_conn()
+        else:
+            # The connection cannot be reused with unread data in it
+            self.response.close()
+
+
+def get_pool_manager(xblock_settings):
+    """
+    Return the process-wide connection pool that is used to fetch assets over HTTP.
+
+    The pool is created on first use, so changes to the pool settings are only taken
+    into account after a restart.
+    """
+    global _pool_manager
+    with _pool_manager_lock:
+        if _pool_manager is None:
+            retries = xblock_settings.get("PROXY_RETRIES", DEFAULT_RETRIES)
+            _pool_manager = urllib3.PoolManager(
+                maxsize=xblock_settings.get("PROXY_POOL_SIZE", DEFAULT_POOL_SIZE),
+                block=False,
+                timeout=urllib3.Timeout(
+                    connect=xblock_settings.get(
+                        "PROXY_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT
+                    ),
+                    read=xblock_settings.get("PROXY_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+                ),
+                retries=urllib3.Retry(
+                    total=retries,
+                    backoff_factor=0.1,
+                    status_forcelist=(500, 502, 503, 504),
+                    raise_on_status=False,
+                    redirect=False,
+                ),
+            )
+        return _pool_manager
+
+
+def fetch_url(url, headers, xblock_settings):
+    """
+    Fetch an asset over HTTP with the pooled, keep-alive client. The response body is
+    not read.
+    """
+    try:
+        response = get_pool_manager(xblock_settings).request(
+            "GET",
+            url,
+            headers=headers,
+            preload_content=False,
+            decode_content=False,
+            redirect=False,
+        )
+    except urllib3.exceptions.HTTPError as e:
+        raise UpstreamError(str(e)) from e
+    return UpstreamResponse(response.status, response.headers, PooledBody(response))
+
+
+def fetch_s3_object(storage, name, headers):
+    """
+    Fetch an asset with the boto3 client of an S3 storage backend, thus re-using its
+    connection pool and credentials instead of going through a presigned url. The
+    response body is not read.
+    """
+    params = {
+        param: headers[header]
+        for header, param in S3_GET_OBJECT_PARAMS.items()
+        if header in headers
+    }
+    if "If-Range" in headers:
+        # If-Range is not supported by GetObject: serve the full object instead of a
+        # range that might belong to a different version.
+        params.pop("Range", None)
+    try:
+        response = storage.get_object(name, **params)
+    except ClientError as e:
+        metadata = e.response.get("ResponseMetadata", {})
+        return UpstreamResponse(
+            metadata.get("HTTPStatusCode", 500), metadata.get("HTTPHeaders", {})
+        )
+    except BotoCoreError as e:
+        raise UpstreamError(str(e)) from e
+    metadata = response["ResponseMetadata"]
+    return UpstreamResponse(
+        metadata["HTTPStatusCode"], metadata["HTTPHeaders"], response["Body"]
+    )
+
+
+def get_upstream_client(xblock_settings):
+    """
+    Return the configured upstream client, falling back to HTTP on invalid values.
+    """
+    client = xblock_settings.get("PROXY_UPSTREAM_CLIENT", UPSTREAM_CLIENT_HTTP)
+    if client not in UPSTREAM_CLIENTS:
+        logger.warning("Invalid SCORM upstream client %r; falling back to http", client)
+        return UPSTREAM_CLIENT_HTTP
+    return client
+
+
+def iter_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the content of a file-like object in chunks of at most `chunk_size` bytes.
+
+    The file is closed once it is exhausted, or as soon as the consumer closes the
+    generator, e.g: when the client disconnects halfway through a download.
+    """
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def get_upstream_headers(request):
+    """
+    Return the range and conditional headers of the client request that must be
+    forwarded to the storage backend.
+    """
+    return {
+        name: request.headers[name]
+        for name in FORWARDED_REQUEST_HEADERS
+        if name in request.headers
+    }
+
+
+def relay_headers(upstream_headers, response):
+    """
+    Copy the range and validator headers of the storage backend response to the
+    response that is returned to the client.
+    """
+    for name in RELAYED_RESPONSE_HEADERS:
+        value = upstream_headers.get(name)
+        if value is not None:
+            response.headers[name] = value
+
+
+def split_version(suffix):
+    """
+    Split an `assets_proxy` path into the package version it starts with and the path
+    relative to the package root. The version is None for unversioned paths.
+    """
+    match = VERSIONED_PATH_RE.match(suffix)
+    if match is None:
+        return None, suffix
+    return match.group("version"), match.group("path")
+
+
+def get_cache_control(xblock_settings, content_addressed):
+    """
+    Return the Cache-Control header value of proxied assets. An empty value means
+    that no header should be set.
+    """
+    if content_addressed:
+        return xblock_settings.get(
+            "ASSETS_CACHE_CONTROL", DEFAULT_CONTENT_ADDRESSED_CACHE_CONTROL
+        )
+    return xblock_settings.get(
+        "S3_PATH_ASSETS_CACHE_CONTROL", DEFAULT_S3_PATH_CACHE_CONTROL
+    )
+
+
+def must_proxy(file_type):
+    """
+    Return True if an asset of the given mimetype must not be served by redirection.
+    Unknown mimetypes are proxied, to be on the safe side.
+    """
+    return file_type is None or file_type in PROXIED_MIMETYPES
+
+
+def get_proxy_mode(xblock_settings):
+    """
+    Return the configured proxy mode, falling back to streaming on invalid values.
+    """
+    mode = xblock_settings.get("PROXY_MODE", PROXY_MODE_STREAM)
+    if mode not in PROXY_MODES:
+        logger.warning("Invalid SCORM proxy mode %r; falling back to streaming", mode)
+        return PROXY_MODE_STREAM
+    return mode
@@ -1,17 +1,23 @@
+import copy
+import functools
+import io
 import json
 import hashlib
 import os
 import json
 import logging
 import re
-import xml.etree.ElementTree as ET
+import time
 import zipfile
 import mimetypes
 import urllib
+import uuid
 
+from django.conf import settings
 from django.contrib.auth.models import User
 
-from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.base import File
 from django.core.files.storage import default_storage
 from django.db.models import Q
 from django.template import Context, Template
@@ -24,9 +30,30 @@ from xblock.core import XBlock
 from xblock.completable import CompletableXBlockMixin
 from xblock.exceptions import JsonHandlerError
 from xblock.fields import Scope, String, Float, Boolean, Dict, DateTime, Integer
-
+from xblock.field_data import DictFieldData
+
+from . import (
+    access,
+    archive,
+    diskcache,
+    extraction,
+    fileindex,
+    indexstore,
+    jobs,
+    manifest,
+    manifeststore,
+    packagestore,
+    precompress,
+    proxy,
+    singleflight,
+    tasks,
+    uploads,
+)
+# These used to be defined here, and are still importable from this module
+from .archive import OS_PATH_ALT_SEP, is_dir  # pylint: disable=unused-import
 from .interactions import update_or_create_scorm_state, can_record_analytics
 from .parsing import parse_int, parse_float, parse_validate_positive_float
+from .storage import DEFAULT_DELETE_WORKERS, S3ScormStorage, delete_folder
 
 from storages.backends.s3boto3 import S3Boto3Storage
 
@@ -57,7 +84,14 @@ def _(text):
 
 
 logger = logging.getLogger(__name__)
-OS_PATH_ALT_SEP = '\\'
+# Fields that are computed from the uploaded package
+PACKAGE_FIELDS = ("package_meta", "index_page_path", "scorm_version", "navigation_menu")
+# Reading uploaded packages in large blocks saves many system calls on large packages
+HASH_BLOCK_SIZE = 1024 * 1024
+# The storage layout of a package version never changes
+LAYOUT_CACHE_TIMEOUT = 24 * 60 * 60
+# Folders of the storage location that are shared by all blocks
+SHARED_FOLDERS = (packagestore.PACKAGES_FOLDER, uploads.UPLOADS_FOLDER)
 
 
 @XBlock.wants("settings")
@@ -78,7 +112,9 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         }
 
     Note that neither the folder the folder nor the package file are deleted when the
-    xblock is removed.
+    xblock is removed. Alternatively, when the SHARED_PACKAGE_STORE setting is enabled,
+    packages are extracted once to media/{scorm_location}/packages/{sha1} for all
+    blocks, and unused packages are deleted by the `scorm_gc_packages` command.
 
     By default, static assets are stored in the default Django storage backend. To
     override this behaviour, you should define a custom storage function. This
@@ -182,6 +218,8 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
     )
 
     navigation_menu = String(scope=Scope.settings, default="")
+    # Id of the job that processes the last uploaded package, in asynchronous mode
+    package_job_id = String(scope=Scope.settings, default="")
 
     navigation_menu_width = Integer(
         display_name=_("Display width of navigation menu(px)"),
@@ -225,6 +263,8 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         return data.decode("utf8")
 
     def author_view(self, context=None):
+        # Publish the package of a job that finished while nobody was polling it
+        self.apply_package_job_result()
         context = context or {}
         if not self.index_page_path:
             context["message"] = "Click 'Edit' to modify this module and upload a new SCORM package."
@@ -238,7 +278,6 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             "grade": self.get_grade(),
             "can_view_student_reports": self.can_view_student_reports,
             "scorm_xblock": self,
-            "navigation_menu": self.navigation_menu,
             "popup_on_launch": self.popup_on_launch,
         }
         student_context.update(context or {})
@@ -261,6 +300,9 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
                 "popup_width": self.width or 800,
                 "popup_height": self.height or 800,
                 "scorm_data": self.scorm_data,
+                # The table of contents is fetched with this version, such that it can
+                # be cached by the browser until the package changes
+                "table_of_contents_version": self.manifest_key or "",
             },
         )
         return frag
@@ -269,7 +311,8 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
     def assets_proxy(self, request, suffix):
         """
         Proxy view for serving assets. It receives a request with the path to the asset to serve, generates a pre-signed
-        URL to access the content in the AWS S3 bucket, and returns a redirect response to the pre-signed URL.
+        URL to access the content in the AWS S3 bucket, and returns the content of the file. In "redirect" proxy mode,
+        a redirect response to a short-lived pre-signed URL is returned instead for all assets but HTML documents.
 
         Parameters:
         ----------
@@ -288,28 +331,338 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             logger.warning("User is not logged in; returning 403")
             return Response(json.dumps(err), content_type='application/json', charset='utf8', status=403)
 
-        if not CourseEnrollment.is_enrolled(self.get_django_user(), self.location.course_key):
+        if not access.is_enrolled(
+            user,
+            self.location.course_key,
+            timeout=self.xblock_settings.get(
+                "ENROLLMENT_CACHE_TIMEOUT", access.DEFAULT_TIMEOUT
+            ),
+            local_timeout=self.xblock_settings.get(
+                "ENROLLMENT_LOCAL_CACHE_TIMEOUT", access.DEFAULT_LOCAL_TIMEOUT
+            ),
+        ):
             err = {"error": "User is not enrolled"}
             logger.warning("User %s is not enrolled in course; returnin 403", user)
             return Response(json.dumps(err), content_type='application/json', charset='utf8', status=403)
 
+        # Files of uploaded packages are served from urls that start with the package
+        # SHA-1, such that they can be cached forever. Unversioned urls, and urls of a
+        # package that was replaced since, serve the current files and are revalidated.
+        version, suffix = proxy.split_version(suffix)
+        immutable = version is not None and version == self.get_assets_version()
+
         file_name = os.path.basename(suffix)
-        signed_url = self.storage.url(suffix)
-        if request.query_string:
-            signed_url = "&".join([signed_url, request.query_string])
         file_type, _ = mimetypes.guess_type(file_name)
+        if "archive" in self.package_meta:
+            return self.serve_archive_member(request, suffix, file_type, immutable)
+
+        # Answer from the file index of the package, when it was recorded, such that
+        # missing files and HEAD requests do not reach the storage backend.
+        package_index = self.get_package_index()
+        files = None if self.scorm_s3_path else package_index.get("files")
+        variants = package_index.get("precompressed", {}).get(suffix)
+        if files is not None:
+            entry = files.get(suffix)
+            if entry is None:
+                return Response(status=404)
+            file_type = fileindex.get_mimetype(entry, suffix)
+            if request.method == "HEAD" and not precompress.choose_encoding(
+                request, variants
+            ):
+                response = Response(content_type=file_type)
+                response.content_length = entry[fileindex.FILE_SIZE]
+                response.accept_ranges = "bytes"
+                if variants:
+                    response.vary = ("Accept-Encoding",)
+                return self.set_assets_cache_control(response, immutable)
+
+        proxy_mode = proxy.get_proxy_mode(self.xblock_settings)
+        if (
+            proxy_mode == proxy.PROXY_MODE_REDIRECT
+            and isinstance(self.storage, S3ScormStorage)
+            and not proxy.must_proxy(file_type)
+        ):
+            # Let the browser download the bytes straight from S3 with a short-lived
+            # url. HTML documents are still proxied below, because they must be served
+            # from the same origin as the LMS to find the SCORM API. Other storage
+            # backends cannot generate urls that expire, so assets are streamed.
+            expires_in = self.xblock_settings.get(
+                "PROXY_REDIRECT_EXPIRES_IN", proxy.DEFAULT_REDIRECT_EXPIRES_IN
+            )
+            signed_url = self.storage.url(suffix, expire=expires_in)
+            if request.query_string:
+                signed_url = "&".join([signed_url, request.query_string])
+            response = Response(status=302, location=signed_url)
+            response.headers["Cache-Control"] = f"private, max-age={expires_in // 2}"
+            return response
+
+        # Serve a precompressed variant of text assets, if the client accepts it
+        content_encoding = precompress.choose_encoding(request, variants)
+        if content_encoding:
+            suffix = precompress.get_variant_path(suffix, content_encoding)
+        response = self.proxy_asset(request, suffix, file_type, proxy_mode, immutable)
+        if variants:
+            response.vary = ("Accept-Encoding",)
+            if content_encoding and response.status_code == 200:
+                response.content_encoding = content_encoding
+        return response
+
+    def proxy_asset(self, request, suffix, file_type, proxy_mode, immutable):
+        """
+        Serve a file of the package from the local disk cache or the storage backend.
+        """
+        # Assets of uploaded packages never change, so they can be kept on local disk
+        disk_cache = (
+            None
+            if self.scorm_s3_path
+            else diskcache.get_disk_cache(self.xblock_settings)
+        )
+        if disk_cache is not None:
+            cache_key = os.path.join(self.extract_folder_path, suffix)
+            response = disk_cache.get_response(request, cache_key, file_type)
+            if response is not None:
+                return self.set_assets_cache_control(response, immutable)
+
+        # Forward range and conditional headers, such that seeking in media files,
+        # resuming downloads and browser revalidation do not fetch the full object.
         try:
-            with urllib.request.urlopen(signed_url) as response:
-                file_content = response.read()
-        except urllib.error.HTTPError as e:
-            logger.warning("Error fetching %s: %s", file_name, e)
-            return Response(status=e.code)
+            upstream = self.fetch_asset(
+                suffix, request.query_string, proxy.get_upstream_headers(request)
+            )
+        except proxy.UpstreamError as e:
+            logger.warning("Error fetching %s: %s", suffix, e)
+            return Response(status=502)
+
+        if upstream.status in proxy.RELAYED_ERROR_STATUSES:
+            # "304 Not Modified" and "416 Range Not Satisfiable" are answers to the
+            # client's own headers, and not actual errors.
+            upstream.close()
+            response = Response(status=upstream.status)
+            proxy.relay_headers(upstream.headers, response)
+            if upstream.status == 304:
+                self.set_assets_cache_control(response, immutable)
+            return response
+        if upstream.status >= 300:
+            upstream.close()
+            logger.warning("Error fetching %s: HTTP %s", suffix, upstream.status)
+            return Response(status=upstream.status)
+
+        content_length = upstream.headers.get("Content-Length")
+        app_iter = proxy.iter_chunks(
+            upstream.body,
+            self.xblock_settings.get("PROXY_CHUNK_SIZE", proxy.DEFAULT_CHUNK_SIZE),
+        )
+        if (
+            disk_cache is not None
+            and upstream.status == 200
+            and disk_cache.cacheable(content_length)
+        ):
+            app_iter = disk_cache.tee(
+                cache_key, upstream.headers, app_iter, content_length
+            )
+
+        if proxy_mode == proxy.PROXY_MODE_BUFFER:
+            response = Response(
+                b"".join(app_iter), status=upstream.status, content_type=file_type
+            )
+            proxy.relay_headers(upstream.headers, response)
+            return self.set_assets_cache_control(response, immutable)
+
+        # Pass the upstream body through without holding it in memory, such that
+        # neither the time to first byte nor the worker memory depend on the asset size.
+        response = Response(
+            app_iter=app_iter, status=upstream.status, content_type=file_type
+        )
+        proxy.relay_headers(upstream.headers, response)
+        if content_length is not None:
+            response.content_length = int(content_length)
+        return self.set_assets_cache_control(response, immutable)
+
+    def serve_archive_member(self, request, suffix, file_type, immutable):
+        """
+        Serve a file of a package that was stored as a zip archive, with a ranged read
+        of the archive. Range and conditional request headers are honoured.
+        """
+        package_archive = self.package_meta["archive"]
+        members = self.get_package_index().get("members")
+        if members is None:
+            members = self.rebuild_archive_index()
+        member = members.get(suffix)
+        if member is None:
+            return Response(status=404)
+
+        disk_cache = diskcache.get_disk_cache(self.xblock_settings)
+        cache_key = os.path.join(package_archive["path"], suffix)
+        if disk_cache is not None:
+            response = disk_cache.get_response(request, cache_key, file_type)
+            if response is not None:
+                return self.set_assets_cache_control(response, immutable)
+
+        open_range = functools.partial(
+            self.open_archive_range, package_archive["path"]
+        )
+        response = Response(
+            app_iter=archive.MemberAppIter(
+                open_range,
+                member,
+                self.xblock_settings.get("PROXY_CHUNK_SIZE", proxy.DEFAULT_CHUNK_SIZE),
+            ),
+            content_type=file_type,
+            conditional_response=True,
+        )
+        response.content_length = member[archive.FILE_SIZE]
+        response.headers["ETag"] = archive.get_etag(member)
+        response.accept_ranges = "bytes"
+        self.set_assets_cache_control(response, immutable)
+        # Running the response as a WSGI app evaluates the Range and conditional
+        # headers. The archive is only read once the response body is iterated on.
+        response = request.get_response(response)
+        if (
+            disk_cache is not None
+            and response.status_code == 200
+            and disk_cache.cacheable(member[archive.FILE_SIZE])
+        ):
+            response.app_iter = disk_cache.tee(
+                cache_key, response.headers, response.app_iter, member[archive.FILE_SIZE]
+            )
+        return response
+
+    def rebuild_archive_index(self):
+        """
+        Index the members of the stored zip file again, when the persisted index is
+        missing, e.g. in courses that were imported from another platform.
+        """
+        archive_path = self.package_meta["archive"]["path"]
+        logger.warning("Indexing SCORM package archive %s again", archive_path)
+        with self.storage.open(archive_path, "rb") as package_file, zipfile.ZipFile(
+            package_file, "r"
+        ) as scorm_zipfile:
+            root_path = self.find_package_root(scorm_zipfile.infolist())
+            members = archive.build_index(scorm_zipfile, root_path)
+        # Archive indexes only hold members, so the key of the index is the same
+        indexstore.save_index({"members": members})
+        return members
+
+    def open_archive_range(self, path, start, stop):
+        """
+        Return a file-like object over the [start, stop) bytes of a stored package
+        archive. On S3, only these bytes are fetched from the bucket.
+        """
+        headers = {"Range": f"bytes={start}-{stop - 1}"}
+        if not self.is_s3_enabled():
+            archive_file = self.storage.open(path, "rb")
+            archive_file.seek(start)
+            return archive.LimitedReader(archive_file, stop - start)
+        xblock_settings = self.xblock_settings
+        if proxy.get_upstream_client(xblock_settings) == proxy.UPSTREAM_CLIENT_BOTO3:
+            upstream = proxy.fetch_s3_object(self.storage, path, headers)
+        else:
+            # S3ScormStorage.url rewrites paths of the package folder
+            object_url = getattr(self.storage, "object_url", self.storage.url)
+            upstream = proxy.fetch_url(object_url(path), headers, xblock_settings)
+        if upstream.status != 206:
+            upstream.close()
+            raise proxy.UpstreamError(f"Error fetching {path}: HTTP {upstream.status}")
+        return upstream.body
+
+    @XBlock.handler
+    def assets_cache_stats(self, request, _suffix):
+        """
+        Return the hit, miss and eviction counters of the local asset cache of the
+        process that serves this request. Only available to staff users.
+        """
+        if not getattr(self.runtime, "user_is_staff", False):
+            return Response(status=403)
+        disk_cache = diskcache.get_disk_cache(self.xblock_settings)
+        if disk_cache is None:
+            return self.json_response({"enabled": False})
+        return self.json_response({"enabled": True, **disk_cache.stats()})
 
-        return Response(file_content, content_type=file_type)
+    def fetch_asset(self, suffix, query_string, headers):
+        """
+        Fetch an asset of the package from the storage backend. Concurrent fetches of
+        the same asset are coalesced into a single upstream request, unless the client
+        sent conditional headers. Fetches are only coalesced when they request the
+        exact same object, i.e: the same variant of the asset, with the same query
+        string and forwarded headers.
+
+        Return a `proxy.UpstreamResponse` object, the body of which is not read yet.
+        """
+        xblock_settings = self.xblock_settings
+        fetch_func = functools.partial(
+            self.fetch_asset_from_storage, suffix, query_string, headers
+        )
+        if not xblock_settings.get("PROXY_COALESCE", True) or any(
+            name.startswith("If-") for name in headers
+        ):
+            return fetch_func()
+        key = singleflight.get_key(
+            getattr(self.storage, "bucket_name", ""),
+            self.get_asset_object_name(suffix),
+            query_string or "",
+            *(f"{name}: {value}" for name, value in sorted(headers.items())),
+        )
+        return singleflight.fetch(
+            key,
+            fetch_func,
+            max_size=xblock_settings.get(
+                "PROXY_COALESCE_MAX_SIZE", singleflight.DEFAULT_MAX_SIZE
+            ),
+            wait_timeout=xblock_settings.get(
+                "PROXY_COALESCE_TIMEOUT", singleflight.DEFAULT_WAIT_TIMEOUT
+            ),
+            cross_process=xblock_settings.get("PROXY_COALESCE_CROSS_PROCESS", False),
+        )
+
+    def fetch_asset_from_storage(self, suffix, query_string, headers):
+        """
+        Fetch an asset of the package from the storage backend, either with the boto3
+        client of the storage or over HTTP with a presigned url. Connections are pooled
+        and kept alive across requests in both cases.
+        """
+        xblock_settings = self.xblock_settings
+        if proxy.get_upstream_client(xblock_settings) == proxy.UPSTREAM_CLIENT_BOTO3:
+            return proxy.fetch_s3_object(
+                self.storage, self.get_asset_object_name(suffix), headers
+            )
+        signed_url = self.storage.url(suffix)
+        if query_string:
+            signed_url = "&".join([signed_url, query_string])
+        return proxy.fetch_url(signed_url, headers, xblock_settings)
+
+    def get_asset_object_name(self, suffix):
+        """
+        Return the name of the storage object that is fetched for the `suffix` asset
+        path. Note that `suffix` already points to the precompressed variant, if any.
+        """
+        return os.path.join(self.extract_folder_path, suffix)
+
+    def set_assets_cache_control(self, response, immutable):
+        """
+        Set the Cache-Control header of a successful `assets_proxy` response. Assets of
+        uploaded packages that are requested with a url that includes the current
+        package SHA-1 can be cached forever. Other urls serve content that changes when
+        the package is replaced, so their responses are revalidated with their ETag.
+        Packages served from an existing S3 path might change at any time.
+        """
+        if self.scorm_s3_path:
+            cache_control = proxy.get_cache_control(
+                self.xblock_settings, content_addressed=False
+            )
+        elif immutable:
+            cache_control = proxy.get_cache_control(
+                self.xblock_settings, content_addressed=True
+            )
+        else:
+            cache_control = proxy.UNVERSIONED_CACHE_CONTROL
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
+        return response
 
     def studio_view(self, context=None):
         # Note that we cannot use xblockutils's StudioEditableXBlockMixin because we
         # need to support package file uploads.
+        self.apply_package_job_result()
         studio_context = {
             "field_display_name": self.fields["display_name"],
             "field_has_score": self.fields["has_score"],
@@ -323,7 +676,11 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             "popup_on_launch": self.fields["popup_on_launch"],
             "scorm_xblock": self,
         }
-        js_context = {"is_s3_enabled": self.is_s3_enabled()}
+        js_context = {
+            "is_s3_enabled": self.is_s3_enabled(),
+            "package_job_id": self.package_job_id,
+            "chunked_upload": uploads.is_enabled(self.xblock_settings),
+        }
         studio_context.update(context or {})
         template = self.render_template("static/html/studio.html", studio_context)
         frag = Fragment(template)
@@ -333,9 +690,12 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         return frag
 
     @staticmethod
-    def json_response(data):
+    def json_response(data, status=200):
         return Response(
-            json.dumps(data), content_type="application/json", charset="utf8"
+            json.dumps(data),
+            content_type="application/json",
+            charset="utf8",
+            status=status,
         )
 
     @XBlock.handler
@@ -363,24 +723,31 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
                 )
                 # NOTE: package_meta  can't be empty, but we don't have any relevant
                 # information for it
-                self.package_meta = {"s3_path_set": True}
+                self.package_meta = {
+                    "s3_path_set": True,
+                    "manifest_sha1": self.package_meta["manifest_sha1"],
+                }
+                self.package_job_id = ""
+                return self.json_response(response)
+
+            elif request.params.get("upload_id"):
+                # The package was uploaded in parts to the storage backend
+                response.update(
+                    self.process_uploaded_package(request.params["upload_id"])
+                )
                 return self.json_response(response)
 
             elif not hasattr(request.params["file"], "file"):
                 # File not uploaded
                 return self.json_response(response)
 
-            self.package_meta = {}
             package_file = request.params["file"].file
-            self.update_package_meta(package_file)
-
-            # Clean storage folder, if it already exists
-            self.clean_storage()
+            if jobs.is_async(self.xblock_settings):
+                response["job_id"] = self.enqueue_package_job(package_file)
+                return self.json_response(response)
 
-            # Extract zip file
-            self.extract_package(package_file)
-            imsmanifest_path = self.find_file_path("imsmanifest.xml")
-            self.update_package_fields(imsmanifest_path)
+            self.package_job_id = ""
+            self.process_package(package_file, package_file.name)
 
         except ScormError as e:
             self.scorm_s3_path = old_s3_scorm_path
@@ -388,6 +755,437 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
 
         return self.json_response(response)
 
+    def process_package(self, package_file, package_name, progress=None, clean=True):
+        """
+        Store an uploaded package and update the package fields accordingly. On
+        failure, the metadata of the previous package is restored.
+
+        The files of the previous package are then deleted, unless `clean` is False,
+        in which case `clean_previous_packages` must be called once the new package
+        fields are saved.
+        """
+        # XBlock fields keep their cached value when they are set to an equal value,
+        # such as the empty metadata of new blocks, so the previous value is copied.
+        previous_package_meta = copy.deepcopy(self.package_meta)
+        self.package_meta = {}
+        try:
+            self.update_package_meta(package_file)
+            self.package_meta["name"] = package_name
+            # Locate the storage folder of the block once, rather than on every access
+            self.package_meta["old_base_path"] = self.old_folder_exists()
+
+            # The location of the imsmanifest.xml file and the list of files of the
+            # package are read from the zip index, without walking the storage.
+            xblock_settings = self.xblock_settings
+            storage_mode = archive.get_storage_mode(xblock_settings)
+            if storage_mode == archive.STORAGE_MODE_ARCHIVE:
+                # Store the zip file as-is
+                self.store_package_archive(package_file, progress=progress)
+            elif packagestore.is_enabled(xblock_settings):
+                # Extract zip file to the shared store, unless it is already there
+                self.store_shared_package(
+                    package_file,
+                    progress=progress,
+                    previous_package_meta=previous_package_meta,
+                )
+            else:
+                # Extract zip file. Unchanged files are copied from the previous
+                # version.
+                self.extract_package(
+                    package_file,
+                    progress=progress,
+                    previous_package_meta=previous_package_meta,
+                )
+            # The index of the files is only loaded when they are served
+            indexstore.persist_index(self.package_meta)
+        except Exception:
+            self.package_meta = previous_package_meta
+            raise
+        if clean:
+            self.clean_previous_packages()
+
+    def clean_previous_packages(self):
+        """
+        Delete the stored files of the previous versions of the package. This must
+        only be called once the package fields point to the current version.
+        """
+        if "shared_path" in self.package_meta:
+            # Files that were extracted for this block only are no longer needed
+            self.clean_storage()
+        elif "archive" in self.package_meta:
+            self.clean_storage(keep=self.package_meta["archive"]["path"])
+        else:
+            self.clean_storage(keep=self.extract_folder_path)
+
+    def apply_package_job_result(self):
+        """
+        Save the results of the last package job to the block, if it is done, then
+        delete the files of the previous package. Return True if results were applied.
+        """
+        if not self.package_job_id:
+            return False
+        result = jobs.pop_result(self.package_job_id, self.scope_ids.usage_id)
+        if result is None:
+            return False
+        for name, value in result.items():
+            setattr(self, name, value)
+        self.package_job_id = ""
+        self.save()
+        try:
+            self.clean_previous_packages()
+        except Exception:
+            # Leftover files are deleted along with the next package upload
+            logger.exception("Error deleting the previous SCORM package files")
+        return True
+
+    def enqueue_package_job(self, package_file):
+        """
+        Process an uploaded package asynchronously and return the id of the job.
+        """
+        xblock_settings = self.xblock_settings
+        if jobs.get_executor(xblock_settings) == jobs.EXECUTOR_CELERY:
+            # Celery workers run on other hosts, so the package is staged in the
+            # storage backend.
+            staged_path = self.storage.save(
+                os.path.join(self.uploads_folder_path, f"{uuid.uuid4().hex}.zip"),
+                File(package_file),
+            )
+            return self.enqueue_staged_package_job(staged_path, package_file.name)
+
+        job_id = jobs.create_job(self.scope_ids.usage_id)
+        # The uploaded file is deleted at the end of the request
+        staged_file = jobs.stage_locally(package_file)
+        self.run_detached(
+            xblock_settings, "run_package_job", job_id, staged_file, package_file.name
+        )
+        self.package_job_id = job_id
+        return job_id
+
+    def enqueue_staged_package_job(self, staged_path, package_name):
+        """
+        Process a package that was staged in the storage backend asynchronously, and
+        return the id of the job.
+        """
+        xblock_settings = self.xblock_settings
+        job_id = jobs.create_job(self.scope_ids.usage_id)
+        if jobs.get_executor(xblock_settings) == jobs.EXECUTOR_CELERY:
+            tasks.process_package.delay(
+                job_id, str(self.scope_ids.usage_id), staged_path, package_name
+            )
+        else:
+            self.run_detached(
+                xblock_settings,
+                "run_staged_package_job",
+                job_id,
+                staged_path,
+                package_name,
+            )
+        self.package_job_id = job_id
+        return job_id
+
+    def run_detached(self, xblock_settings, method_name, *args):
+        """
+        Run a job method on a detached copy of this block, with the "sync" or "thread"
+        executor.
+        """
+        block = self.get_detached_copy()
+        if jobs.get_executor(xblock_settings) == jobs.EXECUTOR_SYNC:
+            getattr(block, method_name)(*args)
+        else:
+            jobs.get_thread_pool(xblock_settings).submit(
+                getattr(block, method_name), *args
+            )
+
+    def get_detached_copy(self):
+        """
+        Return a copy of this block, the fields of which are stored in memory. Changes
+        to this copy are never saved, and never leak to this block.
+        """
+        field_data = DictFieldData(
+            {
+                name: copy.deepcopy(field.read_from(self))
+                for name, field in self.fields.items()
+                if field.scope in (Scope.content, Scope.settings)
+                and field.is_set_on(self)
+            }
+        )
+        return self.runtime.construct_xblock_from_class(
+            ScormXBlock, self.scope_ids, field_data
+        )
+
+    def run_package_job(self, job_id, package_file, package_name):
+        """
+        Process a package in a job, and store the resulting field values in the
+        database, from which they are applied by `apply_package_job_result`. This must
+        run on a copy of the block that is never saved, so the files of the previous
+        package are kept until the results are saved to the block.
+        """
+        jobs.update_job(job_id, status=jobs.STATUS_RUNNING)
+        progress = jobs.Progress(job_id)
+        try:
+            self.process_package(
+                package_file, package_name, progress=progress, clean=False
+            )
+        except ScormError as e:
+            jobs.update_job(job_id, status=jobs.STATUS_FAILED, errors=[str(e)])
+        except Exception:
+            logger.exception("Error processing SCORM package in job %s", job_id)
+            jobs.update_job(
+                job_id,
+                status=jobs.STATUS_FAILED,
+                errors=["Unexpected error while processing the package"],
+            )
+        else:
+            jobs.save_result(
+                job_id,
+                self.scope_ids.usage_id,
+                {name: getattr(self, name) for name in PACKAGE_FIELDS},
+            )
+            jobs.update_job(
+                job_id,
+                status=jobs.STATUS_DONE,
+                files_done=progress.files_done,
+                bytes_done=progress.bytes_done,
+            )
+        finally:
+            package_file.close()
+
+    def run_staged_package_job(self, job_id, staged_path, package_name):
+        """
+        Process a package that was staged in the storage backend, then delete it.
+        """
+        try:
+            try:
+                package_file = self.storage.open(staged_path, "rb")
+            except OSError as e:
+                jobs.update_job(job_id, status=jobs.STATUS_FAILED, errors=[str(e)])
+                return
+            self.run_package_job(job_id, package_file, package_name)
+        finally:
+            self.storage.delete(staged_path)
+
+    def process_uploaded_package(self, upload_id):
+        """
+        Process a package that was uploaded in parts, synchronously or in a job, and
+        return the additional values of the `studio_submit` response.
+        """
+        upload = uploads.get_upload(upload_id, self.scope_ids.usage_id)
+        if upload is None or not upload["completed"]:
+            raise ScormError(
+                "The uploaded package could not be found. Please upload it again."
+            )
+        uploads.delete_upload(upload_id)
+        if jobs.is_async(self.xblock_settings):
+            return {
+                "job_id": self.enqueue_staged_package_job(
+                    upload["path"], upload["name"]
+                )
+            }
+        self.package_job_id = ""
+        try:
+            with self.storage.open(upload["path"], "rb") as package_file:
+                self.process_package(package_file, upload["name"])
+        finally:
+            self.storage.delete(upload["path"])
+        return {}
+
+    @property
+    def uploads_folder_path(self):
+        """
+        Folder where packages are staged before they are processed.
+        """
+        return uploads.get_folder(self.scorm_location())
+
+    @staticmethod
+    def is_upload_allowed():
+        """
+        Packages may only be uploaded from Studio.
+        """
+        return getattr(settings, "SERVICE_VARIANT", None) != "lms"
+
+    @XBlock.json_handler
+    def start_package_upload(self, data, _suffix):
+        """
+        Start the upload of a package in parts, or resume it if an upload id is given.
+        Return the urls to which the parts that were not uploaded yet must be PUT.
+        """
+        if not self.is_upload_allowed():
+            raise JsonHandlerError(403, "Packages can only be uploaded from Studio")
+        xblock_settings = self.xblock_settings
+        upload_id = data.get("upload_id")
+        upload = (
+            uploads.get_upload(upload_id, self.scope_ids.usage_id) if upload_id else None
+        )
+        if upload is not None and upload["size"] != data.get("size"):
+            # Another file is uploaded: the parts of the previous one are useless
+            uploads.abort_upload(self.storage, upload)
+            uploads.delete_upload(upload_id)
+            upload = None
+        if upload is None:
+            try:
+                upload_id, upload = uploads.create_upload(
+                    self.storage,
+                    self.scope_ids.usage_id,
+                    self.uploads_folder_path,
+                    data.get("name") or "package.zip",
+                    parse_int(data.get("size"), 0),
+                    xblock_settings.get(
+                        "CHUNKED_UPLOAD_PART_SIZE", uploads.DEFAULT_PART_SIZE
+                    ),
+                )
+            except uploads.UploadError as e:
+                raise JsonHandlerError(400, str(e))
+            uploaded_parts = set()
+        else:
+            uploaded_parts = uploads.get_uploaded_parts(self.storage, upload)
+        part_urls = uploads.get_part_urls(
+            self.storage,
+            upload,
+            [
+                part_number
+                for part_number in range(1, upload["part_count"] + 1)
+                if part_number not in uploaded_parts
+            ],
+            lambda part_number: self.runtime.handler_url(
+                self, "upload_package_part", f"{upload_id}/{part_number}"
+            ),
+            uploads.UPLOAD_TIMEOUT,
+        )
+        return {
+            "upload_id": upload_id,
+            "part_size": upload["part_size"],
+            "part_count": upload["part_count"],
+            "parts": part_urls,
+        }
+
+    @XBlock.handler
+    def upload_package_part(self, request, suffix):
+        """
+        Store a part of a package, when parts cannot be uploaded straight to the
+        storage backend. The url suffix is "{upload_id}/{part_number}".
+        """
+        if not self.is_upload_allowed():
+            return Response(status=403)
+        upload_id, _, part_number = suffix.partition("/")
+        upload = uploads.get_upload(upload_id, self.scope_ids.usage_id)
+        if upload is None or upload["multipart_id"]:
+            return Response(status=404)
+        try:
+            uploads.save_part(
+                self.storage,
+                upload,
+                parse_int(part_number, 0),
+                request.body_file,
+                request.content_length,
+            )
+        except uploads.UploadError as e:
+            return self.json_response({"error": str(e)}, status=400)
+        return Response(status=204)
+
+    @XBlock.json_handler
+    def complete_package_upload(self, data, _suffix):
+        """
+        Assemble the parts of an uploaded package. The package is then processed by
+        `studio_submit`.
+        """
+        if not self.is_upload_allowed():
+            raise JsonHandlerError(403, "Packages can only be uploaded from Studio")
+        upload_id = data.get("upload_id")
+        upload = uploads.get_upload(upload_id, self.scope_ids.usage_id)
+        if upload is None:
+            raise JsonHandlerError(404, "Unknown upload")
+        try:
+            uploads.complete_upload(self.storage, upload_id, upload)
+        except uploads.UploadError as e:
+            raise JsonHandlerError(400, str(e))
+        return {"upload_id": upload_id}
+
+    @XBlock.json_handler
+    def package_job_status(self, _data, _suffix):
+        """
+        Return the progress of the job that processes the last uploaded package. Once
+        the job is done, its results are saved to the block, and only then are the
+        files of the previous package deleted. Until then, and if the job is lost, the
+        block keeps serving the previous package. Results are also applied when the
+        block is next displayed in Studio, in case nobody polls the job.
+        """
+        if not self.package_job_id:
+            return {"status": None}
+        job = jobs.get_job(self.package_job_id)
+        if job is not None and job["usage_id"] != str(self.scope_ids.usage_id):
+            job = None
+        applied = self.apply_package_job_result()
+        if job is None:
+            if not applied:
+                self.package_job_id = ""
+                return {
+                    "status": jobs.STATUS_FAILED,
+                    "errors": [
+                        "Package processing was interrupted. Please upload the package again."
+                    ],
+                }
+            # The job state expired from the cache, but its result was stored
+            job = {
+                "status": jobs.STATUS_DONE,
+                "files_done": 0,
+                "files_total": 0,
+                "bytes_done": 0,
+                "bytes_total": 0,
+                "errors": [],
+            }
+        if job["status"] in (jobs.STATUS_DONE, jobs.STATUS_FAILED):
+            # Results of done jobs may also have been applied by another request
+            self.package_job_id = ""
+        return {
+            key: job[key]
+            for key in (
+                "status",
+                "files_done",
+                "files_total",
+                "bytes_done",
+                "bytes_total",
+                "errors",
+            )
+        }
+
+    @XBlock.handler
+    def table_of_contents(self, request, _suffix):
+        """
+        Return the navigation menu as compact JSON, which is rendered by the browser.
+        Organizations and items are `[title, url, children]` lists, where the url is
+        null for items without a resource. Blocks that were saved before manifests
+        were persisted return their stored HTML menu instead.
+
+        The ETag is derived from the package version, such that revalidation requests
+        are answered without reading the manifest. Resolved urls are only valid for a
+        limited time, so the ETag also changes with every url cache period, and
+        responses expire at the end of the current period.
+        """
+        timeout = max(self.get_asset_urls_cache_timeout(), 1)
+        period, elapsed = divmod(int(time.time()), timeout)
+        etag = hashlib.sha1(
+            "\n".join(
+                [
+                    self.get_package_cache_key("table_of_contents", str(period)),
+                    self.navigation_menu,
+                ]
+            ).encode()
+        ).hexdigest()
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            toc = self.get_table_of_contents()
+            if toc is None:
+                toc = {"html": self.navigation_menu}
+            response = Response(
+                json.dumps(toc, separators=(",", ":")),
+                content_type="application/json",
+                charset="utf8",
+            )
+        response.etag = etag
+        response.cache_control = f"private, max-age={timeout - elapsed}"
+        return response
+
     @XBlock.handler
     def popup_window(self, request, _suffix):
         """
@@ -399,81 +1197,288 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
                 "index_page_url": self.index_page_url,
                 "width": self.width or 800,
                 "height": self.height or 800,
-                "navigation_menu": self.navigation_menu,
+                "navigation_menu": (
+                    self.get_navigation_menu() if self.enable_navigation_menu else ""
+                ),
                 "navigation_menu_width": self.navigation_menu_width,
                 "enable_navigation_menu": self.enable_navigation_menu,
             },
         )
         return Response(body=rendered)
 
-    def clean_storage(self):
-        if self.path_exists(self.extract_folder_base_path):
-            logger.info(
-                'Removing previously unzipped "%s"', self.extract_folder_base_path
-            )
-            self.recursive_delete(self.extract_folder_base_path)
+    def clean_storage(self, keep=None):
+        """
+        Delete the stored package files, except for the `keep` file or the contents of
+        the `keep` folder.
+        """
+        logger.info('Removing previously unzipped "%s"', self.extract_folder_base_path)
+        try:
+            self.recursive_delete(self.extract_folder_base_path, keep=keep)
+        except FileNotFoundError:
+            pass
 
-    def recursive_delete(self, root):
+    def recursive_delete(self, root, keep=None):
         """
         Recursively delete the contents of a directory in the Django default storage.
         Unfortunately, this will not delete empty folders, as the default FileSystemStorage
         implementation does not allow it.
         """
-        directories, files = self.storage.listdir(root)
-        for directory in directories:
-            self.recursive_delete(os.path.join(root, directory))
-        for f in files:
-            self.storage.delete(os.path.join(root, f))
+        delete_folder(
+            self.storage,
+            root,
+            keep=keep,
+            workers=self.xblock_settings.get("DELETE_WORKERS", DEFAULT_DELETE_WORKERS),
+        )
 
-    def extract_package(self, package_file):
+    def extract_package(self, package_file, progress=None, previous_package_meta=None):
+        xblock_settings = self.xblock_settings
         with zipfile.ZipFile(package_file, "r") as scorm_zipfile:
-            zipinfos = scorm_zipfile.infolist()
-            root_path = None
-            root_depth = -1
-            # Find root folder which contains imsmanifest.xml
-            for zipinfo in zipinfos:
-                if os.path.basename(zipinfo.filename) == "imsmanifest.xml":
-                    depth = len(os.path.split(zipinfo.filename))
-                    if depth < root_depth or root_depth < 0:
-                        root_path = os.path.dirname(zipinfo.filename)
-                        root_depth = depth
-
-            if root_path is None:
-                raise ScormError(
-                    "Could not find 'imsmanifest.xml' file in the scorm package"
+            members, imsmanifest_file = self.read_package_index(scorm_zipfile)
+            reuse_folder, reused = self.get_reused_files(previous_package_meta or {})
+
+            # Extract only files that are below the root. Do not unzip folders, only
+            # files. Files are uploaded concurrently by a bounded pool of threads.
+            try:
+                precompressed = extraction.extract_members(
+                    self.storage,
+                    scorm_zipfile,
+                    members,
+                    self.extract_folder_path,
+                    encodings=precompress.get_encodings(xblock_settings),
+                    min_size=xblock_settings.get(
+                        "PRECOMPRESS_MIN_SIZE", precompress.DEFAULT_MIN_SIZE
+                    ),
+                    max_size=xblock_settings.get(
+                        "PRECOMPRESS_MAX_SIZE", precompress.DEFAULT_MAX_SIZE
+                    ),
+                    workers=xblock_settings.get(
+                        "EXTRACT_WORKERS", extraction.DEFAULT_WORKERS
+                    ),
+                    retries=xblock_settings.get(
+                        "EXTRACT_RETRIES", extraction.DEFAULT_RETRIES
+                    ),
+                    progress=progress,
+                    reuse_folder=reuse_folder,
+                    reused=reused,
+                    limits=self.get_extraction_limits(),
+                )
+            except extraction.ExtractionLimitError as e:
+                raise ScormError(f"Invalid package: {e}")
+            except Exception as e:
+                logger.exception("Error extracting SCORM package")
+                raise ScormError(f"Could not extract package: {e}")
+
+        if precompressed:
+            self.package_meta["precompressed"] = precompressed
+        self.update_package_fields_from_file(imsmanifest_file)
+
+    def read_package_index(self, scorm_zipfile):
+        """
+        Record the files of the package in the package metadata, and return the
+        (relative path, zipinfo) members of the package along with its manifest.
+        """
+        zipinfos = scorm_zipfile.infolist()
+        # Find root folder which contains imsmanifest.xml
+        root_path = self.find_package_root(zipinfos)
+        members = list(archive.iter_package_members(zipinfos, root_path))
+        # Reject zip bombs before anything is decompressed, including the manifest
+        self.check_package_limits(members)
+        self.package_meta["files"] = fileindex.build_index(members)
+        return members, self.read_package_manifest(scorm_zipfile, root_path)
+
+    def get_extraction_limits(self):
+        return extraction.ExtractionLimits.from_settings(self.xblock_settings)
+
+    def check_package_limits(self, members):
+        """
+        Check the (relative path, zipinfo) members of a package against the extraction
+        budget, as declared by the zip index.
+        """
+        try:
+            self.get_extraction_limits().check_members(members)
+        except extraction.ExtractionLimitError as e:
+            raise ScormError(f"Invalid package: {e}")
+
+    def store_shared_package(
+        self, package_file, progress=None, previous_package_meta=None
+    ):
+        """
+        Extract the package to the shared store, or link to it if it was already
+        extracted for another block.
+        """
+        package = packagestore.get_or_create_package(
+            self.package_meta["sha1"],
+            packagestore.get_package_path(
+                self.scorm_location(), self.package_meta["sha1"]
+            ),
+            self.package_meta["size"],
+            usage_key=self.scope_ids.usage_id,
+        )
+        self.package_meta["shared_path"] = package.path
+        # Concurrent uploads of the same package wait until it is extracted
+        owner = uuid.uuid4().hex
+        package, extract = packagestore.acquire_package(
+            package, owner, packagestore.get_lease_timeout(self.xblock_settings)
+        )
+        if extract:
+            try:
+                self.extract_package(
+                    package_file,
+                    progress=progress,
+                    previous_package_meta=previous_package_meta,
                 )
+            except Exception:
+                packagestore.release_package(package, owner)
+                raise
+            packagestore.mark_ready(package, self.package_meta.get("precompressed", {}))
+        else:
+            logger.info("Linking to shared SCORM package %s", package.path)
+            with zipfile.ZipFile(package_file, "r") as scorm_zipfile:
+                _members, imsmanifest_file = self.read_package_index(scorm_zipfile)
+            if package.precompressed:
+                self.package_meta["precompressed"] = package.precompressed
+            self.update_package_fields_from_file(imsmanifest_file)
+        packagestore.add_reference(package, self.scope_ids.usage_id)
+
+    def get_reused_files(self, previous_package_meta):
+        """
+        Compare the files of the new package with the files of the previous version,
+        the folder of which is still in the storage backend. Files with the same path,
+        size and CRC32 are unchanged, and may be copied instead of extracted.
+
+        Return the folder of the previous version, and the encodings of the
+        precompressed variants of each unchanged file, keyed by path.
+
+        When the same package is uploaded again, it is extracted to the folder of the
+        previous version, the files of which are currently served: they are all
+        reused as-is, even without a file index, such that none of them is ever
+        overwritten or deleted.
+        """
+        if "sha1" not in previous_package_meta:
+            return None, {}
+        previous_index = indexstore.load_index(previous_package_meta)
+        previous_files = previous_index.get("files")
+        previous_precompressed = previous_index.get("precompressed", {})
+        if self.is_live_folder(self.extract_folder_path, previous_package_meta):
+            logger.info("Reusing all the files of the same package version")
+            return self.extract_folder_path, {
+                path: previous_precompressed.get(path, [])
+                for path in self.package_meta["files"]
+            }
+        if not previous_files:
+            return None, {}
+        reused = {
+            path: previous_precompressed.get(path, [])
+            for path, file_info in self.package_meta["files"].items()
+            if fileindex.is_unchanged(file_info, previous_files.get(path))
+        }
+        logger.info(
+            "Reusing %d unchanged files out of %d from the previous package version",
+            len(reused),
+            len(self.package_meta["files"]),
+        )
+        reuse_folder = previous_package_meta.get("shared_path") or os.path.join(
+            self.extract_folder_base_path, previous_package_meta["sha1"]
+        )
+        return reuse_folder, reused
+
+    def is_live_folder(self, folder, previous_package_meta):
+        """
+        Return True if the files of the previous version of the package, which are
+        currently served, were extracted to the given folder.
+        """
+        if "archive" in previous_package_meta or "shared_path" in previous_package_meta:
+            return False
+        return folder == os.path.join(
+            self.extract_folder_base_path, previous_package_meta["sha1"]
+        )
+
+    def store_package_archive(self, package_file, progress=None):
+        """
+        Store the package zip file without extracting it, along with the index of its
+        members, from which they will be served by `assets_proxy`. The package is
+        entirely validated before it is stored.
+        """
+        with zipfile.ZipFile(package_file, "r") as scorm_zipfile:
+            zipinfos = scorm_zipfile.infolist()
+            root_path = self.find_package_root(zipinfos)
+            # Members are decompressed when they are served: the budget still applies
+            self.check_package_limits(
+                list(archive.iter_package_members(zipinfos, root_path))
+            )
+            try:
+                members = archive.build_index(scorm_zipfile, root_path)
+            except archive.ArchiveError as e:
+                raise ScormError(f"Invalid package: {e}")
+            imsmanifest_file = self.read_package_manifest(scorm_zipfile, root_path)
+        self.package_meta["archive"] = {"path": None, "members": members}
+        self.update_package_fields_from_file(imsmanifest_file)
+
+        if progress is not None:
+            progress.start(1, self.package_meta["size"])
+        package_file.seek(0)
+        archive_path = self.storage.save(
+            os.path.join(
+                self.extract_folder_base_path, f"{self.package_meta['sha1']}.zip"
+            ),
+            File(package_file),
+        )
+        if progress is not None:
+            progress.advance(1, self.package_meta["size"])
+        self.package_meta["archive"]["path"] = archive_path
 
-            for zipinfo in zipinfos:
-                # Extract only files that are below the root
-                if zipinfo.filename.startswith(root_path):
-                    # Do not unzip folders, only files. In Python 3.6 we will have access to
-                    # the is_dir() method to verify whether a ZipInfo object points to a
-                    # directory.
-                    # https://docs.python.org/3.6/library/zipfile.html#zipfile.ZipInfo.is_dir
-                    # TODO: remove backported 'is_dir' method once upgraded to 
-                    # python 3.12.3 or greater. 
-                    if not is_dir(zipinfo):
-                        dest_path = os.path.join(
-                            self.extract_folder_path,
-                            os.path.relpath(zipinfo.filename, root_path),
-                        )
-                        self.storage.save(
-                            dest_path,
-                            ContentFile(scorm_zipfile.read(zipinfo.filename)),
-                        )
+    @staticmethod
+    def read_package_manifest(scorm_zipfile, root_path):
+        return io.BytesIO(
+            scorm_zipfile.read(os.path.join(root_path, "imsmanifest.xml"))
+        )
+
+    @staticmethod
+    def find_package_root(zipinfos):
+        root_path = archive.find_root_path(zipinfos)
+        if root_path is None:
+            raise ScormError(
+                "Could not find 'imsmanifest.xml' file in the scorm package"
+            )
+        return root_path
 
     @property
     def index_page_url(self):
+        """
+        Url of the index page of the package. It is cached per package version, for
+        less time than presigned urls are valid, such that rendering the block does
+        not reach the storage backend.
+        """
         if not self.package_meta or not self.index_page_path:
             return ""
+        cache_key = self.get_package_cache_key(
+            "index_page_url",
+            getattr(settings, "SERVICE_VARIANT", None) or "",
+            self.scorm_s3_path,
+            self.index_page_path,
+        )
+        url = cache.get(cache_key)
+        if url is None:
+            url = self.resolve_index_page_url()
+            cache.set(cache_key, url, self.get_asset_urls_cache_timeout())
+        return url
 
+    def resolve_index_page_url(self):
         # if we've already specified the scorm root we don't need to use our own
         if self.scorm_s3_path:
             return self.storage.url(os.path.join(self.scorm_s3_path, self.index_page_path))
 
+        if "archive" in self.package_meta:
+            return self.get_asset_url(self.index_page_path)
+
         folder = self.extract_folder_path
-        if self.storage.exists(
-            os.path.join(self.extract_folder_base_path, self.clean_path(self.index_page_path))
+        if "files" not in self.get_package_index() and self.get_legacy_layout(
+            "index_in_base_path",
+            lambda: self.storage.exists(
+                os.path.join(
+                    self.extract_folder_base_path, self.clean_path(self.index_page_path)
+                )
+            ),
         ):
             # For backward-compatibility, we must handle the case when the xblock data
             # is stored in the base folder.
@@ -482,6 +1487,36 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
 
         return self.storage.url(os.path.join(folder, self.index_page_path))
 
+    def get_asset_url(self, path):
+        """
+        Return the url of a file of the package, given its path relative to the package
+        root. Files of packages stored as zip archives are served by `assets_proxy`.
+        """
+        if "archive" in self.package_meta:
+            return f"{self.get_assets_proxy_base_url()}/{path}"
+        return self.storage.url(os.path.join(self.extract_folder_path, path))
+
+    def get_assets_version(self):
+        """
+        Return the version of the package that is part of `assets_proxy` urls, or None
+        for packages served from an existing S3 path, which are not versioned.
+        """
+        if self.scorm_s3_path:
+            return None
+        return self.package_meta.get("sha1")
+
+    def get_assets_proxy_base_url(self):
+        """
+        Return the url of the package root in `assets_proxy`. It includes the package
+        SHA-1, such that it changes whenever the package is replaced. Relative links
+        between the files of the package then resolve to versioned urls as well.
+        """
+        proxy_base_url = self.runtime.handler_url(self, "assets_proxy").rstrip("?/")
+        version = self.get_assets_version()
+        if version:
+            return f"{proxy_base_url}/{version}"
+        return proxy_base_url
+
     @property
     def extract_folder_path(self):
         """
@@ -491,6 +1526,9 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         if self.scorm_s3_path:
             return self.scorm_s3_path
 
+        if "shared_path" in self.package_meta:
+            return self.package_meta["shared_path"]
+
         return os.path.join(self.extract_folder_base_path, self.package_meta["sha1"])
 
     def clean_path(self, path):
@@ -515,14 +1553,47 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         Path to the folder where packages will be extracted.
         Compute hash of the unique block usage_id and use that as our directory name.
         """
-        # For backwards compatibility, we return the old path if the directory exists
-        if self.path_exists(self.extract_old_folder_base_path):
+        # For backwards compatibility, we return the old path if the directory exists.
+        # This is recorded at upload time.
+        old_base_path = self.package_meta.get("old_base_path")
+        if old_base_path is None:
+            old_base_path = self.get_legacy_layout(
+                "old_base_path", self.old_folder_exists
+            )
+        if old_base_path and self.location.block_id not in SHARED_FOLDERS:
             return self.extract_old_folder_base_path
         sha1 = hashlib.sha1()
         sha1.update(str(self.scope_ids.usage_id).encode())
         hashed_usage_id = sha1.hexdigest()
         return os.path.join(self.scorm_location(), hashed_usage_id)
     
+    def get_package_cache_key(self, name, *parts):
+        """
+        Return a cache key that is specific to this block and to the current version
+        of its package.
+        """
+        parts = (
+            str(self.scope_ids.usage_id),
+            self.package_meta.get("sha1", ""),
+            self.package_meta.get("last_updated", ""),
+            self.package_meta.get("manifest_sha1", ""),
+        ) + parts
+        digest = hashlib.sha1("\n".join(parts).encode()).hexdigest()
+        return f"openedxscorm.{name}.{digest}"
+
+    def get_legacy_layout(self, name, probe):
+        """
+        Return the result of a storage probe that locates the files of packages that
+        were uploaded before their storage layout was recorded. Probes are cached, such
+        that they are not repeated on every view.
+        """
+        cache_key = self.get_package_cache_key(f"layout.{name}")
+        found = cache.get(cache_key)
+        if found is None:
+            found = probe()
+            cache.set(cache_key, found, LAYOUT_CACHE_TIMEOUT)
+        return found
+
     @property
     def extract_old_folder_base_path(self):
         """
@@ -533,6 +1604,16 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         """
         return os.path.join(self.scorm_location(), self.location.block_id)
 
+    def old_folder_exists(self):
+        """
+        Return True if packages were extracted to the deprecated folder of the block.
+        Blocks whose id is the name of a folder that is shared by all blocks, such as
+        the shared package store, never use the deprecated folder.
+        """
+        if self.location.block_id in SHARED_FOLDERS:
+            return False
+        return self.path_exists(self.extract_old_folder_base_path)
+
     def get_mode(self, data):
         if "preview" in data["url"]:
             return "review"
@@ -662,13 +1743,13 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         return self.weight if self.has_score else None
 
     def update_package_meta(self, package_file):
-        self.package_meta["sha1"] = self.get_sha1(package_file)
+        sha1, size = self.get_sha1_and_size(package_file)
+        self.package_meta["sha1"] = sha1
         self.package_meta["name"] = package_file.name
         self.package_meta["last_updated"] = timezone.now().strftime(
             DateTime.DATETIME_FORMAT
         )
-        self.package_meta["size"] = package_file.seek(0, 2)
-        package_file.seek(0)
+        self.package_meta["size"] = size
 
     def update_package_fields(self, imsmanifest_path: str):
         """
@@ -678,58 +1759,185 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             imsmanifest_file = self.storage.open(imsmanifest_path)
         except OSError as e:
             raise ScormError(e)
+        self.update_package_fields_from_file(imsmanifest_file)
 
+    def update_package_fields_from_file(self, imsmanifest_file):
+        """
+        Same as `update_package_fields`, from an open imsmanifest.xml file. The parsed
+        manifest is persisted, keyed by the SHA-1 of the file.
+        """
+        content = imsmanifest_file.read()
         try:
-            tree = ET.parse(imsmanifest_file)
-            imsmanifest_file.seek(0)
-            namespace = ""
-            for _, node in ET.iterparse(imsmanifest_file, events=["start-ns"]):
-                if node[0] == "":
-                    namespace = node[1]
-                    break
-            root = tree.getroot()
-
-            prefix = "{" + namespace + "}" if namespace else ""
-            resource = root.find(
-                f"{prefix}resources/{prefix}resource[@href]"
-            )
-            schemaversion = root.find(
-                f"{prefix}metadata/{prefix}schemaversion"
-            )
+            parsed_manifest = manifest.parse_manifest(io.BytesIO(content))
+        except manifest.ParseError as e:
+            raise ScormError(f"Error parsing imsmanifest: {e}")
+        manifest_sha1 = hashlib.sha1(content).hexdigest()
+        manifeststore.save_manifest(manifest_sha1, parsed_manifest)
 
-            self.extract_navigation_titles(root, prefix)
+        # The navigation menu is rendered from the persisted manifest, with urls that
+        # are resolved when the menu is viewed
+        self.navigation_menu = ""
 
-            if resource is not None:
-                self.index_page_path = resource.get("href")
-            else:
-                self.index_page_path = self.find_relative_file_path("index.html")
-            if (schemaversion is not None) and (
-                re.match("^1.2$", schemaversion.text) is None
-            ):
-                self.scorm_version = "SCORM_2004"
-            else:
-                self.scorm_version = "SCORM_12"
+        if parsed_manifest.index_href is not None:
+            self.index_page_path = parsed_manifest.index_href
+        else:
+            self.index_page_path = self.find_relative_file_path("index.html")
+        schemaversion = parsed_manifest.schema_version
+        if (schemaversion is not None) and (re.match("^1.2$", schemaversion) is None):
+            self.scorm_version = "SCORM_2004"
+        else:
+            self.scorm_version = "SCORM_12"
+        self.package_meta["manifest_sha1"] = manifest_sha1
 
-        except ET.ParseError as e:
-            raise ScormError(f"Error parsing imsmanifest: {e}")
+    def get_manifest(self):
+        """
+        Return the parsed manifest of the package, or None if there is no package.
+
+        Manifests are read from the persisted models, which are cached. Packages that
+        were uploaded before manifests were persisted have their manifest parsed once
+        from the storage backend, and persisted with the SHA-1 of the package as key.
+        """
+        manifest_sha1 = self.manifest_key
+        if manifest_sha1:
+            parsed_manifest = manifeststore.get_manifest(manifest_sha1)
+            if parsed_manifest is not None:
+                return parsed_manifest
+        elif not self.scorm_s3_path:
+            return None
+        try:
+            with self.open_stored_manifest() as imsmanifest_file:
+                parsed_manifest = manifest.parse_manifest(imsmanifest_file)
+        except (OSError, zipfile.BadZipFile, manifest.ParseError, ScormError) as e:
+            logger.warning("Could not read the stored imsmanifest.xml file: %s", e)
+            return None
+        if manifest_sha1:
+            manifeststore.save_manifest(manifest_sha1, parsed_manifest)
+        return parsed_manifest
+
+    @property
+    def manifest_key(self):
+        """
+        SHA-1 of the persisted manifest, or None if there is no package.
+        """
+        return self.package_meta.get("manifest_sha1") or self.package_meta.get("sha1")
+
+    def open_stored_manifest(self):
+        """
+        Open the imsmanifest.xml file of the package from the storage backend.
+        """
+        if "archive" in self.package_meta:
+            with self.storage.open(
+                self.package_meta["archive"]["path"], "rb"
+            ) as package_file, zipfile.ZipFile(package_file, "r") as scorm_zipfile:
+                root_path = self.find_package_root(scorm_zipfile.infolist())
+                return self.read_package_manifest(scorm_zipfile, root_path)
+        return self.storage.open(
+            os.path.join(self.extract_folder_path, "imsmanifest.xml"), "rb"
+        )
+
+    def get_navigation_menu(self):
+        """
+        Return the HTML navigation menu of the package. Links are resolved now, such
+        that they do not expire. Blocks that were saved before the manifest was
+        persisted, and whose manifest cannot be read anymore, use their stored menu.
+        """
+        parsed_manifest = self.get_manifest()
+        if parsed_manifest is None:
+            return self.navigation_menu
+        navigation_menu_titles = self.extract_navigation_titles(parsed_manifest)
+        urls = self.get_navigation_urls(parsed_manifest)
+        return self.recursive_unorderedlist(navigation_menu_titles, urls)
+
+    def get_navigation_urls(self, parsed_manifest):
+        return {
+            path: urllib.parse.unquote(url)
+            for path, url in self.get_asset_urls(
+                parsed_manifest.get_item_hrefs()
+            ).items()
+        }
 
-    def extract_navigation_titles(self, root, prefix):
+    def get_table_of_contents(self):
+        """
+        Return the organizations of the package as nested `[title, url, children]`
+        lists, where children only include visible items, or None if the manifest
+        cannot be read.
+        """
+        parsed_manifest = self.get_manifest()
+        if parsed_manifest is None:
+            return None
+        urls = self.get_navigation_urls(parsed_manifest)
+
+        def get_node(item):
+            href = None
+            if item.identifierref:
+                href = parsed_manifest.get_resource_href(item.identifierref)
+            return [
+                # Sanitizing every title tag to protect against XSS attacks
+                self.sanitize_input(item.title or ""),
+                urls.get(href),
+                [get_node(child) for child in item.children if child.is_visible],
+            ]
+
+        return {
+            "organizations": [
+                get_node(organization)
+                for organization in parsed_manifest.organizations
+            ]
+        }
+
+    def extract_navigation_titles(self, parsed_manifest):
         """Extracts all the titles of items to build a navigation menu from the imsmanifest.xml file
 
         Args:
-            root (XMLTag): root of the imsmanifest.xml file
-            prefix (string): namespace to match with in the xml file
+            parsed_manifest (manifest.Manifest): parsed imsmanifest.xml file
+
+        Returns:
+            List: Nested lists of titles and relative hrefs, for each organization
         """
-        organizations = root.findall(
-            f"{prefix}organizations/{prefix}organization"
-        )
         navigation_menu_titles = []
         # Get data for all organizations
-        for organization in organizations:
+        for organization in parsed_manifest.organizations:
             navigation_menu_titles.append(
-                self.find_titles_recursively(organization, prefix, root)
+                self.find_titles_recursively(organization, parsed_manifest)
             )
-        self.navigation_menu = self.recursive_unorderedlist(navigation_menu_titles)
+        return navigation_menu_titles
+
+    def get_asset_urls(self, paths):
+        """
+        Return the urls of the given files of the package, keyed by relative path.
+
+        Files of packages that are stored as zip archives, or in S3 with presigned urls,
+        are served by `assets_proxy`, the urls of which never expire. Otherwise, urls
+        are generated by the storage backend, and cached for a duration that is shorter
+        than the expiry of presigned urls.
+        """
+        paths = set(paths)
+        if "archive" in self.package_meta or (
+            isinstance(self.storage, S3ScormStorage) and self.storage.querystring_auth
+        ):
+            proxy_base_url = self.get_assets_proxy_base_url()
+            return {path: f"{proxy_base_url}/{path}" for path in paths}
+
+        folder = self.extract_folder_path
+        cache_key = "openedxscorm.asset_urls." + hashlib.sha1(folder.encode()).hexdigest()
+        urls = cache.get(cache_key) or {}
+        missing = paths - set(urls)
+        if missing:
+            urls.update(
+                {path: self.storage.url(os.path.join(folder, path)) for path in missing}
+            )
+            cache.set(cache_key, urls, self.get_asset_urls_cache_timeout())
+        return urls
+
+    def get_asset_urls_cache_timeout(self):
+        """
+        Presigned urls must be renewed well before they expire.
+        """
+        timeout = self.xblock_settings.get("ASSET_URLS_CACHE_TIMEOUT", 3600)
+        expires_in = self.xblock_settings.get("S3_EXPIRES_IN")
+        if expires_in:
+            timeout = min(timeout, expires_in // 2)
+        return timeout
 
     def sanitize_input(self, input_str):
         """Removes script tags from string"""
@@ -738,49 +1946,43 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         )
         return sanitized_str
 
-    def find_titles_recursively(self, item, prefix, root):
-        """Recursively iterate through the organization tags and extract the title and resources
+    def find_titles_recursively(self, item, parsed_manifest):
+        """Recursively iterate through the organization items and extract the title and resources
 
         Args:
-            item (XMLTag): The current node to iterate on
-            prefix (string): namespace to match with in the xml file
-            root (XMLTag): root of the imsmanifest.xml file
+            item (manifest.Item): The current item to iterate on
+            parsed_manifest (manifest.Manifest): parsed imsmanifest.xml file, in which
+                resources are looked up by identifier
 
         Returns:
-            List: Nested list of all the title tags and their resources
+            List: Nested list of all the title tags and the relative hrefs of their
+            resources
         """
-        children = item.findall(f"{prefix}item")
-        item_title = item.find(f"{prefix}title").text
         # Sanitizing every title tag to protect against XSS attacks
-        sanitized_title = self.sanitize_input(item_title)
-        item_identifier = item.get("identifierref")
+        sanitized_title = self.sanitize_input(item.title or "")
+        resource_href = None
+        if item.identifierref:
+            resource_href = parsed_manifest.get_resource_href(item.identifierref)
         # If item does not have a resource, we don't need to make it into a link
-        if not item_identifier:
-            resource_link = "#"
-        else:
-            resource = root.find(
-                f"{prefix}resources/{prefix}resource[@identifier='{item_identifier}']"
-            )
-            # Attach the storage path with the file path
-            resource_link = urllib.parse.unquote(
-                self.storage.url(
-                    os.path.join(self.extract_folder_path, resource.get("href"))
-                )
-            )
-        if not children:
+        resource_link = "#" if resource_href is None else resource_href
+        if not item.children:
             return [(sanitized_title, resource_link)]
         child_titles = []
-        for child in children:
-            if "isvisible" in child.attrib and child.attrib["isvisible"] == "true":
-                child_titles.extend(self.find_titles_recursively(child, prefix, root))
+        for child in item.children:
+            if child.is_visible:
+                child_titles.extend(
+                    self.find_titles_recursively(child, parsed_manifest)
+                )
         return [(sanitized_title, resource_link), child_titles]
 
-    def recursive_unorderedlist(self, value):
+    def recursive_unorderedlist(self, value, urls=None):
         """Create an HTML unordered list recursively to display navigation menu
 
         Args:
             value (list): The nested list to create the unordered list
+            urls (dict): urls of the resources, keyed by relative href
         """
+        urls = urls or {}
 
         def has_children(item):
             return len(item) == 2 and (type(item[0]) is tuple and type(item[1]) is list)
@@ -790,7 +1992,7 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             indent = "\t" * tabs
             # If leaf node, return the li tag
             if type(items) is tuple:
-                title, resource_url = items[0], items[1]
+                title, resource_url = items[0], urls.get(items[1], items[1])
                 if resource_url != "#":
                     return f"{indent}<li href='{resource_url}' class='navigation-title'>{title}</li>"
 
@@ -800,7 +2002,7 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
             # If parent node, create another nested unordered list and return
             if has_children(items):
                 parent, children = items[0], items[1]
-                title, resource_url = parent[0], parent[1]
+                title, resource_url = parent[0], urls.get(parent[1], parent[1])
                 for child in children:
                     output.append(format(child, tabs + 1))
                 if resource_url != "#":
@@ -831,8 +2033,33 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         return "\n".join(unordered_lists)
 
     def find_relative_file_path(self, filename):
+        package_paths = self.get_package_paths()
+        if package_paths is not None:
+            # Pick the least deeply nested file, like the storage search below
+            path = fileindex.find_by_name(package_paths, filename)
+            if path is None:
+                raise ScormError(f"Invalid package: could not find '{filename}' file")
+            return path
         return os.path.relpath(self.find_file_path(filename), self.extract_folder_path)
 
+    def get_package_paths(self):
+        """
+        Return the relative paths of the files of the package, as listed in the zip
+        index at upload time, or None if they were not recorded.
+        """
+        package_index = self.get_package_index()
+        if "members" in package_index:
+            return package_index["members"].keys()
+        if "files" in package_index:
+            return package_index["files"].keys()
+        return None
+
+    def get_package_index(self):
+        """
+        Return the index of the files of the package. See `indexstore`.
+        """
+        return indexstore.load_index(self.package_meta)
+
     def find_file_path(self, filename):
         """
         Search recursively in the extracted folder for a given file. Path of the first
@@ -870,15 +2097,26 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         """
         Get file hex digest (fingerprint).
         """
-        block_size = 8 * 1024
+        return ScormXBlock.get_sha1_and_size(file_descriptor)[0]
+
+    @staticmethod
+    def get_sha1_and_size(file_descriptor):
+        """
+        Get file hex digest (fingerprint) and size, in a single pass over the file.
+        """
+        file_descriptor.seek(0)
         sha1 = hashlib.sha1()
+        size = 0
+        block = bytearray(HASH_BLOCK_SIZE)
+        view = memoryview(block)
         while True:
-            block = file_descriptor.read(block_size)
-            if not block:
+            length = file_descriptor.readinto(block)
+            if not length:
                 break
-            sha1.update(block)
+            sha1.update(view[:length])
+            size += length
         file_descriptor.seek(0)
-        return sha1.hexdigest()
+        return sha1.hexdigest(), size
 
     def student_view_data(self):
         """
@@ -1012,18 +2250,5 @@ class ScormXBlock(XBlock, CompletableXBlockMixin):
         return settings_service.get_settings_bucket(self)
 
 
-def is_dir(zipinfo):
-    """Return True if this archive member is a directory."""
-    if zipinfo.filename.endswith('/'):
-        return True
-    elif zipinfo.filename.endswith((os.path.sep, OS_PATH_ALT_SEP)):
-        # The ZIP format specification requires to use forward slashes
-        # as the directory separator, but in practice some ZIP files
-        # created on Windows can use backward slashes.  For compatibility
-        # with the extraction code which already handles this:
-        return True
-    return False 
-
-
 class ScormError(Exception):
     pass
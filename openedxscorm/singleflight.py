@@ -0,0 +1,161 @@
+"""
+Coalescing of concurrent `assets_proxy` fetches of the same asset.
+
+When many learners start the same SCORM unit at once, the same assets are requested
+from the storage backend concurrently by many workers. With single-flight fetching,
+the first request for a given key (the "leader") fetches the asset while concurrent
+requests for the same key wait for its result, instead of hitting the storage backend
+themselves. Only small assets are shared in this way, since they must be read in
+memory; followers of larger assets fetch them on their own.
+
+Fetches are always coalesced within a process. Optionally, they can also be coalesced
+across processes with a lock in the Django cache, in which case the leader stores the
+fetched asset in the Django cache for the other processes to pick up.
+"""
+
+import hashlib
+import io
+import threading
+import time
+
+from django.core.cache import cache
+
+from .proxy import UpstreamResponse
+
+CACHE_KEY_PREFIX = "openedxscorm.singleflight"
+# Memcached does not store values larger than 1 MiB by default
+DEFAULT_MAX_SIZE = 1000 * 1000
+DEFAULT_WAIT_TIMEOUT = 10
+# Time during which a result shared across processes remains available
+SHARED_RESULT_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+class SharedResult:
+    """
+    Fully read upstream response that can be handed to many requests.
+    """
+
+    def __init__(self, status, headers, content):
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+    @classmethod
+    def read(cls, upstream):
+        try:
+            content = upstream.body.read()
+        finally:
+            upstream.close()
+        return cls(upstream.status, dict(upstream.headers.items()), content)
+
+    def to_upstream(self):
+        return UpstreamResponse(self.status, self.headers, io.BytesIO(self.content))
+
+
+class Call:
+    """
+    In-flight fetch, on which concurrent requests for the same key wait.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def get_key(*parts):
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def is_shareable(upstream, max_size):
+    content_length = upstream.headers.get("Content-Length")
+    return (
+        upstream.body is not None
+        and upstream.status < 300
+        and content_length is not None
+        and int(content_length) <= max_size
+    )
+
+
+def fetch(
+    key,
+    fetch_func,
+    max_size=DEFAULT_MAX_SIZE,
+    wait_timeout=DEFAULT_WAIT_TIMEOUT,
+    cross_process=False,
+):
+    """
+    Call `fetch_func` to get an `UpstreamResponse`, unless the same key is already
+    being fetched, in which case the result of the in-flight fetch is returned.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _calls[key] = Call()
+
+    if not is_leader:
+        call.done.wait(wait_timeout)
+        if call.result is not None:
+            return call.result.to_upstream()
+        # The leader failed, timed out or fetched an asset that is too large
+        return fetch_func()
+
+    try:
+        if cross_process:
+            call.result, upstream = fetch_across_processes(
+                key, fetch_func, max_size, wait_timeout
+            )
+        else:
+            upstream = fetch_func()
+            if is_shareable(upstream, max_size):
+                call.result = SharedResult.read(upstream)
+        return call.result.to_upstream() if call.result is not None else upstream
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+def fetch_across_processes(key, fetch_func, max_size, wait_timeout):
+    """
+    Coalesce fetches across processes with a lock in the Django cache.
+
+    Return a (SharedResult, UpstreamResponse) tuple, where only one of the two
+    values is not None.
+    """
+    lock_key = f"{CACHE_KEY_PREFIX}.lock.{key}"
+    result_key = f"{CACHE_KEY_PREFIX}.result.{key}"
+
+    shared = cache.get(result_key)
+    if shared is not None:
+        return SharedResult(*shared), None
+
+    if cache.add(lock_key, 1, wait_timeout):
+        try:
+            upstream = fetch_func()
+            if not is_shareable(upstream, max_size):
+                return None, upstream
+            result = SharedResult.read(upstream)
+            cache.set(
+                result_key,
+                (result.status, result.headers, result.content),
+                SHARED_RESULT_TIMEOUT,
+            )
+            return result, None
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        shared = cache.get(result_key)
+        if shared is not None:
+            return SharedResult(*shared), None
+        if cache.get(lock_key) is None or time.monotonic() >= deadline:
+            # The other process is done, but did not share its result
+            break
+        time.sleep(POLL_INTERVAL)
+    return None, fetch_func()
@@ -162,6 +162,88 @@ function ScormXBlock(runtime, element, settings) {
         });
     }
 
+    // Table of contents
+    // Items are rendered when their parent is expanded, and long lists of items are
+    // appended in batches, such that large manifests do not block the page.
+    var tocBatchSize = 200;
+    function initTableOfContents() {
+        var menu = $(element).find(".navigation-pane .navigation-menu");
+        if (menu.length === 0) {
+            return;
+        }
+        var url = runtime.handlerUrl(element, 'table_of_contents');
+        url += (url.indexOf("?") === -1 ? "?" : "&") + "v=" + encodeURIComponent(settings.table_of_contents_version);
+        $.ajax({
+            url: url,
+            dataType: "json",
+            cache: true
+        }).success(function (toc) {
+            if (typeof toc.html !== "undefined") {
+                // Menu of packages that were saved before the table of contents
+                menu.html(toc.html);
+                return;
+            }
+            renderTocNodes(menu, toc.organizations, 0, function (item, node) {
+                // Organizations are expanded
+                expandTocNode(item, node);
+            });
+        });
+        $(element).on("click", ".navigation-toggle", function () {
+            var item = $(this).closest(".navigation-item");
+            if (item.hasClass("navigation-expanded")) {
+                item.removeClass("navigation-expanded");
+                item.children(".navigation-children").hide();
+                $(this).attr("aria-expanded", "false");
+            } else {
+                expandTocNode(item, item.data("node"));
+            }
+        });
+    }
+    function renderTocNodes(list, nodes, start, onRender) {
+        var end = Math.min(start + tocBatchSize, nodes.length);
+        for (var i = start; i < end; i += 1) {
+            var item = renderTocNode(nodes[i]);
+            list.append(item);
+            if (onRender) {
+                onRender(item, nodes[i]);
+            }
+        }
+        if (end < nodes.length) {
+            window.requestAnimationFrame(function () {
+                renderTocNodes(list, nodes, end, onRender);
+            });
+        }
+    }
+    function renderTocNode(node) {
+        // node is [title, url, children]
+        var item = $("<li>").addClass("navigation-item");
+        if (node[2].length > 0) {
+            item.data("node", node);
+            item.append($("<button>").addClass("navigation-toggle").attr("aria-expanded", "false"));
+        }
+        var title = $("<span>").text(node[0]);
+        if (node[1] !== null) {
+            title.addClass("navigation-title").attr("href", node[1]);
+        } else {
+            title.addClass("navigation-title-header");
+        }
+        return item.append(title);
+    }
+    function expandTocNode(item, node) {
+        if (!node || node[2].length === 0) {
+            return;
+        }
+        var children = item.children(".navigation-children");
+        if (children.length === 0) {
+            children = $("<ul>").addClass("navigation-children");
+            item.append(children);
+            renderTocNodes(children, node[2], 0);
+        }
+        children.show();
+        item.addClass("navigation-expanded");
+        item.children(".navigation-toggle").attr("aria-expanded", "true");
+    }
+
     // Flag to verify if navigation menu was used to change page
     var navigationClick = false;
         $(element).on("click",".navigation-title", function () {
@@ -269,5 +351,6 @@ function ScormXBlock(runtime, element, settings) {
         initFullscreen();
         initPopupWindow();
         initReports();
+        initTableOfContents();
     });
 }
@@ -1,5 +1,218 @@
 function ScormStudioXBlock(runtime, element, context) {
   var handlerUrl = runtime.handlerUrl(element, "studio_submit");
+  var jobStatusUrl = runtime.handlerUrl(element, "package_job_status");
+  var jobPollInterval = 1000;
+  var startUploadUrl = runtime.handlerUrl(element, "start_package_upload");
+  var completeUploadUrl = runtime.handlerUrl(element, "complete_package_upload");
+  var uploadConcurrency = 4;
+  var uploadRetries = 3;
+
+  function notifyErrors(errors) {
+    errors.forEach(function (error) {
+      runtime.notify("error", {
+        message: error,
+        title: "Scorm component save error",
+      });
+    });
+  }
+
+  function showJobProgress(message) {
+    $(element).find(".package-job-progress").text(message);
+  }
+
+  // Poll the progress of the asynchronous processing of an uploaded package. The
+  // results of the processing are saved to the block once it is done.
+  function pollPackageJob(onDone) {
+    $.ajax({
+      url: jobStatusUrl,
+      dataType: "json",
+      cache: false,
+      data: "{}",
+      type: "POST",
+      success: function (job) {
+        if (job.status === "done") {
+          showJobProgress("");
+          onDone();
+        } else if (job.status === "failed") {
+          showJobProgress("");
+          notifyErrors(job.errors);
+        } else if (job.status) {
+          var percent = job.bytes_total
+            ? Math.floor((100 * job.bytes_done) / job.bytes_total)
+            : 0;
+          showJobProgress(
+            "Processing package: " +
+              job.files_done +
+              "/" +
+              job.files_total +
+              " files (" +
+              percent +
+              "%)"
+          );
+          setTimeout(function () {
+            pollPackageJob(onDone);
+          }, jobPollInterval);
+        }
+      },
+      error: function () {
+        setTimeout(function () {
+          pollPackageJob(onDone);
+        }, jobPollInterval);
+      },
+    });
+  }
+
+  function postJson(url, data) {
+    return $.ajax({
+      url: url,
+      dataType: "json",
+      cache: false,
+      data: JSON.stringify(data),
+      type: "POST",
+    });
+  }
+
+  function getErrorMessage(xhr, defaultMessage) {
+    return (xhr.responseJSON && xhr.responseJSON.error) || defaultMessage;
+  }
+
+  // Upload a package in parts, a few at a time, and return a promise of the upload
+  // id. Failed parts are retried, and interrupted uploads are resumed the next time
+  // the same file is saved.
+  function uploadPackage(file) {
+    var deferred = $.Deferred();
+    var storageKey = [
+      "scorm-upload",
+      startUploadUrl,
+      file.name,
+      file.size,
+      file.lastModified,
+    ].join(":");
+    postJson(startUploadUrl, {
+      name: file.name,
+      size: file.size,
+      upload_id: window.localStorage.getItem(storageKey),
+    })
+      .done(function (upload) {
+        window.localStorage.setItem(storageKey, upload.upload_id);
+        var partNumbers = Object.keys(upload.parts);
+        var partsDone = upload.part_count - partNumbers.length;
+        var running = 0;
+        var failed = false;
+
+        function showProgress() {
+          showJobProgress(
+            "Uploading package: " +
+              Math.floor((100 * partsDone) / upload.part_count) +
+              "%"
+          );
+        }
+
+        function uploadNextPart() {
+          if (failed) {
+            return;
+          }
+          if (!partNumbers.length) {
+            if (running === 0) {
+              completeUpload();
+            }
+            return;
+          }
+          var partNumber = parseInt(partNumbers.shift(), 10);
+          running++;
+          uploadPart(partNumber, 0);
+        }
+
+        function uploadPart(partNumber, attempt) {
+          var start = (partNumber - 1) * upload.part_size;
+          $.ajax({
+            url: upload.parts[partNumber],
+            data: file.slice(start, start + upload.part_size),
+            processData: false,
+            contentType: false,
+            type: "PUT",
+          })
+            .done(function () {
+              running--;
+              partsDone++;
+              showProgress();
+              uploadNextPart();
+            })
+            .fail(function () {
+              if (attempt < uploadRetries) {
+                setTimeout(function () {
+                  uploadPart(partNumber, attempt + 1);
+                }, 1000 * Math.pow(2, attempt));
+              } else {
+                failed = true;
+                showJobProgress("");
+                deferred.reject([
+                  "The package could not be uploaded. Save again to resume the upload.",
+                ]);
+              }
+            });
+        }
+
+        function completeUpload() {
+          postJson(completeUploadUrl, { upload_id: upload.upload_id })
+            .done(function () {
+              window.localStorage.removeItem(storageKey);
+              showJobProgress("");
+              deferred.resolve(upload.upload_id);
+            })
+            .fail(function (xhr) {
+              showJobProgress("");
+              deferred.reject([
+                getErrorMessage(xhr, "The package upload could not be completed."),
+              ]);
+            });
+        }
+
+        showProgress();
+        if (!partNumbers.length) {
+          completeUpload();
+        }
+        for (var i = 0; i < uploadConcurrency && partNumbers.length; i++) {
+          uploadNextPart();
+        }
+      })
+      .fail(function (xhr) {
+        deferred.reject([
+          getErrorMessage(xhr, "The package upload could not be started."),
+        ]);
+      });
+    return deferred.promise();
+  }
+
+  function submitForm(form_data) {
+    $.ajax({
+      url: handlerUrl,
+      dataType: "json",
+      cache: false,
+      contentType: false,
+      processData: false,
+      data: form_data,
+      type: "POST",
+      complete: function () {
+        $(this).removeClass("disabled");
+      },
+      success: function (response) {
+        if (response.errors.length > 0) {
+          notifyErrors(response.errors);
+        } else if (response.job_id) {
+          pollPackageJob(function () {
+            runtime.notify("save", {
+              state: "end",
+            });
+          });
+        } else {
+          runtime.notify("save", {
+            state: "end",
+          });
+        }
+      },
+    });
+  }
 
   $(element)
     .find(".save-button")
@@ -47,34 +260,27 @@ function ScormStudioXBlock(runtime, element, context) {
       });
 
       $(this).addClass("disabled");
-      $.ajax({
-        url: handlerUrl,
-        dataType: "json",
-        cache: false,
-        contentType: false,
-        processData: false,
-        data: form_data,
-        type: "POST",
-        complete: function () {
-          $(this).removeClass("disabled");
-        },
-        success: function (response) {
-          if (response.errors.length > 0) {
-            response.errors.forEach(function (error) {
-              runtime.notify("error", {
-                message: error,
-                title: "Scorm component save error",
-              });
-            });
-          } else {
-            runtime.notify("save", {
-              state: "end",
-            });
-          }
-        },
-      });
+      if (context.chunked_upload && file_data && !form_data.get("scorm_s3_path")) {
+        // Large packages do not go through a single request
+        uploadPackage(file_data)
+          .done(function (upload_id) {
+            form_data.delete("file");
+            form_data.append("upload_id", upload_id);
+            submitForm(form_data);
+          })
+          .fail(notifyErrors);
+      } else {
+        submitForm(form_data);
+      }
     });
 
+  if (context.package_job_id) {
+    // A package is still being processed since the last upload
+    pollPackageJob(function () {
+      showJobProgress("The package was processed.");
+    });
+  }
+
   $(element)
     .find(".cancel-button")
     .bind("click", function () {
@@ -2,10 +2,26 @@
 Storage backend for scorm metadata export.
 """
 
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.s3.transfer import TransferConfig
 from django.conf import settings
 
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+
+# Files larger than this are uploaded in parts of the same size with multipart uploads
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CONCURRENCY = 4
+# Maximum number of keys of a single DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+DEFAULT_DELETE_WORKERS = 8
+
+logger = logging.getLogger(__name__)
 
 
 class S3ScormStorage(S3Boto3Storage):
@@ -14,7 +30,12 @@ class S3ScormStorage(S3Boto3Storage):
     """
 
     def __init__(
-        self, xblock, bucket_name=None, querystring_auth=None, querystring_expire=None
+        self,
+        xblock,
+        bucket_name=None,
+        querystring_auth=None,
+        querystring_expire=None,
+        transfer_config=None,
     ):
         self.xblock = xblock
         # No need to serve assets from a custom domain.
@@ -23,6 +44,7 @@ class S3ScormStorage(S3Boto3Storage):
             bucket_name=bucket_name,
             querystring_auth=querystring_auth,
             querystring_expire=querystring_expire,
+            transfer_config=transfer_config,
         )
 
     def url(self, name, parameters=None, expire=None):
@@ -37,9 +59,7 @@ class S3ScormStorage(S3Boto3Storage):
             # Proxy assets serving through the `assets_proxy` view. This case should
             # only ever happen when we attempt to serve the index page from the
             # index_page_url method.
-            proxy_base_url = self.xblock.runtime.handler_url(
-                self.xblock, "assets_proxy"
-            ).rstrip("?/")
+            proxy_base_url = self.xblock.get_assets_proxy_base_url()
             # Note that we serve the index page here.
             return f"{proxy_base_url}/{self.xblock.index_page_path}"
 
@@ -50,6 +70,162 @@ class S3ScormStorage(S3Boto3Storage):
             expire=expire,
         )
 
+    def object_url(self, name, parameters=None, expire=None):
+        """
+        Return the url of a stored file, without any of the path rewriting of `url`.
+        """
+        return super().url(name, parameters=parameters, expire=expire)
+
+    def copy(self, source, name):
+        """
+        Copy a stored file to another name within the bucket, without downloading it.
+        Large files are copied in parts. The metadata of the source object, such as its
+        content type, is preserved, but its ACL is not, so it is set again.
+        """
+        acl = self.get_object_parameters(name).get("ACL", self.default_acl)
+        self.connection.meta.client.copy(
+            {
+                "Bucket": self.bucket_name,
+                "Key": self._normalize_name(clean_name(source)),
+            },
+            self.bucket_name,
+            self._normalize_name(clean_name(name)),
+            ExtraArgs={"ACL": acl} if acl else None,
+            Config=self.transfer_config,
+        )
+        return clean_name(name)
+
+    def bulk_delete(self, root, keep=None, workers=DEFAULT_DELETE_WORKERS):
+        """
+        Delete all the objects below a folder, except for the `keep` object or the
+        objects below the `keep` subfolder. Objects are listed with paginated ListObjectsV2 requests, and deleted
+        with concurrent DeleteObjects requests of up to 1000 keys each, while listing
+        goes on. Return the number of deleted objects.
+        """
+        client = self.connection.meta.client
+        prefix = self._normalize_name(clean_name(root)).rstrip("/") + "/"
+        keep_key = self._normalize_name(clean_name(keep)).rstrip("/") if keep else None
+
+        def iter_batches():
+            batch = []
+            paginator = client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    if keep_key and (
+                        obj["Key"] == keep_key or obj["Key"].startswith(keep_key + "/")
+                    ):
+                        continue
+                    batch.append({"Key": obj["Key"]})
+                    if len(batch) == DELETE_BATCH_SIZE:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+
+        def delete_batch(batch):
+            response = client.delete_objects(
+                Bucket=self.bucket_name, Delete={"Objects": batch, "Quiet": True}
+            )
+            errors = response.get("Errors", [])
+            if errors:
+                raise OSError(
+                    f"Could not delete {len(errors)} objects, such as "
+                    f"{errors[0]['Key']}: {errors[0].get('Message')}"
+                )
+            return len(batch)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="scorm-delete"
+        ) as executor:
+            return sum(executor.map(delete_batch, iter_batches()))
+
+    def create_multipart_upload(self, name):
+        """
+        Start a multipart upload of a file, the parts of which are uploaded by the
+        browser with presigned urls. Return the id of the multipart upload.
+        """
+        params = self._get_write_parameters(self._normalize_name(clean_name(name)))
+        response = self.connection.meta.client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=self._normalize_name(clean_name(name)), **params
+        )
+        return response["UploadId"]
+
+    def get_upload_part_url(self, name, upload_id, part_number, expire):
+        return self.connection.meta.client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket_name,
+                "Key": self._normalize_name(clean_name(name)),
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expire,
+        )
+
+    def list_upload_parts(self, name, upload_id):
+        """
+        Return the ETags of the parts of a multipart upload that were uploaded so far,
+        keyed by part number.
+        """
+        paginator = self.connection.meta.client.get_paginator("list_parts")
+        return {
+            part["PartNumber"]: part["ETag"]
+            for page in paginator.paginate(
+                Bucket=self.bucket_name,
+                Key=self._normalize_name(clean_name(name)),
+                UploadId=upload_id,
+            )
+            for part in page.get("Parts", [])
+        }
+
+    def complete_multipart_upload(self, name, upload_id, etags):
+        self.connection.meta.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self._normalize_name(clean_name(name)),
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": etag}
+                    for number, etag in sorted(etags.items())
+                ]
+            },
+        )
+
+    def list_multipart_uploads(self, folder):
+        """
+        Return the (name, upload id, initiation date) of the multipart uploads that are
+        in progress below a folder.
+        """
+        prefix = self._normalize_name(clean_name(folder)).rstrip("/") + "/"
+        paginator = self.connection.meta.client.get_paginator("list_multipart_uploads")
+        return [
+            (
+                os.path.join(folder, upload["Key"][len(prefix) :]),
+                upload["UploadId"],
+                upload["Initiated"],
+            )
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+            for upload in page.get("Uploads", [])
+        ]
+
+    def abort_multipart_upload(self, name, upload_id):
+        self.connection.meta.client.abort_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self._normalize_name(clean_name(name)),
+            UploadId=upload_id,
+        )
+
+    def get_object(self, name, **params):
+        """
+        Return the raw boto3 `GetObject` response of a stored file. The additional
+        parameters, such as `Range`, are passed to `GetObject` as-is.
+        """
+        return self.connection.meta.client.get_object(
+            Bucket=self.bucket_name,
+            Key=self._normalize_name(clean_name(name)),
+            **params,
+        )
+
 
 def s3(xblock):
     """
@@ -76,4 +252,71 @@ def s3(xblock):
         bucket_name=bucket_name,
         querystring_auth=querystring_auth,
         querystring_expire=querystring_expire,
+        transfer_config=get_transfer_config(xblock.xblock_settings),
     )
+
+
+def get_transfer_config(xblock_settings):
+    """
+    Return the configuration of the uploads of large files. Parts are read from the
+    uploaded file as they are sent, and at most `S3_MULTIPART_CONCURRENCY` parts are
+    held in memory at a time.
+    """
+    chunksize = xblock_settings.get(
+        "S3_MULTIPART_CHUNKSIZE", DEFAULT_MULTIPART_CHUNKSIZE
+    )
+    concurrency = xblock_settings.get(
+        "S3_MULTIPART_CONCURRENCY", DEFAULT_MULTIPART_CONCURRENCY
+    )
+    transfer_config = TransferConfig(
+        multipart_threshold=chunksize,
+        multipart_chunksize=chunksize,
+        max_concurrency=concurrency,
+    )
+    # This is not an argument of the boto3 TransferConfig, but it is supported by the
+    # underlying s3transfer configuration. It defaults to 10 parts.
+    transfer_config.max_in_memory_upload_chunks = concurrency
+    return transfer_config
+
+
+def delete_folder(storage, root, keep=None, workers=DEFAULT_DELETE_WORKERS):
+    """
+    Recursively delete the contents of a folder of a storage backend, except for the
+    `keep` file or the contents of the `keep` subfolder. Unfortunately, this will not delete empty folders,
+    as the default FileSystemStorage implementation does not allow it.
+
+    S3 storages delete objects in batches. With other storages, files are deleted one
+    by one, by a pool of threads. Return the number of deleted files.
+    """
+    start = time.monotonic()
+    if hasattr(storage, "bulk_delete"):
+        count = storage.bulk_delete(root, keep=keep, workers=workers)
+    else:
+        names = list(iter_folder_files(storage, root, keep=keep))
+        with ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="scorm-delete"
+        ) as executor:
+            # Consume the results to raise the first error
+            for _ in executor.map(storage.delete, names):
+                pass
+        count = len(names)
+    logger.info(
+        "Deleted %d files from %s in %.2fs", count, root, time.monotonic() - start
+    )
+    return count
+
+
+def iter_folder_files(storage, root, keep=None):
+    """
+    Yield the names of all the files below a folder, except for the `keep` file and
+    the files below the `keep` subfolder.
+    """
+    directories, files = storage.listdir(root)
+    for directory in directories:
+        path = os.path.join(root, directory)
+        if path != keep:
+            yield from iter_folder_files(storage, path, keep=keep)
+    for f in files:
+        path = os.path.join(root, f)
+        if path != keep:
+            yield path
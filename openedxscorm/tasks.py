@@ -0,0 +1,23 @@
+"""
+Celery tasks, which are only defined when Celery is installed.
+"""
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+
+if shared_task is not None:
+
+    @shared_task(name="openedxscorm.tasks.process_package")
+    def process_package(job_id, usage_id, staged_path, package_name):
+        """
+        Process a package that was staged in the storage backend of the xblock.
+        """
+        # These modules are only available in the Open edX platform
+        from opaque_keys.edx.keys import UsageKey
+        from xmodule.modulestore.django import modulestore
+
+        block = modulestore().get_item(UsageKey.from_string(usage_id))
+        block.run_staged_package_job(job_id, staged_path, package_name)
@@ -0,0 +1,80 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.cache import cache
+
+from openedxscorm import access
+
+COURSE_KEY = "course-v1:Org+Course+Run"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    access.clear_local_cache()
+    yield
+    cache.clear()
+    access.clear_local_cache()
+
+
+@pytest.fixture
+def mock_course_enrollment():
+    with patch("openedxscorm.access.CourseEnrollment") as mock_enrollment:
+        mock_enrollment.is_enrolled.return_value = True
+        yield mock_enrollment
+
+
+def test_is_enrolled_cached(mock_course_enrollment):
+    """
+    Test is_enrolled only queries the database once per user and course.
+    """
+    user = Mock(id=1)
+    assert access.is_enrolled(user, COURSE_KEY)
+    assert access.is_enrolled(user, COURSE_KEY)
+    mock_course_enrollment.is_enrolled.assert_called_once_with(user, COURSE_KEY)
+
+
+def test_is_enrolled_shared_cache(mock_course_enrollment):
+    """
+    Test is_enrolled reads from the Django cache when the local tier is empty.
+    """
+    user = Mock(id=1)
+    assert access.is_enrolled(user, COURSE_KEY)
+    access.clear_local_cache()
+    assert access.is_enrolled(user, COURSE_KEY)
+    mock_course_enrollment.is_enrolled.assert_called_once()
+
+
+def test_is_enrolled_not_enrolled(mock_course_enrollment):
+    """
+    Test is_enrolled caches negative results too.
+    """
+    mock_course_enrollment.is_enrolled.return_value = False
+    user = Mock(id=1)
+    assert not access.is_enrolled(user, COURSE_KEY)
+    assert not access.is_enrolled(user, COURSE_KEY)
+    mock_course_enrollment.is_enrolled.assert_called_once()
+
+
+def test_is_enrolled_cache_disabled(mock_course_enrollment):
+    """
+    Test is_enrolled always queries the database when both tiers are disabled.
+    """
+    user = Mock(id=1)
+    access.is_enrolled(user, COURSE_KEY, timeout=0, local_timeout=0)
+    access.is_enrolled(user, COURSE_KEY, timeout=0, local_timeout=0)
+    assert mock_course_enrollment.is_enrolled.call_count == 2
+
+
+def test_invalidate_enrollment(mock_course_enrollment):
+    """
+    Test invalidate_enrollment clears both tiers.
+    """
+    user = Mock(id=1)
+    assert access.is_enrolled(user, COURSE_KEY)
+    mock_course_enrollment.is_enrolled.return_value = False
+    access.on_enrollment_changed(
+        sender=None, instance=Mock(user_id=1, course_id=COURSE_KEY)
+    )
+    assert not access.is_enrolled(user, COURSE_KEY)
+    assert mock_course_enrollment.is_enrolled.call_count == 2
@@ -0,0 +1,158 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from openedxscorm import archive
+
+
+@pytest.fixture
+def package():
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as package_zipfile:
+        package_zipfile.writestr("readme.txt", b"outside the package root")
+        package_zipfile.writestr("course/imsmanifest.xml", b"<manifest/>")
+        package_zipfile.writestr("course/media/", b"")
+        package_zipfile.writestr(
+            "course/media/video.mp4", os.urandom(5000), zipfile.ZIP_STORED
+        )
+        package_zipfile.writestr(
+            "course/js/app.js", b"var x = 1;\n" * 20000, zipfile.ZIP_DEFLATED
+        )
+    return content
+
+
+def get_index(package):
+    with zipfile.ZipFile(package) as package_zipfile:
+        return archive.build_index(package_zipfile, "course")
+
+
+def read_member(package, path):
+    with zipfile.ZipFile(package) as package_zipfile:
+        return package_zipfile.read(f"course/{path}")
+
+
+def get_app_iter(package, member, chunk_size=1024):
+    data = package.getvalue()
+    return archive.MemberAppIter(
+        lambda start, stop: io.BytesIO(data[start:stop]), member, chunk_size
+    )
+
+
+def test_find_root_path(package):
+    """
+    Test the package root is the folder of the top-most imsmanifest.xml file.
+    """
+    with zipfile.ZipFile(package) as package_zipfile:
+        assert archive.find_root_path(package_zipfile.infolist()) == "course"
+        assert archive.find_root_path(package_zipfile.infolist()[:1]) is None
+
+
+def test_build_index(package):
+    """
+    Test only the files below the package root are indexed, with their attributes.
+    """
+    index = get_index(package)
+    assert sorted(index) == ["imsmanifest.xml", "js/app.js", "media/video.mp4"]
+    video = index["media/video.mp4"]
+    assert video[archive.COMPRESS_TYPE] == zipfile.ZIP_STORED
+    assert video[archive.FILE_SIZE] == 5000
+    assert (
+        package.getvalue()[
+            video[archive.DATA_OFFSET] : video[archive.DATA_OFFSET] + 5000
+        ]
+        == read_member(package, "media/video.mp4")
+    )
+    assert index["js/app.js"][archive.COMPRESS_TYPE] == zipfile.ZIP_DEFLATED
+    assert index["js/app.js"][archive.COMPRESS_SIZE] < 220000
+
+
+def test_build_index_unsupported_compression():
+    """
+    Test members that cannot be served with a ranged read are rejected.
+    """
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as package_zipfile:
+        package_zipfile.writestr("imsmanifest.xml", b"<manifest/>", zipfile.ZIP_BZIP2)
+    with zipfile.ZipFile(content) as package_zipfile:
+        with pytest.raises(archive.ArchiveError):
+            archive.build_index(package_zipfile, "")
+
+
+@pytest.mark.parametrize("path", ["media/video.mp4", "js/app.js"])
+def test_member_app_iter(package, path):
+    """
+    Test stored and deflated members are served in bounded chunks.
+    """
+    member = get_index(package)[path]
+    chunks = list(get_app_iter(package, member))
+    assert b"".join(chunks) == read_member(package, path)
+    assert max(len(chunk) for chunk in chunks) <= 1024
+
+
+@pytest.mark.parametrize("path", ["media/video.mp4", "js/app.js"])
+@pytest.mark.parametrize("start,stop", [(0, 10), (1000, 4097), (4990, None)])
+def test_member_app_iter_range(package, path, start, stop):
+    """
+    Test byte ranges of stored and deflated members.
+    """
+    member = get_index(package)[path]
+    app_iter = get_app_iter(package, member)
+    content = b"".join(app_iter.app_iter_range(start, stop))
+    assert content == read_member(package, path)[start:stop]
+
+
+def test_member_app_iter_stored_range_reads(package):
+    """
+    Test ranges of stored members only read the requested bytes of the archive.
+    """
+    member = get_index(package)["media/video.mp4"]
+    data = package.getvalue()
+    ranges = []
+
+    def open_range(start, stop):
+        ranges.append((start, stop))
+        return io.BytesIO(data[start:stop])
+
+    app_iter = archive.MemberAppIter(open_range, member)
+    assert len(b"".join(app_iter.app_iter_range(100, 200))) == 100
+    offset = member[archive.DATA_OFFSET]
+    assert ranges == [(offset + 100, offset + 200)]
+
+
+def test_member_app_iter_is_lazy(package):
+    """
+    Test the archive is only read once the body is iterated on.
+    """
+    member = get_index(package)["media/video.mp4"]
+
+    def open_range(start, stop):
+        raise AssertionError("The archive should not be read")
+
+    archive.MemberAppIter(open_range, member).app_iter_range(0, 10)
+
+
+def test_limited_reader():
+    """
+    Test reads never go past the limit.
+    """
+    reader = archive.LimitedReader(io.BytesIO(b"0123456789"), 4)
+    assert reader.read(3) == b"012"
+    assert reader.read() == b"3"
+    assert reader.read(3) == b""
+
+
+def test_get_storage_mode():
+    """
+    Test invalid storage modes fall back to extraction.
+    """
+    assert archive.get_storage_mode({}) == archive.STORAGE_MODE_EXTRACT
+    assert (
+        archive.get_storage_mode({"PACKAGE_STORAGE_MODE": "archive"})
+        == archive.STORAGE_MODE_ARCHIVE
+    )
+    assert (
+        archive.get_storage_mode({"PACKAGE_STORAGE_MODE": "invalid"})
+        == archive.STORAGE_MODE_EXTRACT
+    )
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+from webob import Request
+
+from openedxscorm import diskcache
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    return diskcache.AssetDiskCache(str(tmp_path), max_size=100, max_file_size=50)
+
+
+def store(disk_cache, key, content, headers=None):
+    chunks = [content[i : i + 8] for i in range(0, len(content), 8)]
+    return b"".join(disk_cache.tee(key, headers or {}, chunks, len(content)))
+
+
+def test_tee_commits_entry(disk_cache):
+    """
+    Test tee passes chunks through and stores them with their validators.
+    """
+    content = b"0123456789" * 3
+    assert store(disk_cache, "scorm/sha1/a.js", content, {"ETag": '"etag"'}) == content
+    path, headers = disk_cache.get("scorm/sha1/a.js")
+    with open(path, "rb") as cached_file:
+        assert cached_file.read() == content
+    assert headers == {"ETag": '"etag"'}
+    assert disk_cache.stats()["hits"] == 1
+    assert disk_cache.stats()["size"] == 30
+
+
+def test_tee_interrupted(disk_cache, tmp_path):
+    """
+    Test tee does not commit partially consumed entries.
+    """
+    chunks = disk_cache.tee("scorm/sha1/a.js", {}, [b"01234567", b"89"], 10)
+    next(chunks)
+    chunks.close()
+    assert disk_cache.get("scorm/sha1/a.js") is None
+    assert disk_cache.stats()["misses"] == 1
+    assert not list(disk_cache.entries())
+    assert not [
+        name for _root, _dirs, files in os.walk(tmp_path) for name in files
+    ]
+
+
+def test_tee_truncated(disk_cache):
+    """
+    Test tee does not commit entries that are shorter than expected.
+    """
+    store_chunks = disk_cache.tee("scorm/sha1/a.js", {}, [b"01234567"], 10)
+    assert b"".join(store_chunks) == b"01234567"
+    assert disk_cache.get("scorm/sha1/a.js") is None
+
+
+def test_evict_least_recently_used(disk_cache):
+    """
+    Test evict removes least recently used entries first.
+    """
+    for index in range(3):
+        store(disk_cache, f"scorm/sha1/{index}.js", b"x" * 40)
+        path = disk_cache.get_path(f"scorm/sha1/{index}.js")
+        if os.path.exists(path):
+            os.utime(path, (index, index))
+    # The third entry exceeds the 100 bytes limit: the oldest entry is evicted
+    assert disk_cache.get("scorm/sha1/0.js") is None
+    assert disk_cache.get("scorm/sha1/1.js") is not None
+    assert disk_cache.get("scorm/sha1/2.js") is not None
+    assert disk_cache.stats()["evictions"] == 1
+    assert disk_cache.stats()["size"] == 80
+
+
+def test_cacheable(disk_cache):
+    assert disk_cache.cacheable("50")
+    assert not disk_cache.cacheable("51")
+    assert not disk_cache.cacheable(None)
+
+
+def test_get_response_range(disk_cache):
+    """
+    Test get_response serves byte ranges and conditional requests from disk.
+    """
+    store(disk_cache, "scorm/sha1/a.mp4", b"0123456789", {"ETag": '"etag"'})
+
+    response = disk_cache.get_response(
+        Request.blank("/", headers={"Range": "bytes=2-5"}), "scorm/sha1/a.mp4", "video/mp4"
+    )
+    assert response.status_code == 206
+    assert response.body == b"2345"
+    assert response.headers["Content-Range"] == "bytes 2-5/10"
+
+    response = disk_cache.get_response(
+        Request.blank("/", headers={"If-None-Match": '"etag"'}),
+        "scorm/sha1/a.mp4",
+        "video/mp4",
+    )
+    assert response.status_code == 304
+
+
+def test_get_disk_cache_disabled():
+    assert diskcache.get_disk_cache({}) is None
@@ -0,0 +1,257 @@
+import io
+import os
+import threading
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from openedxscorm import archive, extraction
+
+
+class FlakyStorage(FileSystemStorage):
+    """
+    File system storage that fails the first `failures` saves of the given names, and
+    that records the maximum number of concurrent saves. With `partial`, failed saves
+    leave a truncated file behind.
+    """
+
+    def __init__(self, failures=None, delay=0, partial=False, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.partial = partial
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def _save(self, name, content):
+        with self._lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+            failures = self.failures.get(os.path.basename(name), 0)
+            if failures:
+                self.failures[os.path.basename(name)] = failures - 1
+        try:
+            time.sleep(self.delay)
+            if failures:
+                if self.partial:
+                    super()._save(name, ContentFile(content.read(1)))
+                raise OSError(f"Could not save {name}")
+            return super()._save(name, content)
+        finally:
+            with self._lock:
+                self.concurrent -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(extraction, "RETRY_DELAY", 0)
+
+
+@pytest.fixture
+def package():
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as package_zipfile:
+        package_zipfile.writestr("imsmanifest.xml", b"<manifest/>")
+        for i in range(20):
+            package_zipfile.writestr(f"assets/{i}.txt", f"file {i}".encode())
+        package_zipfile.writestr("js/app.js", b"var x = 1;\n" * 1000)
+    return zipfile.ZipFile(content)
+
+
+def extract(storage, package, **kwargs):
+    members = list(archive.iter_package_members(package.infolist(), ""))
+    return extraction.extract_members(storage, package, members, "dest", **kwargs)
+
+
+def list_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(folder, name), root)
+        for folder, _dirs, files in os.walk(root)
+        for name in files
+    )
+
+
+def test_extract_members(tmp_path, package):
+    """
+    Test all files are extracted, along with their precompressed variants.
+    """
+    storage = FlakyStorage(location=str(tmp_path))
+    precompressed = extract(storage, package, encodings=["gzip"], workers=4)
+    assert precompressed == {"js/app.js": ["gzip"]}
+    assert len(list_files(tmp_path)) == 23
+    with open(tmp_path / "dest" / "assets" / "7.txt", "rb") as extracted:
+        assert extracted.read() == b"file 7"
+
+
+def test_extract_members_bounded_concurrency(tmp_path, package):
+    """
+    Test files are saved concurrently, but never by more than `workers` threads.
+    """
+    storage = FlakyStorage(location=str(tmp_path), delay=0.01)
+    extract(storage, package, workers=3)
+    assert storage.max_concurrent == 3
+
+
+def test_extract_members_retries(tmp_path, package):
+    """
+    Test failed saves are retried.
+    """
+    storage = FlakyStorage(location=str(tmp_path), failures={"3.txt": 2})
+    extract(storage, package, retries=2)
+    assert len(list_files(tmp_path)) == 22
+
+
+def test_extract_members_retries_partial(tmp_path, package):
+    """
+    Test partial files of failed saves are replaced by the retried save.
+    """
+    storage = FlakyStorage(location=str(tmp_path), failures={"3.txt": 2}, partial=True)
+    extract(storage, package, retries=2)
+    assert len(list_files(tmp_path)) == 22
+    with open(tmp_path / "dest" / "assets" / "3.txt", "rb") as extracted:
+        assert extracted.read() == b"file 3"
+
+
+def test_extract_members_rollback_partial(tmp_path, package):
+    """
+    Test partial files of saves that fail for good are deleted as well.
+    """
+    storage = FlakyStorage(location=str(tmp_path), failures={"3.txt": 3}, partial=True)
+    with pytest.raises(OSError):
+        extract(storage, package, retries=2, workers=4)
+    assert list_files(tmp_path) == []
+
+
+def test_extract_members_renamed(tmp_path, package):
+    """
+    Test files that the storage backend saves under another name are rejected.
+    """
+    storage = FlakyStorage(location=str(tmp_path))
+    storage.save("dest/assets/3.txt", ContentFile(b"stale"))
+    with pytest.raises(OSError, match="saved as"):
+        extract(storage, package, retries=2)
+    assert list_files(tmp_path) == ["dest/assets/3.txt"]
+
+
+def test_extract_members_rollback(tmp_path, package):
+    """
+    Test saved files are deleted when a file cannot be saved.
+    """
+    storage = FlakyStorage(location=str(tmp_path), failures={"3.txt": 3})
+    with pytest.raises(OSError):
+        extract(storage, package, retries=2, workers=4)
+    assert list_files(tmp_path) == []
+
+
+def test_extract_members_memory(tmp_path):
+    """
+    Test large members are streamed to the storage backend, such that peak memory
+    usage does not depend on the size of the members.
+    """
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w", zipfile.ZIP_DEFLATED) as package_zipfile:
+        package_zipfile.writestr("imsmanifest.xml", b"<manifest/>")
+        for i in range(4):
+            package_zipfile.writestr(f"media/{i}.mp4", bytes(20 * 1024 * 1024))
+        # Too large to be precompressed
+        package_zipfile.writestr("js/bundle.js", b" " * 20 * 1024 * 1024)
+    package = zipfile.ZipFile(content)
+    storage = FlakyStorage(location=str(tmp_path))
+
+    tracemalloc.start()
+    try:
+        extract(storage, package, encodings=["gzip"], workers=4)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert os.path.getsize(tmp_path / "dest" / "media" / "3.mp4") == 20 * 1024 * 1024
+    assert not os.path.exists(tmp_path / "dest" / "js" / "bundle.js.gz")
+    assert peak < 5 * 1024 * 1024
+
+
+def test_extract_members_reuse(tmp_path, package):
+    """
+    Test unchanged members are linked from the folder of the previous version, and
+    that members which cannot be copied are extracted.
+    """
+    storage = FlakyStorage(location=str(tmp_path))
+    extract(storage, package)
+    members = list(archive.iter_package_members(package.infolist(), ""))
+    os.remove(tmp_path / "dest" / "assets" / "2.txt")
+
+    extraction.extract_members(
+        storage,
+        package,
+        members,
+        "new",
+        reuse_folder="dest",
+        reused={"assets/1.txt": [], "assets/2.txt": []},
+    )
+
+    assert os.path.samefile(
+        tmp_path / "dest" / "assets" / "1.txt", tmp_path / "new" / "assets" / "1.txt"
+    )
+    with open(tmp_path / "new" / "assets" / "2.txt", "rb") as extracted:
+        assert extracted.read() == b"file 2"
+    assert len(list_files(tmp_path / "new")) == 22
+
+
+def test_extract_members_total_size_limit(tmp_path, package):
+    """
+    Test extracted bytes are counted as members are streamed, and that saved files are
+    deleted when the budget is exceeded.
+    """
+    storage = FlakyStorage(location=str(tmp_path))
+    limits = extraction.ExtractionLimits(max_total_size=1000)
+    with pytest.raises(extraction.ExtractionLimitError):
+        extract(storage, package, workers=4, limits=limits)
+    assert list_files(tmp_path) == []
+
+
+def test_extract_members_timeout(tmp_path, package, monkeypatch):
+    """
+    Test extraction is aborted once it took longer than the timeout.
+    """
+    now = [100.0]
+
+    def monotonic():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(extraction.time, "monotonic", monotonic)
+    storage = FlakyStorage(location=str(tmp_path))
+    limits = extraction.ExtractionLimits(timeout=5)
+    with pytest.raises(extraction.ExtractionLimitError):
+        extract(storage, package, workers=1, limits=limits)
+    assert list_files(tmp_path) == []
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [
+        extraction.ExtractionLimits(max_files=10),
+        extraction.ExtractionLimits(max_total_size=20 * 1024 * 1024),
+        extraction.ExtractionLimits(max_ratio=100),
+    ],
+)
+def test_check_members(limits):
+    """
+    Test zip bombs are rejected from their index, before anything is decompressed.
+    """
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w", zipfile.ZIP_DEFLATED) as package_zipfile:
+        package_zipfile.writestr("imsmanifest.xml", b"<manifest/>")
+        for i in range(10):
+            package_zipfile.writestr(f"bomb/{i}.txt", bytes(4 * 1024 * 1024))
+    members = list(
+        archive.iter_package_members(zipfile.ZipFile(content).infolist(), "")
+    )
+    with pytest.raises(extraction.ExtractionLimitError):
+        limits.check_members(members)
+    extraction.ExtractionLimits(max_ratio=None).check_members(members)
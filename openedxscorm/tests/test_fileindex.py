@@ -0,0 +1,34 @@
+import zipfile
+
+from openedxscorm import fileindex
+
+
+def test_build_index():
+    """
+    Test the size, CRC and mimetype of every file are indexed.
+    """
+    zipinfo = zipfile.ZipInfo("root/content/app.js")
+    zipinfo.file_size = 10
+    zipinfo.CRC = 1234
+    assert fileindex.build_index([("content/app.js", zipinfo)]) == {
+        "content/app.js": [10, 1234, "text/javascript"]
+    }
+
+
+def test_is_unchanged():
+    """
+    Test files are compared by size and CRC, including with entries of older indexes
+    that have no mimetype.
+    """
+    assert fileindex.is_unchanged([10, 1234, "text/html"], [10, 1234])
+    assert not fileindex.is_unchanged([10, 1234, "text/html"], [10, 1235, "text/html"])
+    assert not fileindex.is_unchanged([10, 1234, "text/html"], None)
+
+
+def test_find_by_name():
+    """
+    Test the least deeply nested file with the given name is found.
+    """
+    paths = ["a/b/index.html", "a/index.html", "b/index.htm"]
+    assert fileindex.find_by_name(paths, "index.html") == "a/index.html"
+    assert fileindex.find_by_name(paths, "missing.html") is None
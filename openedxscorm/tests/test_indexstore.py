@@ -0,0 +1,67 @@
+import pytest
+
+from openedxscorm import indexstore
+from openedxscorm.models import ScormPackageIndex
+
+INDEX = {
+    "files": {"index.html": [10, 1234, "text/html"]},
+    "precompressed": {"index.html": ["gzip"]},
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    indexstore.clear_cache()
+    yield
+    indexstore.clear_cache()
+
+
+@pytest.mark.django_db
+def test_save_and_get_index():
+    """
+    Test indexes are keyed by their content, and read from the database once.
+    """
+    key = indexstore.save_index(INDEX)
+    assert indexstore.save_index(dict(reversed(INDEX.items()))) == key
+    assert ScormPackageIndex.objects.count() == 1
+
+    assert indexstore.get_index(key) == INDEX
+    ScormPackageIndex.objects.all().delete()
+    assert indexstore.get_index(key) == INDEX
+
+
+@pytest.mark.django_db
+def test_get_missing_index():
+    """
+    Test missing indexes are not cached, such that they can be saved later.
+    """
+    key = indexstore.get_key(INDEX)
+    assert indexstore.get_index(key) is None
+    indexstore.save_index(INDEX)
+    assert indexstore.get_index(key) == INDEX
+
+
+@pytest.mark.django_db
+def test_persist_index():
+    """
+    Test the index items of the package metadata are replaced by the key of the
+    persisted index, from which they are loaded.
+    """
+    package_meta = {
+        "sha1": "a" * 40,
+        "archive": {"path": "a.zip", "members": {"index.html": [0, 0, 10, 10, 1]}},
+    }
+    assert indexstore.load_index(package_meta) == {
+        "members": {"index.html": [0, 0, 10, 10, 1]}
+    }
+
+    indexstore.persist_index(package_meta)
+
+    assert package_meta == {
+        "sha1": "a" * 40,
+        "archive": {"path": "a.zip"},
+        "index": indexstore.get_key({"members": {"index.html": [0, 0, 10, 10, 1]}}),
+    }
+    assert indexstore.load_index(package_meta) == {
+        "members": {"index.html": [0, 0, 10, 10, 1]}
+    }
@@ -0,0 +1,110 @@
+import io
+
+import pytest
+from django.core.cache import cache
+
+from openedxscorm import jobs
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_create_and_update_job():
+    """
+    Test the state of a job is stored in the cache and can be updated.
+    """
+    job_id = jobs.create_job("block-v1:org+course+run+type@scorm+block@1")
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.STATUS_PENDING
+    assert job["usage_id"] == "block-v1:org+course+run+type@scorm+block@1"
+
+    jobs.update_job(job_id, status=jobs.STATUS_RUNNING, files_total=3)
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.STATUS_RUNNING
+    assert job["files_total"] == 3
+
+
+@pytest.mark.django_db
+def test_save_and_pop_result():
+    """
+    Test the result of a job is returned once, to its own block only, and that the
+    results of earlier jobs of the same block are deleted along with it.
+    """
+    usage_id = "block-v1:org+course+run+type@scorm+block@1"
+    jobs.save_result("job1", usage_id, {"index_page_path": "one.html"})
+    jobs.save_result("job2", usage_id, {"index_page_path": "two.html"})
+    assert jobs.pop_result("job2", "block-v1:org+course+run+type@scorm+block@2") is None
+    assert jobs.pop_result("job2", usage_id) == {"index_page_path": "two.html"}
+    assert jobs.pop_result("job2", usage_id) is None
+    assert jobs.pop_result("job1", usage_id) is None
+
+
+def test_update_missing_job():
+    """
+    Test updating a job that expired does not create it again.
+    """
+    jobs.update_job("missing", status=jobs.STATUS_DONE)
+    assert jobs.get_job("missing") is None
+
+
+def test_progress_is_throttled(monkeypatch):
+    """
+    Test progress is counted on every call, but only reported every
+    `PROGRESS_INTERVAL` seconds.
+    """
+    now = [100.0]
+    monkeypatch.setattr(jobs.time, "monotonic", lambda: now[0])
+    job_id = jobs.create_job("usage")
+    progress = jobs.Progress(job_id)
+    progress.start(3, 300)
+
+    progress.advance(1, 100)
+    progress.advance(1, 100)
+    job = jobs.get_job(job_id)
+    assert (job["files_total"], job["bytes_total"]) == (3, 300)
+    assert (job["files_done"], job["bytes_done"]) == (1, 100)
+
+    now[0] += jobs.PROGRESS_INTERVAL
+    progress.advance(1, 100)
+    job = jobs.get_job(job_id)
+    assert (job["files_done"], job["bytes_done"]) == (3, 300)
+
+
+@pytest.mark.parametrize(
+    "settings,expected",
+    [
+        ({}, jobs.EXECUTOR_THREAD),
+        ({"PACKAGE_PROCESSING_EXECUTOR": "sync"}, jobs.EXECUTOR_SYNC),
+        ({"PACKAGE_PROCESSING_EXECUTOR": "invalid"}, jobs.EXECUTOR_THREAD),
+    ],
+)
+def test_get_executor(settings, expected):
+    """
+    Test invalid executors fall back to threads.
+    """
+    assert jobs.get_executor(settings) == expected
+
+
+def test_get_executor_without_celery(monkeypatch):
+    """
+    Test the celery executor falls back to threads when Celery is not installed.
+    """
+    monkeypatch.setattr(jobs.tasks, "shared_task", None)
+    assert (
+        jobs.get_executor({"PACKAGE_PROCESSING_EXECUTOR": "celery"})
+        == jobs.EXECUTOR_THREAD
+    )
+
+
+def test_stage_locally():
+    """
+    Test the whole uploaded file is copied, regardless of its current position.
+    """
+    package_file = io.BytesIO(b"package content")
+    package_file.read(4)
+    staged_file = jobs.stage_locally(package_file)
+    assert staged_file.read() == b"package content"
@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+
+from openedxscorm import manifest
+
+IMSMANIFEST = b"""<?xml version="1.0"?>
+<manifest identifier="m" xmlns="http://www.imsglobal.org/xsd/imscp_v1p1"
+    xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_v1p3">
+  <metadata>
+    <schema>ADL SCORM</schema>
+    <schemaversion>2004 4th Edition</schemaversion>
+  </metadata>
+  <organizations default="o1">
+    <organization identifier="o1">
+      <title>Course</title>
+      <item identifier="i1" identifierref="r1" isvisible="true">
+        <title>One</title>
+        <item identifier="i2" identifierref="r2" isvisible="true">
+          <title>Two</title>
+          <adlcp:item><title>Not an item</title></adlcp:item>
+        </item>
+        <item identifier="i3" identifierref="r3" isvisible="false">
+          <title>Hidden</title>
+        </item>
+      </item>
+    </organization>
+  </organizations>
+  <resources>
+    <resource identifier="r0" adlcp:scormType="asset"/>
+    <resource identifier="r1" href="content/one.html"/>
+    <resource identifier="r2" href="content/two.html"/>
+    <resource identifier="r2" href="content/duplicate.html"/>
+  </resources>
+</manifest>
+"""
+
+
+def test_parse_manifest():
+    """
+    Test the namespace, schema version, resources and items are parsed in one pass.
+    """
+    parsed = manifest.parse_manifest(io.BytesIO(IMSMANIFEST))
+    assert parsed.namespace == "http://www.imsglobal.org/xsd/imscp_v1p1"
+    assert parsed.schema_version == "2004 4th Edition"
+    assert parsed.index_href == "content/one.html"
+    assert parsed.get_resource_href("r2") == "content/two.html"
+    assert parsed.get_resource_href("r0") is None
+    assert parsed.get_resource_href("missing") is None
+
+    (organization,) = parsed.organizations
+    assert organization.title == "Course"
+    (one,) = organization.children
+    assert (one.title, one.identifierref, one.is_visible) == ("One", "r1", True)
+    two, hidden = one.children
+    assert two.title == "Two"
+    assert two.children == []
+    assert not hidden.is_visible
+
+
+def test_parse_manifest_without_namespace():
+    """
+    Test manifests without a default namespace are parsed.
+    """
+    parsed = manifest.parse_manifest(
+        io.BytesIO(
+            b"<manifest><metadata><schemaversion>1.2</schemaversion></metadata>"
+            b"<resources><resource identifier='r' href='index.html'/></resources>"
+            b"</manifest>"
+        )
+    )
+    assert parsed.namespace == ""
+    assert parsed.schema_version == "1.2"
+    assert parsed.index_href == "index.html"
+    assert parsed.organizations == []
+
+
+def test_parse_invalid_manifest():
+    """
+    Test invalid XML raises a parse error.
+    """
+    with pytest.raises(manifest.ParseError):
+        manifest.parse_manifest(io.BytesIO(b"<manifest><resources></manifest>"))
+
+
+def test_parse_resources():
+    """
+    Test the scorm type, files and dependencies of resources are parsed.
+    """
+    parsed = manifest.parse_manifest(
+        io.BytesIO(
+            b'<manifest xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_rootv1p2">'
+            b'<organizations default="o"/><resources>'
+            b'<resource identifier="r" href="a.html" adlcp:scormtype="sco">'
+            b'<file href="a.html"/><file href="a.js"/>'
+            b'<dependency identifierref="common"/></resource>'
+            b"</resources></manifest>"
+        )
+    )
+    resource = parsed.resources["r"]
+    assert resource.scorm_type == "sco"
+    assert resource.files == ["a.html", "a.js"]
+    assert resource.dependencies == ["common"]
+    assert parsed.default_organization == "o"
+
+
+def test_serialize_manifest():
+    """
+    Test manifests are unchanged by serialization to JSON and back.
+    """
+    parsed = manifest.parse_manifest(io.BytesIO(IMSMANIFEST))
+    data = json.loads(json.dumps(manifest.serialize(parsed)))
+    assert data["version"] == manifest.MODEL_VERSION
+    assert manifest.serialize(manifest.deserialize(data)) == data
+
+    deserialized = manifest.deserialize(data)
+    assert deserialized.get_resource_href("r1") == "content/one.html"
+    assert deserialized.organizations[0].children[0].children[0].title == "Two"
+
+
+def test_deserialize_other_version():
+    """
+    Test manifests serialized with another model version are rejected.
+    """
+    data = manifest.serialize(manifest.parse_manifest(io.BytesIO(IMSMANIFEST)))
+    data["version"] = manifest.MODEL_VERSION + 1
+    with pytest.raises(ValueError):
+        manifest.deserialize(data)
+
+
+def test_get_item_hrefs():
+    """
+    Test the hrefs of the resources of all items are collected, including the items of
+    invisible parents.
+    """
+    parsed = manifest.parse_manifest(io.BytesIO(IMSMANIFEST))
+    assert parsed.get_item_hrefs() == {"content/one.html", "content/two.html"}
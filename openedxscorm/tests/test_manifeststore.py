@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from openedxscorm import manifest, manifeststore
+from openedxscorm.models import ScormManifest
+
+IMSMANIFEST = b"""<manifest><organizations><organization identifier="o">
+<title>Course</title><item identifier="i" identifierref="r" isvisible="true">
+<title>One</title></item></organization></organizations>
+<resources><resource identifier="r" href="index.html"/></resources></manifest>"""
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    manifeststore.clear_cache()
+    yield
+    manifeststore.clear_cache()
+
+
+@pytest.mark.django_db
+def test_save_and_get_manifest():
+    """
+    Test persisted manifests are read from the database once, then from the cache.
+    """
+    manifeststore.save_manifest(
+        "a" * 40, manifest.parse_manifest(io.BytesIO(IMSMANIFEST))
+    )
+    assert ScormManifest.objects.get(sha1="a" * 40).version == manifest.MODEL_VERSION
+    manifeststore.clear_cache()
+
+    parsed = manifeststore.get_manifest("a" * 40)
+    assert parsed.get_resource_href("r") == "index.html"
+    ScormManifest.objects.all().delete()
+    assert manifeststore.get_manifest("a" * 40) is parsed
+
+
+@pytest.mark.django_db
+def test_get_missing_manifest():
+    """
+    Test missing manifests and manifests of other model versions are not returned.
+    """
+    assert manifeststore.get_manifest("a" * 40) is None
+    ScormManifest.objects.create(
+        sha1="b" * 40, version=manifest.MODEL_VERSION + 1, data={}
+    )
+    assert manifeststore.get_manifest("b" * 40) is None
+
+
+@pytest.mark.django_db
+def test_save_manifest_replaces_other_version():
+    """
+    Test manifests of other model versions are replaced.
+    """
+    ScormManifest.objects.create(
+        sha1="b" * 40, version=manifest.MODEL_VERSION + 1, data={}
+    )
+    manifeststore.save_manifest(
+        "b" * 40, manifest.parse_manifest(io.BytesIO(IMSMANIFEST))
+    )
+    assert ScormManifest.objects.get(sha1="b" * 40).version == manifest.MODEL_VERSION
+
+
+def test_cache_size(monkeypatch):
+    """
+    Test the least recently used manifests are evicted from the cache.
+    """
+    monkeypatch.setattr(manifeststore, "CACHE_SIZE", 2)
+    for sha1 in ("a", "b", "c"):
+        manifeststore.remember(sha1, manifest.Manifest())
+    assert list(manifeststore._cache) == ["b", "c"]
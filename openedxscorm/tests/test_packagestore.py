@@ -0,0 +1,158 @@
+import datetime
+import os
+import time
+
+import mock
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.utils import timezone
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from openedxscorm import packagestore
+from openedxscorm.models import ScormPackage, ScormPackageReference
+
+COURSE_KEY = CourseKey.from_string("course-v1:Org+Course+Run")
+USAGE_KEY_1 = UsageKey.from_string("block-v1:Org+Course+Run+type@scorm+block@1")
+USAGE_KEY_2 = UsageKey.from_string("block-v1:Org+Course+Run+type@scorm+block@2")
+
+
+def make_package(sha1, days_ago=30):
+    return ScormPackage.objects.create(
+        sha1=sha1,
+        path=packagestore.get_package_path("scorm", sha1),
+        ready=True,
+        last_referenced=timezone.now() - datetime.timedelta(days=days_ago),
+    )
+
+
+@pytest.mark.django_db
+def test_get_or_create_package():
+    """
+    Test existing packages are marked as referenced when a block links to them.
+    """
+    package = make_package("a" * 40)
+    linked = packagestore.get_or_create_package("a" * 40, "other/path", 10)
+    linked.refresh_from_db()
+    assert linked.pk == package.pk
+    assert linked.path == "scorm/packages/" + "a" * 40
+    assert linked.last_referenced > package.last_referenced
+
+
+@pytest.mark.django_db
+def test_get_or_create_package_usage_key():
+    """
+    Test the block that first uploads a package is recorded, without its branch.
+    """
+    package = packagestore.get_or_create_package(
+        "a" * 40, "path", 10, usage_key=USAGE_KEY_1.for_branch("draft-branch")
+    )
+    packagestore.get_or_create_package("a" * 40, "path", 10, usage_key=USAGE_KEY_2)
+    package.refresh_from_db()
+    assert package.usage_key == USAGE_KEY_1
+
+
+@pytest.mark.django_db
+def test_acquire_package():
+    """
+    Test a single upload extracts a package, while the others wait until it is ready.
+    """
+    package = packagestore.get_or_create_package("a" * 40, "path", 10)
+    package, extract = packagestore.acquire_package(package, "owner1", 60)
+    assert extract
+    assert package.extracting_by == "owner1"
+
+    def sleep(_delay):
+        packagestore.mark_ready(package, {"index.html": ["gzip"]})
+
+    with mock.patch.object(packagestore.time, "sleep", side_effect=sleep) as mock_sleep:
+        acquired, extract = packagestore.acquire_package(package, "owner2", 60)
+    mock_sleep.assert_called_once()
+    assert not extract
+    assert acquired.ready
+    assert acquired.extracting_by == ""
+    assert acquired.precompressed == {"index.html": ["gzip"]}
+
+
+@pytest.mark.django_db
+def test_acquire_package_expired_or_released():
+    """
+    Test the lease of a dead or failed upload is taken over by the next upload.
+    """
+    package = packagestore.get_or_create_package("a" * 40, "path", 10)
+    ScormPackage.objects.filter(pk=package.pk).update(
+        extracting_by="dead",
+        extracting_since=timezone.now() - datetime.timedelta(seconds=120),
+    )
+    package, extract = packagestore.acquire_package(package, "owner1", 60)
+    assert extract
+    packagestore.release_package(package, "owner1")
+    assert packagestore.acquire_package(package, "owner2", 60)[1]
+
+
+def test_get_storage():
+    """
+    Test storage functions receive a stand-in for the block with the given usage key.
+    """
+    storage = FileSystemStorage()
+    xblock_settings = {
+        "STORAGE_FUNC": lambda xblock: storage if xblock.location.org == "Org" else None
+    }
+    assert packagestore.get_storage(xblock_settings, USAGE_KEY_1) is storage
+
+
+@pytest.mark.django_db
+def test_set_course_references():
+    """
+    Test the references of a course are replaced, and that packages which lose
+    references are marked as recently referenced.
+    """
+    package_a = make_package("a" * 40)
+    package_b = make_package("b" * 40)
+    packagestore.add_reference(package_a, USAGE_KEY_1)
+    packagestore.add_reference(package_a, USAGE_KEY_2)
+
+    packagestore.set_course_references(
+        COURSE_KEY, [(USAGE_KEY_1, "a" * 40), (USAGE_KEY_2, "b" * 40)]
+    )
+
+    assert {
+        (reference.usage_key, reference.package.sha1)
+        for reference in ScormPackageReference.objects.all()
+    } == {(USAGE_KEY_1, "a" * 40), (USAGE_KEY_2, "b" * 40)}
+    package_a.refresh_from_db()
+    package_b.refresh_from_db()
+    assert package_a.last_referenced > package_b.last_referenced
+
+
+@pytest.mark.django_db
+def test_gc_packages(tmp_path, settings):
+    """
+    Test only the packages that have been unreferenced for the grace period are
+    deleted, along with their files, and that expired uploads are deleted.
+    """
+    storage = FileSystemStorage(location=str(tmp_path))
+    settings.XBLOCK_SETTINGS = {"ScormXBlock": {"STORAGE_FUNC": lambda _owner: storage}}
+    referenced = make_package("a" * 40)
+    packagestore.add_reference(referenced, USAGE_KEY_1)
+    unreferenced = make_package("b" * 40)
+    recent = make_package("c" * 40, days_ago=1)
+    for package in (referenced, unreferenced, recent):
+        storage.save(f"{package.path}/index.html", ContentFile(b"<html/>"))
+    storage.save("scorm/uploads/expired.zip", ContentFile(b"zip"))
+    storage.save("scorm/uploads/recent.zip", ContentFile(b"zip"))
+    expired = time.time() - 2 * 24 * 60 * 60
+    os.utime(storage.path("scorm/uploads/expired.zip"), (expired, expired))
+
+    call_command("scorm_gc_packages", batch_size=1)
+
+    assert set(ScormPackage.objects.values_list("sha1", flat=True)) == {
+        "a" * 40,
+        "c" * 40,
+    }
+    assert storage.exists(f"{referenced.path}/index.html")
+    assert not storage.exists(f"{unreferenced.path}/index.html")
+    assert storage.exists(f"{recent.path}/index.html")
+    assert not storage.exists("scorm/uploads/expired.zip")
+    assert storage.exists("scorm/uploads/recent.zip")
@@ -0,0 +1,82 @@
+import gzip
+import os
+
+import pytest
+from webob import Request
+
+from openedxscorm import precompress
+
+
+@pytest.mark.parametrize(
+    "path,size,expected",
+    [
+        ("index.html", 2048, True),
+        ("js/app.js", 2048, True),
+        ("data/course.json", 2048, True),
+        ("img/logo.svg", 2048, True),
+        ("js/app.js", 100, False),
+        ("img/photo.jpg", 2048, False),
+        ("js/app.js.gz", 2048, False),
+        ("unknown", 2048, False),
+    ],
+)
+def test_is_compressible(path, size, expected):
+    """
+    Test only text assets above the size threshold are compressed.
+    """
+    assert precompress.is_compressible(path, size) is expected
+
+
+def test_iter_variants():
+    """
+    Test gzip variants are reproducible and decompress to the original content.
+    """
+    content = b"var x = 1;\n" * 1000
+    variants = dict(precompress.iter_variants(content, ["gzip"]))
+    assert gzip.decompress(variants["gzip"]) == content
+    assert dict(precompress.iter_variants(content, ["gzip"])) == variants
+
+
+def test_iter_variants_incompressible():
+    """
+    Test variants that are not significantly smaller are skipped.
+    """
+    content = os.urandom(2048)
+    assert not list(precompress.iter_variants(content, ["gzip"]))
+
+
+def test_get_encodings_without_brotli(monkeypatch):
+    """
+    Test brotli variants are skipped when the brotli package is not installed.
+    """
+    monkeypatch.setattr(precompress, "brotli", None)
+    assert precompress.get_encodings({}) == ["gzip"]
+    assert precompress.get_encodings({"PRECOMPRESS_ENCODINGS": []}) == []
+
+
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({"Accept-Encoding": "gzip, deflate, br"}, "br"),
+        ({"Accept-Encoding": "gzip, br;q=0.5"}, "gzip"),
+        ({"Accept-Encoding": "gzip"}, "gzip"),
+        ({"Accept-Encoding": "identity"}, None),
+        ({"Accept-Encoding": "br, gzip", "Range": "bytes=0-10"}, None),
+        ({}, None),
+    ],
+)
+def test_choose_encoding(headers, expected):
+    """
+    Test the preferred variant that the client accepts is chosen.
+    """
+    request = Request.blank("/", headers=headers)
+    assert precompress.choose_encoding(request, ["br", "gzip"]) == expected
+
+
+def test_choose_encoding_unavailable():
+    """
+    Test the original file is served when no variant is available.
+    """
+    request = Request.blank("/", headers={"Accept-Encoding": "br"})
+    assert precompress.choose_encoding(request, ["gzip"]) is None
+    assert precompress.choose_encoding(request, None) is None
@@ -0,0 +1,249 @@
+import io
+from unittest.mock import Mock
+
+import pytest
+from botocore.exceptions import ClientError
+from webob import Request, Response
+
+from openedxscorm import proxy
+
+
+class TrackingFile(io.BytesIO):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_read = 0
+
+    def read(self, size=-1):
+        self.max_read = max(self.max_read, size)
+        return super().read(size)
+
+
+def test_iter_chunks_bounded():
+    """
+    Test iter_chunks never reads more than chunk_size bytes and closes the file.
+    """
+    fileobj = TrackingFile(b"x" * 1000)
+    chunks = list(proxy.iter_chunks(fileobj, chunk_size=64))
+    assert b"".join(chunks) == b"x" * 1000
+    assert max(len(chunk) for chunk in chunks) == 64
+    assert fileobj.max_read == 64
+    assert fileobj.closed
+
+
+def test_iter_chunks_closed_early():
+    """
+    Test iter_chunks closes the file when the consumer stops iterating.
+    """
+    fileobj = io.BytesIO(b"x" * 1000)
+    chunks = proxy.iter_chunks(fileobj, chunk_size=64)
+    next(chunks)
+    chunks.close()
+    assert fileobj.closed
+
+
+@pytest.mark.parametrize(
+    "settings_bucket,expected",
+    [
+        ({}, proxy.PROXY_MODE_STREAM),
+        ({"PROXY_MODE": "buffer"}, proxy.PROXY_MODE_BUFFER),
+        ({"PROXY_MODE": "redirect"}, proxy.PROXY_MODE_REDIRECT),
+        ({"PROXY_MODE": "invalid"}, proxy.PROXY_MODE_STREAM),
+    ],
+)
+def test_get_proxy_mode(settings_bucket, expected):
+    """
+    Test get_proxy_mode falls back to streaming.
+    """
+    assert proxy.get_proxy_mode(settings_bucket) == expected
+
+
+def test_get_upstream_headers():
+    """
+    Test get_upstream_headers only keeps range and conditional headers.
+    """
+    request = Request.blank(
+        "/",
+        headers={
+            "Range": "bytes=0-99",
+            "If-None-Match": '"etag"',
+            "Cookie": "sessionid=secret",
+        },
+    )
+    assert proxy.get_upstream_headers(request) == {
+        "Range": "bytes=0-99",
+        "If-None-Match": '"etag"',
+    }
+
+
+def test_relay_headers():
+    """
+    Test relay_headers copies range and validator headers to the response.
+    """
+    response = Response(status=206)
+    proxy.relay_headers(
+        {
+            "Content-Range": "bytes 0-99/1000",
+            "ETag": '"etag"',
+            "Accept-Ranges": "bytes",
+            "Set-Cookie": "a=b",
+        },
+        response,
+    )
+    assert response.headers["Content-Range"] == "bytes 0-99/1000"
+    assert response.headers["ETag"] == '"etag"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "Last-Modified" not in response.headers
+    assert "Set-Cookie" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "settings_bucket,content_addressed,expected",
+    [
+        ({}, True, "public, max-age=31536000, immutable"),
+        ({}, False, "no-cache"),
+        ({"ASSETS_CACHE_CONTROL": "private, max-age=60"}, True, "private, max-age=60"),
+        ({"S3_PATH_ASSETS_CACHE_CONTROL": "max-age=300"}, False, "max-age=300"),
+        ({"S3_PATH_ASSETS_CACHE_CONTROL": ""}, False, ""),
+    ],
+)
+def test_get_cache_control(settings_bucket, content_addressed, expected):
+    """
+    Test get_cache_control depends on whether the package is content-addressed.
+    """
+    assert proxy.get_cache_control(settings_bucket, content_addressed) == expected
+
+
+@pytest.mark.parametrize(
+    "suffix,expected",
+    [
+        ("a" * 40 + "/content/index.html", ("a" * 40, "content/index.html")),
+        ("content/index.html", (None, "content/index.html")),
+        ("A" * 40 + "/index.html", (None, "A" * 40 + "/index.html")),
+        ("a" * 40 + "/", (None, "a" * 40 + "/")),
+        ("a" * 39 + "/index.html", (None, "a" * 39 + "/index.html")),
+    ],
+)
+def test_split_version(suffix, expected):
+    """
+    Test the package SHA-1 is split from versioned asset paths only.
+    """
+    assert proxy.split_version(suffix) == expected
+
+
+@pytest.mark.parametrize(
+    "file_type,expected",
+    [
+        ("text/html", True),
+        ("application/xhtml+xml", True),
+        (None, True),
+        ("text/javascript", False),
+        ("video/mp4", False),
+    ],
+)
+def test_must_proxy(file_type, expected):
+    """
+    Test must_proxy only keeps HTML documents and unknown files on the LMS origin.
+    """
+    assert proxy.must_proxy(file_type) == expected
+
+
+def test_pooled_body_release():
+    """
+    Test PooledBody hands the connection back to the pool once exhausted.
+    """
+    response = Mock()
+    response.read.side_effect = [b"data", b""]
+    body = proxy.PooledBody(response)
+    assert list(proxy.iter_chunks(body)) == [b"data"]
+    response.release_conn.assert_called_once_with()
+    response.close.assert_not_called()
+
+
+def test_pooled_body_close_early():
+    """
+    Test PooledBody discards connections with unread data.
+    """
+    response = Mock()
+    response.read.return_value = b"data"
+    body = proxy.PooledBody(response)
+    chunks = proxy.iter_chunks(body)
+    next(chunks)
+    chunks.close()
+    response.close.assert_called_once_with()
+    response.release_conn.assert_not_called()
+
+
+def test_fetch_s3_object():
+    """
+    Test fetch_s3_object converts forwarded headers to GetObject parameters.
+    """
+    storage = Mock()
+    storage.get_object.return_value = {
+        "Body": io.BytesIO(b"data"),
+        "ResponseMetadata": {
+            "HTTPStatusCode": 206,
+            "HTTPHeaders": {"etag": '"etag"', "content-range": "bytes 0-3/10"},
+        },
+    }
+    upstream = proxy.fetch_s3_object(
+        storage, "scorm/sha1/video.mp4", {"Range": "bytes=0-3", "If-None-Match": "*"}
+    )
+    storage.get_object.assert_called_once_with(
+        "scorm/sha1/video.mp4", Range="bytes=0-3", IfNoneMatch="*"
+    )
+    assert upstream.status == 206
+    assert upstream.headers["ETag"] == '"etag"'
+    assert upstream.body.read() == b"data"
+
+
+def test_fetch_s3_object_if_range():
+    """
+    Test fetch_s3_object fetches the full object when If-Range is present.
+    """
+    storage = Mock()
+    storage.get_object.return_value = {
+        "Body": io.BytesIO(b"data"),
+        "ResponseMetadata": {"HTTPStatusCode": 200, "HTTPHeaders": {}},
+    }
+    proxy.fetch_s3_object(
+        storage, "scorm/sha1/video.mp4", {"Range": "bytes=0-3", "If-Range": '"etag"'}
+    )
+    storage.get_object.assert_called_once_with("scorm/sha1/video.mp4")
+
+
+def test_fetch_s3_object_not_modified():
+    """
+    Test fetch_s3_object converts client errors to upstream responses.
+    """
+    storage = Mock()
+    storage.get_object.side_effect = ClientError(
+        {
+            "Error": {"Code": "304", "Message": "Not Modified"},
+            "ResponseMetadata": {
+                "HTTPStatusCode": 304,
+                "HTTPHeaders": {"etag": '"etag"'},
+            },
+        },
+        "GetObject",
+    )
+    upstream = proxy.fetch_s3_object(
+        storage, "scorm/sha1/video.mp4", {"If-None-Match": '"etag"'}
+    )
+    assert upstream.status == 304
+    assert upstream.headers["ETag"] == '"etag"'
+    assert upstream.body is None
+
+
+@pytest.mark.parametrize(
+    "settings_bucket,expected",
+    [
+        ({}, proxy.UPSTREAM_CLIENT_HTTP),
+        ({"PROXY_UPSTREAM_CLIENT": "boto3"}, proxy.UPSTREAM_CLIENT_BOTO3),
+        ({"PROXY_UPSTREAM_CLIENT": "invalid"}, proxy.UPSTREAM_CLIENT_HTTP),
+    ],
+)
+def test_get_upstream_client(settings_bucket, expected):
+    """
+    Test get_upstream_client falls back to HTTP.
+    """
+    assert proxy.get_upstream_client(settings_bucket) == expected
@@ -0,0 +1,237 @@
+import os
+
+import mock
+import pytest
+from webob import Request, Response
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+
+from openedxscorm import access, extraction, jobs, singleflight
+from openedxscorm.scormxblock import ScormXBlock
+from openedxscorm.tests.utils import (
+    get_package_job_status,
+    make_block,
+    make_package,
+    submit_package,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return FileSystemStorage(location=str(tmp_path))
+
+
+@pytest.mark.django_db
+def test_upload_to_new_block(storage):
+    """
+    Test all the files of the first package of a block are extracted, although its
+    empty metadata cannot be told apart from the new one by the field cache.
+    """
+    block = make_block(storage)
+    assert submit_package(block, make_package()).json["errors"] == []
+    assert "files" not in block.package_meta
+    for path in block.get_package_index()["files"]:
+        assert storage.exists(os.path.join(block.extract_folder_path, path))
+
+
+@pytest.mark.django_db
+def test_failed_upload_restores_package_meta(storage):
+    """
+    Test the metadata of the previous package is restored when a new package cannot
+    be extracted, such that the block keeps serving the previous package.
+    """
+    block = make_block(storage)
+    submit_package(block, make_package())
+    previous_package_meta = dict(block.package_meta)
+
+    with mock.patch.object(
+        extraction, "extract_members", side_effect=OSError("Storage is down")
+    ):
+        response = submit_package(block, make_package(index=b"<html>new</html>"))
+
+    assert response.json["errors"] == ["Could not extract package: Storage is down"]
+    assert block.package_meta == previous_package_meta
+    assert storage.exists(
+        os.path.join(block.extract_folder_path, "content/index.html")
+    )
+
+
+@pytest.mark.django_db
+def test_async_upload_keeps_previous_package_until_saved(storage):
+    """
+    Test the files of the previous package are only deleted once the results of the
+    processing job are saved to the block, and not by the job itself.
+    """
+    block = make_block(
+        storage,
+        {"ASYNC_PACKAGE_PROCESSING": True, "PACKAGE_PROCESSING_EXECUTOR": "sync"},
+    )
+    submit_package(block, make_package())
+    assert get_package_job_status(block)["status"] == jobs.STATUS_DONE
+    previous_folder = block.extract_folder_path
+
+    response = submit_package(block, make_package(index=b"<html>new</html>"))
+    assert response.json["job_id"] == block.package_job_id
+    assert block.extract_folder_path == previous_folder
+    assert storage.exists(os.path.join(previous_folder, "content/index.html"))
+
+    assert get_package_job_status(block)["status"] == jobs.STATUS_DONE
+    assert block.extract_folder_path != previous_folder
+    assert storage.exists(
+        os.path.join(block.extract_folder_path, "content/index.html")
+    )
+    assert not storage.exists(os.path.join(previous_folder, "content/index.html"))
+
+
+@pytest.mark.django_db
+def test_async_upload_applied_without_polling(storage):
+    """
+    Test the results of a job that finished while nobody polled it, and the state of
+    which expired from the cache, are applied when the block is displayed in Studio.
+    """
+    block = make_block(
+        storage,
+        {"ASYNC_PACKAGE_PROCESSING": True, "PACKAGE_PROCESSING_EXECUTOR": "sync"},
+    )
+    submit_package(block, make_package())
+    assert get_package_job_status(block)["status"] == jobs.STATUS_DONE
+    previous_folder = block.extract_folder_path
+
+    submit_package(block, make_package(index=b"<html>new</html>"))
+    cache.delete(jobs.get_cache_key(block.package_job_id))
+    with mock.patch.object(ScormXBlock, "student_view"):
+        block.author_view()
+    assert block.package_job_id == ""
+    assert block.extract_folder_path != previous_folder
+    assert storage.exists(
+        os.path.join(block.extract_folder_path, "content/index.html")
+    )
+    assert not storage.exists(os.path.join(previous_folder, "content/index.html"))
+    assert get_package_job_status(block)["status"] is None
+
+
+@pytest.mark.django_db
+def test_rejected_archive_upload_keeps_previous_package(storage):
+    """
+    Test an archived package is only replaced once the new package is validated and
+    stored, and that the previous zip file is then deleted.
+    """
+    xblock_settings = {"PACKAGE_STORAGE_MODE": "archive"}
+    block = make_block(storage, xblock_settings)
+    submit_package(block, make_package())
+    previous_package_meta = dict(block.package_meta)
+    previous_path = block.package_meta["archive"]["path"]
+
+    xblock_settings["EXTRACT_MAX_FILES"] = 1
+    response = submit_package(block, make_package(index=b"<html>new</html>"))
+    assert response.json["errors"][0].startswith("Invalid package")
+    assert block.package_meta == previous_package_meta
+    assert storage.exists(previous_path)
+
+    del xblock_settings["EXTRACT_MAX_FILES"]
+
+    assert submit_package(block, make_package(index=b"<html>new</html>")).json[
+        "errors"
+    ] == []
+    assert storage.exists(block.package_meta["archive"]["path"])
+    assert not storage.exists(previous_path)
+
+
+@pytest.mark.django_db
+def test_redirect_mode_streams_from_other_storages(storage):
+    """
+    Test assets are streamed rather than redirected to when the storage backend cannot
+    generate urls that expire.
+    """
+    block = make_block(storage, {"PROXY_MODE": "redirect"})
+    submit_package(block, make_package())
+    with mock.patch.object(
+        access, "is_enrolled", return_value=True
+    ), mock.patch.object(
+        ScormXBlock, "proxy_asset", return_value=Response(b"png")
+    ) as proxy_asset:
+        response = block.assets_proxy(Request.blank("/"), "content/image.png")
+    assert response.status_code == 200
+    proxy_asset.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_block_named_after_shared_folder(storage):
+    """
+    Test a block whose id is the name of the shared package store does not mistake
+    the store for its deprecated folder, and thus does not delete shared packages.
+    """
+    xblock_settings = {"SHARED_PACKAGE_STORE": True}
+    block = make_block(storage, xblock_settings)
+    submit_package(block, make_package())
+    shared_path = block.extract_folder_path
+
+    other = make_block(storage, xblock_settings)
+    other.location = other.location.replace(block_id="packages")
+    response = submit_package(other, make_package(index=b"<html>new</html>"))
+    assert response.json["errors"] == []
+    assert other.package_meta["old_base_path"] is False
+    assert storage.exists(os.path.join(shared_path, "content/index.html"))
+
+
+@pytest.mark.django_db
+def test_fetch_asset_coalesces_identical_requests_only(storage):
+    """
+    Test concurrent fetches are only coalesced when they request the same upstream
+    object, with the same query string and forwarded headers.
+    """
+    block = make_block(storage)
+    submit_package(block, make_package())
+    with mock.patch.object(singleflight, "fetch") as fetch:
+        block.fetch_asset("content/app.js", "", {"Range": "bytes=0-9"})
+        block.fetch_asset("content/app.js", "", {"Range": "bytes=0-9"})
+        block.fetch_asset("content/app.js", "v=2", {"Range": "bytes=0-9"})
+        block.fetch_asset("content/app.js.br", "", {"Range": "bytes=0-9"})
+        block.fetch_asset("content/app.js", "", {"Range": "bytes=10-19"})
+    keys = [call.args[0] for call in fetch.call_args_list]
+    assert keys[0] == keys[1]
+    assert len(set(keys)) == 4
+
+
+@pytest.mark.django_db
+def test_table_of_contents_not_modified(storage):
+    """
+    Test the table of contents is not built again when the client already has the
+    current version, and that it changes with the package.
+    """
+    block = make_block(storage)
+    submit_package(block, make_package())
+    etag = block.table_of_contents(Request.blank("/"), "").etag
+    with mock.patch.object(ScormXBlock, "get_table_of_contents") as get_toc:
+        response = block.table_of_contents(
+            Request.blank("/", headers={"If-None-Match": f'"{etag}"'}), ""
+        )
+    assert response.status_code == 304
+    get_toc.assert_not_called()
+
+    submit_package(block, make_package(index=b"<html>new</html>"))
+    assert block.table_of_contents(Request.blank("/"), "").etag != etag
+
+
+@pytest.mark.django_db
+def test_upload_same_package_without_file_index(storage):
+    """
+    Test uploading the package that is currently served again, to a block that was
+    saved before file indexes existed, keeps the served files as they are.
+    """
+    block = make_block(storage)
+    content = make_package()
+    submit_package(block, content)
+    block.package_meta = {
+        key: value for key, value in block.package_meta.items() if key != "index"
+    }
+    folder = block.extract_folder_path
+    files_before = sorted(storage.listdir(os.path.join(folder, "content"))[1])
+
+    response = submit_package(block, content)
+    assert response.json["errors"] == []
+    assert block.extract_folder_path == folder
+    assert sorted(storage.listdir(os.path.join(folder, "content"))[1]) == files_before
+    assert storage.listdir(folder)[1] == ["imsmanifest.xml"]
+    with storage.open(os.path.join(folder, "content/index.html")) as index_file:
+        assert index_file.read() == b"<html>index</html>"
@@ -0,0 +1,124 @@
+import io
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache import cache
+
+from openedxscorm import singleflight
+from openedxscorm.proxy import UpstreamResponse
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_fetch_func(content, started=None, release=None):
+    """
+    Return a mock fetch function that blocks until `release` is set.
+    """
+
+    def fetch():
+        if started:
+            started.set()
+        if release:
+            release.wait(5)
+        return UpstreamResponse(
+            200, {"Content-Length": str(len(content))}, io.BytesIO(content)
+        )
+
+    return Mock(side_effect=fetch)
+
+
+def fetch_concurrently(key, fetch_func, count, **kwargs):
+    """
+    Start a leader fetch, then `count` concurrent fetches of the same key.
+    """
+    started = threading.Event()
+    release = threading.Event()
+    leader_fetch_func = make_fetch_func(
+        fetch_func.content, started=started, release=release
+    )
+    results = []
+
+    def run(func):
+        upstream = singleflight.fetch(key, func, **kwargs)
+        results.append(upstream.body.read())
+
+    threads = [threading.Thread(target=run, args=(leader_fetch_func,))]
+    threads[0].start()
+    started.wait(5)
+    for _ in range(count):
+        threads.append(threading.Thread(target=run, args=(fetch_func,)))
+        threads[-1].start()
+    # Give followers the time to start waiting on the leader
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return leader_fetch_func, results
+
+
+def test_fetch_coalesced():
+    """
+    Test concurrent fetches of the same key only fetch once.
+    """
+    fetch_func = make_fetch_func(b"content")
+    fetch_func.content = b"content"
+    leader_fetch_func, results = fetch_concurrently("key", fetch_func, 5)
+    leader_fetch_func.assert_called_once()
+    fetch_func.assert_not_called()
+    assert results == [b"content"] * 6
+
+
+def test_fetch_too_large():
+    """
+    Test followers fetch assets that are too large to be shared on their own.
+    """
+    fetch_func = make_fetch_func(b"content")
+    fetch_func.content = b"content"
+    leader_fetch_func, results = fetch_concurrently("key", fetch_func, 3, max_size=3)
+    leader_fetch_func.assert_called_once()
+    assert fetch_func.call_count == 3
+    assert results == [b"content"] * 4
+
+
+def test_fetch_across_processes_follower():
+    """
+    Test a process waits for the result of the process that holds the lock.
+    """
+    key = "key"
+    cache.set(f"{singleflight.CACHE_KEY_PREFIX}.lock.{key}", 1)
+    timer = threading.Timer(
+        0.1,
+        cache.set,
+        args=(
+            f"{singleflight.CACHE_KEY_PREFIX}.result.{key}",
+            (200, {"Content-Length": "6"}, b"shared"),
+        ),
+    )
+    timer.start()
+    fetch_func = make_fetch_func(b"local")
+    upstream = singleflight.fetch(key, fetch_func, cross_process=True)
+    timer.join()
+    assert upstream.body.read() == b"shared"
+    fetch_func.assert_not_called()
+
+
+def test_fetch_across_processes_leader():
+    """
+    Test the process that acquires the lock shares its result.
+    """
+    fetch_func = make_fetch_func(b"content")
+    upstream = singleflight.fetch("key", fetch_func, cross_process=True)
+    assert upstream.body.read() == b"content"
+    assert cache.get(f"{singleflight.CACHE_KEY_PREFIX}.lock.key") is None
+    assert cache.get(f"{singleflight.CACHE_KEY_PREFIX}.result.key") == (
+        200,
+        {"Content-Length": "7"},
+        b"content",
+    )
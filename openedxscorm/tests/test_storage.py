@@ -0,0 +1,96 @@
+from unittest.mock import Mock, PropertyMock, patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from openedxscorm.storage import S3ScormStorage, delete_folder
+
+
+def test_delete_folder(tmp_path):
+    """
+    Test all files are deleted, except for the files of the kept folder.
+    """
+    storage = FileSystemStorage(location=str(tmp_path))
+    for name in ["a.html", "js/b.js", "js/lib/c.js", "keep/d.html", "other/e.html"]:
+        storage.save(f"root/{name}", ContentFile(b"x"))
+
+    assert delete_folder(storage, "root", keep="root/keep", workers=4) == 4
+    assert storage.listdir("root/js") == (["lib"], [])
+    assert storage.exists("root/keep/d.html")
+    assert not storage.exists("root/other/e.html")
+
+
+def test_delete_folder_keep_file(tmp_path):
+    """
+    Test a single file may be kept, such as the zip file of an archived package.
+    """
+    storage = FileSystemStorage(location=str(tmp_path))
+    for name in ["old.zip", "new.zip", "new.zip.parts/00001"]:
+        storage.save(f"root/{name}", ContentFile(b"x"))
+
+    assert delete_folder(storage, "root", keep="root/new.zip") == 2
+    assert storage.listdir("root")[1] == ["new.zip"]
+
+
+@pytest.fixture
+def s3_client():
+    client = Mock()
+    client.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": f"root/{i}.js"} for i in range(1500)]},
+        {"Contents": [{"Key": f"root/keep/{i}.js"} for i in range(10)]},
+        {"Contents": [{"Key": f"root/{i}.html"} for i in range(600)]},
+    ]
+    client.delete_objects.return_value = {}
+    with patch.object(
+        S3ScormStorage, "connection", new_callable=PropertyMock
+    ) as connection:
+        connection.return_value.meta.client = client
+        yield client
+
+
+def test_bulk_delete(s3_client):
+    """
+    Test objects are listed by prefix and deleted in batches of 1000 keys.
+    """
+    storage = S3ScormStorage(Mock(), bucket_name="bucket")
+
+    assert delete_folder(storage, "root", keep="root/keep") == 2100
+    s3_client.get_paginator.return_value.paginate.assert_called_once_with(
+        Bucket="bucket", Prefix="root/"
+    )
+    batches = [
+        call.kwargs["Delete"]["Objects"]
+        for call in s3_client.delete_objects.call_args_list
+    ]
+    assert [len(batch) for batch in batches] == [1000, 1000, 100]
+    assert not any(
+        obj["Key"].startswith("root/keep/") for batch in batches for obj in batch
+    )
+
+
+def test_bulk_delete_keep_file(s3_client):
+    """
+    Test a single object may be kept, but not the objects that share its prefix.
+    """
+    s3_client.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": "root/new.zip"}, {"Key": "root/new.zip2"}]},
+    ]
+    storage = S3ScormStorage(Mock(), bucket_name="bucket")
+
+    assert delete_folder(storage, "root", keep="root/new.zip") == 1
+    s3_client.delete_objects.assert_called_once_with(
+        Bucket="bucket", Delete={"Objects": [{"Key": "root/new.zip2"}], "Quiet": True}
+    )
+
+
+def test_bulk_delete_errors(s3_client):
+    """
+    Test objects that cannot be deleted raise an error.
+    """
+    s3_client.delete_objects.return_value = {
+        "Errors": [{"Key": "root/1.js", "Message": "Access Denied"}]
+    }
+    storage = S3ScormStorage(Mock(), bucket_name="bucket")
+    with pytest.raises(OSError, match="Access Denied"):
+        delete_folder(storage, "root", workers=1)
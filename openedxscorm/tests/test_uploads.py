@@ -0,0 +1,198 @@
+import datetime
+import io
+import os
+import time
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+
+from openedxscorm import uploads
+
+CONTENT = bytes(range(256)) * 100
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return FileSystemStorage(location=str(tmp_path))
+
+
+@pytest.fixture
+def upload(storage, monkeypatch):
+    monkeypatch.setattr(uploads, "MIN_PART_SIZE", 1)
+    return uploads.create_upload(
+        storage, "usage", "uploads", "package.zip", len(CONTENT), part_size=10000
+    )
+
+
+def save_part(storage, upload, part_number):
+    start = (part_number - 1) * upload["part_size"]
+    content = CONTENT[start : start + upload["part_size"]]
+    uploads.save_part(storage, upload, part_number, io.BytesIO(content), len(content))
+
+
+def test_get_part_size():
+    """
+    Test parts are at least 5 MiB, and that there are at most 10000 parts.
+    """
+    assert uploads.get_part_size(1024, 1024) == uploads.MIN_PART_SIZE
+    assert uploads.get_part_size(10**12) == 10**8
+
+
+def test_upload_parts(storage, upload):
+    """
+    Test parts are uploaded in any order, and assembled on completion.
+    """
+    upload_id, state = upload
+    assert state["part_count"] == 3
+    assert uploads.get_upload(upload_id, "other") is None
+    for part_number in [3, 1, 2, 2]:
+        save_part(storage, state, part_number)
+    assert uploads.get_uploaded_parts(storage, state) == {1, 2, 3}
+
+    uploads.complete_upload(storage, upload_id, state)
+
+    assert uploads.get_upload(upload_id, "usage")["completed"]
+    with storage.open(state["path"], "rb") as package_file:
+        assert package_file.read() == CONTENT
+    assert uploads.get_uploaded_parts(storage, state) == set()
+
+
+def test_upload_missing_parts(storage, upload):
+    """
+    Test uploads cannot be completed until all parts are uploaded.
+    """
+    upload_id, state = upload
+    save_part(storage, state, 1)
+    with pytest.raises(uploads.UploadError, match="Missing 2 parts"):
+        uploads.complete_upload(storage, upload_id, state)
+
+
+def test_upload_invalid_part(storage, upload):
+    """
+    Test parts with an invalid number or size are rejected.
+    """
+    _upload_id, state = upload
+    with pytest.raises(uploads.UploadError):
+        uploads.save_part(storage, state, 4, io.BytesIO(b"x"), 1)
+    with pytest.raises(uploads.UploadError):
+        uploads.save_part(storage, state, 1, io.BytesIO(b"x"), 1)
+
+
+def test_multipart_upload():
+    """
+    Test S3 uploads are completed with the ETags of the parts uploaded by the browser.
+    """
+    s3_storage = Mock(
+        spec=[
+            "create_multipart_upload",
+            "get_upload_part_url",
+            "list_upload_parts",
+            "complete_multipart_upload",
+            "size",
+            "delete",
+        ]
+    )
+    s3_storage.create_multipart_upload.return_value = "multipart"
+    s3_storage.get_upload_part_url.side_effect = (
+        lambda name, upload_id, part_number, expire: f"https://s3/{name}?part={part_number}"
+    )
+    upload_id, state = uploads.create_upload(
+        s3_storage, "usage", "uploads", "package.zip", 12 * 1024 * 1024
+    )
+    assert state["part_count"] == 1
+    assert uploads.get_part_urls(s3_storage, state, [1], None, 60) == {
+        1: f"https://s3/{state['path']}?part=1"
+    }
+
+    s3_storage.list_upload_parts.return_value = {1: '"etag"'}
+    s3_storage.size.return_value = 12 * 1024 * 1024
+    uploads.complete_upload(s3_storage, upload_id, state)
+    s3_storage.complete_multipart_upload.assert_called_once_with(
+        state["path"], "multipart", {1: '"etag"'}
+    )
+
+
+def test_abort_upload(storage, upload):
+    """
+    Test aborted uploads have their parts and assembled file deleted.
+    """
+    _upload_id, state = upload
+    save_part(storage, state, 1)
+    save_part(storage, state, 2)
+    uploads.abort_upload(storage, state)
+    assert uploads.get_uploaded_parts(storage, state) == set()
+    assert not storage.exists(state["path"])
+
+
+def test_complete_upload_failure():
+    """
+    Test multipart uploads that cannot be completed are aborted, and must be started
+    again.
+    """
+    s3_storage = Mock(
+        spec=[
+            "create_multipart_upload",
+            "list_upload_parts",
+            "complete_multipart_upload",
+            "abort_multipart_upload",
+            "exists",
+        ]
+    )
+    s3_storage.create_multipart_upload.return_value = "multipart"
+    s3_storage.list_upload_parts.return_value = {1: '"etag"'}
+    s3_storage.complete_multipart_upload.side_effect = OSError("Invalid part")
+    s3_storage.exists.return_value = False
+    upload_id, state = uploads.create_upload(
+        s3_storage, "usage", "uploads", "package.zip", 12 * 1024 * 1024
+    )
+
+    with pytest.raises(uploads.UploadError, match="Invalid part"):
+        uploads.complete_upload(s3_storage, upload_id, state)
+    s3_storage.abort_multipart_upload.assert_called_once_with(
+        state["path"], "multipart"
+    )
+    assert uploads.get_upload(upload_id, "usage") is None
+
+
+def test_iter_expired_uploads(storage, upload):
+    """
+    Test only the files of the uploads folder that are older than the upload timeout
+    are expired.
+    """
+    _upload_id, state = upload
+    save_part(storage, state, 1)
+    save_part(storage, state, 2)
+    expired = time.time() - uploads.UPLOAD_TIMEOUT - 60
+    os.utime(storage.path(uploads.get_part_path(state, 1)), (expired, expired))
+
+    assert list(uploads.iter_expired_uploads(storage, "uploads")) == [
+        (uploads.get_part_path(state, 1), None)
+    ]
+    assert list(uploads.iter_expired_uploads(storage, "missing")) == []
+
+
+def test_iter_expired_multipart_uploads():
+    """
+    Test S3 multipart uploads that were initiated before the upload timeout are
+    expired.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    s3_storage = Mock(spec=["create_multipart_upload", "list_multipart_uploads"])
+    s3_storage.list_multipart_uploads.return_value = [
+        ("uploads/old.zip", "old", now - datetime.timedelta(days=2)),
+        ("uploads/new.zip", "new", now),
+    ]
+    s3_storage.listdir = Mock(side_effect=FileNotFoundError)
+
+    assert list(uploads.iter_expired_uploads(s3_storage, "uploads")) == [
+        ("uploads/old.zip", "old")
+    ]
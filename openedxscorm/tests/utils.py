@@ -0,0 +1,115 @@
+"""
+Helpers to create SCORM blocks and packages in tests, without an Open edX runtime.
+"""
+
+import io
+import zipfile
+
+import mock
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from webob import Request
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+
+from openedxscorm.scormxblock import ScormXBlock
+
+COURSE_KEY = CourseKey.from_string("course-v1:Org+Course+Run")
+USAGE_KEY = UsageKey.from_string("block-v1:Org+Course+Run+type@scorm+block@abcd123")
+
+IMSMANIFEST = b"""<?xml version="1.0"?>
+<manifest identifier="m" xmlns="http://www.imsglobal.org/xsd/imscp_v1p1">
+  <metadata><schemaversion>2004 4th Edition</schemaversion></metadata>
+  <organizations default="o">
+    <organization identifier="o">
+      <title>Course</title>
+      <item identifier="i1" identifierref="r1" isvisible="true">
+        <title>One</title>
+        <item identifier="i2" identifierref="r2" isvisible="true">
+          <title>Two</title>
+        </item>
+      </item>
+    </organization>
+  </organizations>
+  <resources>
+    <resource identifier="r1" href="content/index.html"/>
+    <resource identifier="r2" href="content/two.html"/>
+  </resources>
+</manifest>
+"""
+
+STUDIO_PARAMS = {
+    "display_name": "Package",
+    "width": "",
+    "height": "",
+    "has_score": "0",
+    "enable_navigation_menu": "1",
+    "navigation_menu_width": "",
+    "weight": "1",
+    "popup_on_launch": "0",
+    "scorm_s3_path": "",
+}
+
+
+def make_block(storage, xblock_settings=None, **fields):
+    """
+    Return a ScormXBlock with a mock runtime, the given xblock settings and storage
+    backend. Handler urls are "/handler/<handler name>/?". Detached copies of the
+    block, which run package jobs, share the same runtime and storage.
+    """
+    runtime = mock.Mock()
+    runtime.handler_url.side_effect = (
+        lambda block, name, *args, **kwargs: f"/handler/{name}/?"
+    )
+    service = runtime.service.return_value
+    service.get_settings_bucket.return_value = xblock_settings or {}
+    service._django_user.is_authenticated = True
+    service.get_current_user.return_value.opt_attrs = {}
+
+    def construct_xblock_from_class(cls, scope_ids, field_data):
+        block = cls(runtime, field_data, scope_ids)
+        block.location = USAGE_KEY
+        block._storage = storage
+        return block
+
+    runtime.construct_xblock_from_class.side_effect = construct_xblock_from_class
+    return construct_xblock_from_class(
+        ScormXBlock,
+        ScopeIds("user", "scorm", USAGE_KEY, USAGE_KEY),
+        DictFieldData(fields),
+    )
+
+
+def make_package(index=b"<html>index</html>", root="package/"):
+    """
+    Return the content of a zip package, the files of which are below `root`.
+    """
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as package_zip:
+        package_zip.writestr(root + "imsmanifest.xml", IMSMANIFEST)
+        package_zip.writestr(root + "content/index.html", index)
+        package_zip.writestr(root + "content/two.html", b"<html>two</html>")
+        package_zip.writestr(root + "content/app.js", b"var x = 1;\n" * 1000)
+        # Large enough for the upload to be spooled to a named temporary file
+        package_zip.writestr(
+            root + "content/image.png", bytes(range(256)) * 16, zipfile.ZIP_STORED
+        )
+    return package.getvalue()
+
+
+def submit_package(block, content=None, **params):
+    """
+    Submit the Studio form of a block, along with a package file, if any.
+    """
+    post = dict(STUDIO_PARAMS, **params)
+    if content is not None:
+        post["file"] = ("package.zip", content)
+    return block.studio_submit(Request.blank("/", POST=post), "")
+
+
+def get_package_job_status(block):
+    """
+    Poll the job that processes the last uploaded package of a block.
+    """
+    return block.package_job_status(
+        Request.blank("/", method="POST", body=b"{}"), ""
+    ).json
@@ -0,0 +1,310 @@
+"""
+Resumable, chunked uploads of packages from Studio.
+
+Large packages are not posted in a single request to `studio_submit`: Studio splits
+them in parts, which are uploaded independently, a few at a time, and may be uploaded
+again after a failure. Once all parts are uploaded, the upload is completed into a
+single object of the storage backend, from which the package is then processed.
+
+- With S3 storages, parts are uploaded by the browser straight to the bucket with
+  presigned urls of an S3 multipart upload. The bucket must have a CORS policy that
+  allows PUT requests from Studio.
+- With other storages, parts are uploaded to the `upload_package_part` handler, stored as
+  separate files, and concatenated on completion.
+
+The state of uploads is stored in the Django cache. Uploads that are restarted or that
+cannot be completed are aborted right away, and their parts deleted. Abandoned uploads
+expire along with their state, and their files are deleted by the `scorm_gc_packages`
+management command.
+"""
+
+import datetime
+import logging
+import os
+import uuid
+
+from django.core.cache import cache
+from django.core.files.base import File
+from django.utils import timezone
+
+from .storage import delete_folder, iter_folder_files
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedxscorm.upload"
+UPLOADS_FOLDER = "uploads"
+UPLOAD_TIMEOUT = 24 * 60 * 60
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+# S3 limits
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+class UploadError(Exception):
+    pass
+
+
+def is_enabled(xblock_settings):
+    return xblock_settings.get("CHUNKED_UPLOAD", False)
+
+
+def is_multipart(storage):
+    """
+    Return True if parts are uploaded straight to the storage backend.
+    """
+    return hasattr(storage, "create_multipart_upload")
+
+
+def get_folder(scorm_location):
+    """
+    Return the folder where packages are uploaded and staged before they are processed.
+    """
+    return os.path.join(scorm_location, UPLOADS_FOLDER)
+
+
+def get_cache_key(upload_id):
+    return f"{CACHE_KEY_PREFIX}.{upload_id}"
+
+
+def get_part_size(size, part_size=DEFAULT_PART_SIZE):
+    """
+    Return the size of the parts of a file, which is increased for very large files
+    such that there are no more than `MAX_PARTS` parts.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    return max(part_size, -(-size // MAX_PARTS))
+
+
+def create_upload(storage, usage_id, folder, name, size, part_size=DEFAULT_PART_SIZE):
+    """
+    Start the upload of a package of the given size to the storage folder, and return
+    its id and state.
+    """
+    if size <= 0:
+        raise UploadError("The package is empty")
+    upload_id = uuid.uuid4().hex
+    part_size = get_part_size(size, part_size)
+    upload = {
+        "usage_id": str(usage_id),
+        "path": os.path.join(folder, f"{upload_id}.zip"),
+        "name": name,
+        "size": size,
+        "part_size": part_size,
+        "part_count": -(-size // part_size),
+        "multipart_id": None,
+        "completed": False,
+    }
+    if is_multipart(storage):
+        upload["multipart_id"] = storage.create_multipart_upload(upload["path"])
+    cache.set(get_cache_key(upload_id), upload, UPLOAD_TIMEOUT)
+    return upload_id, upload
+
+
+def get_upload(upload_id, usage_id):
+    """
+    Return the state of an upload of the given xblock, or None if it does not exist
+    (anymore).
+    """
+    upload = cache.get(get_cache_key(upload_id))
+    if upload is None or upload["usage_id"] != str(usage_id):
+        return None
+    return upload
+
+
+def delete_upload(upload_id):
+    cache.delete(get_cache_key(upload_id))
+
+
+def get_parts_folder(upload):
+    return f"{upload['path']}.parts"
+
+
+def get_part_path(upload, part_number):
+    return f"{get_parts_folder(upload)}/{part_number:05d}"
+
+
+def get_part_length(upload, part_number):
+    if part_number == upload["part_count"]:
+        return upload["size"] - (part_number - 1) * upload["part_size"]
+    return upload["part_size"]
+
+
+def get_uploaded_parts(storage, upload):
+    """
+    Return the numbers of the parts that were uploaded so far.
+    """
+    if upload["multipart_id"]:
+        return set(
+            storage.list_upload_parts(upload["path"], upload["multipart_id"])
+        )
+    try:
+        _folders, files = storage.listdir(get_parts_folder(upload))
+    except FileNotFoundError:
+        return set()
+    return {int(name) for name in files if name.isdigit()}
+
+
+def get_part_urls(storage, upload, part_numbers, handler_url, expire):
+    """
+    Return the urls to which the given parts must be uploaded with PUT requests.
+    """
+    if upload["multipart_id"]:
+        return {
+            part_number: storage.get_upload_part_url(
+                upload["path"], upload["multipart_id"], part_number, expire
+            )
+            for part_number in part_numbers
+        }
+    return {part_number: handler_url(part_number) for part_number in part_numbers}
+
+
+def save_part(storage, upload, part_number, content, length):
+    """
+    Store a part that was uploaded to the `upload_package_part` handler. Parts that are
+    uploaded again replace the previous attempts.
+    """
+    if not 1 <= part_number <= upload["part_count"]:
+        raise UploadError(f"Invalid part number: {part_number}")
+    if length != get_part_length(upload, part_number):
+        raise UploadError(f"Invalid size of part {part_number}: {length}")
+    part_path = get_part_path(upload, part_number)
+    if storage.exists(part_path):
+        storage.delete(part_path)
+    storage.save(part_path, File(content))
+
+
+def complete_upload(storage, upload_id, upload):
+    """
+    Assemble the uploaded parts into a single stored file. Raise UploadError if parts
+    are missing, in which case they may still be uploaded. If the parts cannot be
+    assembled, the upload is aborted and must be started again.
+    """
+    if upload["completed"]:
+        return
+    if upload["multipart_id"]:
+        etags = storage.list_upload_parts(upload["path"], upload["multipart_id"])
+        part_numbers = set(etags)
+    else:
+        part_numbers = get_uploaded_parts(storage, upload)
+    missing = set(range(1, upload["part_count"] + 1)) - part_numbers
+    if missing:
+        raise UploadError(f"Missing {len(missing)} parts, such as part {min(missing)}")
+
+    try:
+        if upload["multipart_id"]:
+            storage.complete_multipart_upload(
+                upload["path"], upload["multipart_id"], etags
+            )
+        else:
+            part_paths = [
+                get_part_path(upload, part_number)
+                for part_number in range(1, upload["part_count"] + 1)
+            ]
+            assembled = File(PartsReader(storage, part_paths))
+            assembled.size = upload["size"]
+            storage.save(upload["path"], assembled)
+            for part_path in part_paths:
+                storage.delete(part_path)
+        if storage.size(upload["path"]) != upload["size"]:
+            raise UploadError("The size of the uploaded package is invalid")
+    except Exception as e:
+        abort_upload(storage, upload)
+        delete_upload(upload_id)
+        if isinstance(e, UploadError):
+            raise
+        logger.exception("Error completing the upload of %s", upload["path"])
+        raise UploadError(f"Could not assemble the uploaded package: {e}") from e
+    upload["completed"] = True
+    cache.set(get_cache_key(upload_id), upload, UPLOAD_TIMEOUT)
+
+
+def abort_upload(storage, upload):
+    """
+    Delete the uploaded parts of an upload, along with the assembled file, if any.
+    Errors are logged, since abandoned files are eventually deleted by
+    `delete_expired_uploads` anyway.
+    """
+    try:
+        if upload["multipart_id"]:
+            storage.abort_multipart_upload(upload["path"], upload["multipart_id"])
+        else:
+            delete_folder(storage, get_parts_folder(upload))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Could not abort the upload of %s: %s", upload["path"], e)
+    try:
+        if storage.exists(upload["path"]):
+            storage.delete(upload["path"])
+    except Exception as e:
+        logger.warning("Could not delete %s: %s", upload["path"], e)
+
+
+def iter_expired_uploads(storage, folder, timeout=UPLOAD_TIMEOUT):
+    """
+    Yield the (name, multipart id) of the files and multipart uploads of the uploads
+    folder that are older than `timeout` seconds, and thus no longer referenced by any
+    upload or job. The multipart id of stored files, such as parts and staged
+    packages, is None.
+    """
+    delta = datetime.timedelta(seconds=timeout)
+    if is_multipart(storage):
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - delta
+        for name, multipart_id, initiated in storage.list_multipart_uploads(folder):
+            if initiated < cutoff:
+                yield name, multipart_id
+    cutoff = timezone.now() - delta
+    try:
+        names = list(iter_folder_files(storage, folder))
+    except FileNotFoundError:
+        return
+    for name in names:
+        if storage.get_modified_time(name) < cutoff:
+            yield name, None
+
+
+def delete_expired_upload(storage, name, multipart_id):
+    if multipart_id:
+        storage.abort_multipart_upload(name, multipart_id)
+    else:
+        storage.delete(name)
+
+
+class PartsReader:
+    """
+    Read-only file object that reads stored files one after the other.
+    """
+
+    def __init__(self, storage, names):
+        self.storage = storage
+        self.names = list(names)
+        self.current = None
+
+    def read(self, size=-1):
+        chunks = []
+        while size != 0:
+            if self.current is None:
+                if not self.names:
+                    break
+                self.current = self.storage.open(self.names.pop(0), "rb")
+            chunk = self.current.read(size)
+            if not chunk:
+                self.current.close()
+                self.current = None
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        self.names = []
@@ -60,9 +60,14 @@ setup(
         "Issue tracker": "https://github.com/overhangio/openedx-scorm-xblock/issues",
         "Community": "https://discuss.openedx.com",
     },
-    packages=["openedxscorm"],
+    packages=[
+        "openedxscorm",
+        "openedxscorm.management",
+        "openedxscorm.management.commands",
+    ],
     python_requires=">=3.8",
     install_requires=["xblock", "web-fragments"],
+    extras_require={"brotli": ["brotli"]},
     entry_points={
         "xblock.v1": ["scorm = openedxscorm.scormxblock:ScormXBlock"],
         "cms.djangoapp": [